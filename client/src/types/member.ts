@@ -1,15 +1,12 @@
+// the MemberCard columns /table/filtered returns when no `fields=` is given
 export type Member = {
   id: number;
   countryCode: string;
   countryName: string;
   gender: string;
   goal: string;
-  goalOther: string;
   role: string;
   soloProjectTier: number;
-  source: string;
-  sourceOther: string;
   timestamp: string;
-  voyageSignupIds: number;
   voyageTiers: string[];
 };
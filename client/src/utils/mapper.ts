@@ -7,13 +7,9 @@ const mapper = (raw: any): Member => {
     countryName: raw.Country_Name,
     gender: raw.Gender,
     goal: raw.Goal,
-    goalOther: raw.Goal_Other,
     role: raw.Role,
     soloProjectTier: raw.Solo_Project_Tier,
-    source: raw.Source,
-    sourceOther: raw.Source_Other,
     timestamp: raw.Timestamp,
-    voyageSignupIds: raw.Voyage_Signup_ids,
     voyageTiers: raw.Voyage_Tiers,
   };
 };
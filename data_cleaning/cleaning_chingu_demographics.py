@@ -1,548 +1,729 @@
 #!/usr/bin/env python
-# coding: utf-8
-
-# # Chingu Member Data Cleaning v58
-
-# # Project Overview
-# This project's ultimate aim is to create an app that visualizes demographics for Chingu Members. Further project requirements and specifications set by the Chingu Organization can be found on github here: https://github.com/chingu-voyages/voyage-project-chingu-map
-# # Our Team: 
-# - Formed for Voyage 58, we are team 37
-# - Michael, Shruti, Jessica, Henry, Gisele
-# - Our github repo containing the solution to the requirements: [V58-tier3-team-37](https://github.com/chingu-voyages/V58-tier3-team-37)
-# # This Notebook's Goal
-# - Prepare the raw data so that it's usable for demographic visualizations per the requirements
-# 	- become familar with the data
-# 	- remove illogical data
-# 	- remove duplicate data
-# 	- separate or normalize the data into logical tables
-# 	- report information on data that was removed
-# - This notebook contains the steps needed are to clean up the raw data and the reasoning behind them.
-# # Data Source
-# The json document was provided on github in the project details here: 
-# https://github.com/chingu-voyages/voyage-project-chingu-map/blob/main/src/assets/chingu_info.json
-
-# # Downloading, Inspecting & Planning
-# 1. Download the data
-# 2. inspect the input format
-# 3. decide on a strategy to flatten the data into tables
-
-# In[838]:
+"""Download, clean & prepare the chingu_member data for BigQuery.
 
+The exploration and the reasoning behind every step are in `cleaning_chingu_demographics.ipynb`.
+This module holds the same steps as importable stages: each takes the members DataFrame, adds its
+cleaned columns and returns it, so a stage can be run, timed or reused on its own. Every stage is
+vectorized (pandas string methods, numpy arithmetic and lookups) instead of mapping a Python
+function over the rows.
 
-import pandas as pd
-import requests
-import json
-from os import path
-
-from os import makedirs
-makedirs('data', exist_ok=True)
-
-raw_url = 'https://raw.githubusercontent.com/chingu-voyages/voyage-project-chingu-map/main/src/assets/chingu_info.json'
-saved_filepath = "./data/chingu_members.json"
-
-if not path.exists(saved_filepath):
-    print("Downloaded data.")
-
-    response = requests.get(raw_url)
-    if response.status_code == 200:
-        chingu_info = response.json()
-        print(json.dumps(chingu_info[:50], indent=2))
-        with open("./data/chingu_members.json", 'w') as f:
-            json.dump(chingu_info, f, indent=2)
-    else:
-        raise Exception(f"Failed to fetch JSON: {response.status_code}")
-
-with open("./data/chingu_members.json") as f:
-    data = json.load(f)
-    print(json.dumps(data, indent=4))
-
-
-# # First impressions
-# This appears to be a standard users dataset.
-# There are some special characters in column names that need to be removed and some types that need validation.
-# Before cleaning I'll get statistics and the unique values for each column to better understand the data.
-
-# In[839]:
-
-
-import pandas as pd
-df = pd.read_json("data/chingu_members.json")
-df.info()
-
-
-# In[840]:
-
-
-# display a short list of the unique values in each column
-for column in df.columns:
-    unique_values = df[column].unique()
-    print(f"Column: {column}")
-    print(f"Unique values ({len(unique_values)}): {unique_values[:10]}")
-
-
-# 
-# # Inferred Column Descriptions
-# 
-# | Column | Type | Description |
-# |---|---|---|
-# | **Timestamp** | datetime | Signup date for the member submission time (format "YYYY-MM-DD HH:MM") |
-# | **Gender** | categorical | Gender the chingu selected in their signup form. 'MALE' 'FEMALE' 'PREFER NOT TO SAY' 'NON-BINARY' 'TRANS' |
-# | **Country Code** | ISO alpha-2-ish | Short country codes for a chingu's country of origin (e.g. US, IN, GB) |
-# | **Timezone** | categorical | Timezone for which the chingu resides. ("GMT-4", "GMT-5". Input seems to be messy with location sometimes included |
-# | **Goal** | categorical | Standardized responses for a user wants out of Chingu (GAIN EXPERIENCE, ACCELERATE LEARNING, ...) |
-# | **Goal-Other** | free text | Supplied elaboration when Goal = OTHER. |
-# | **Source** | categorical | Standardized responses for how users found Chingu (PERSONAL NETWORK, GOOGLE SEARCH, etc.). |
-# | **Source-Other** | free text | Additional source detail when Source = OTHER. |
-# | **Country name (from Country)** | categorical | Verbose country name that's redundant with Country Code. |
-# | **Solo Project Tier** | categorical | Tier of project a chingu completed and associated description with that tier |
-# | **Role Type** | categorical | Type of developer a chingu member is |
-# | **Voyage Role** | categorical | Role the chingu takes in a Voyage: Developer, Scrum Master, Product Owner, UI/UX Designer. |
-# | **Voyage (from Voyage Signups)** | semi-structured | List of voyages a chingu has participated in |
-# | **Voyage Tier** | semi-structured | List of skill levels for the team assigned to in the voyage signup. |
-# 
-
-# # Cleaning Plan Overview
-# - replace special characters in the column names with '_'
-# - convert empty strings are converted to `NULL` / `None`
-# 
-# - `Goal-Other`, `Source-Other`: Trim whitespace
-# - `Goal-Other`, `Source-Other`: empty strings are converted to `None`/`NULL`
-# 
-# - add a Serially incrementing `id` column for the primary key 
-# 
-# - `Timestamp`: Convert to UTC - Parse to pandas datetime (coerce errors)
-# 
-# - `Timezone`: messy, coerce into categorical values
-# - `Timezone`: extract UTC offset tokens (e.g., GMT±n) into a numeric offset column
-# 
-# - `Country name`: some don't match `Country Code`. Use a ISO-3166 alpha-2 mapping to create a new verbose country name col. Report rows that aren't just empty but mismatch between the new and the old verbose `Country name`
-# 
-# - prepare members filterable by `Voyage Signups` & `Voyage Tier` 
-# 	- analyze what data is in `Voyage Signups` & `Voyage Tiers`
-# 		- extract those values to sets
-# 	- clean and extract values to numerical lists in each row
-# 	- upload the new dataset to `...extra_clean` BQ dataset
-# 
-# - Export the new tables to NDJSON (newline-delimited JSON) for BigQuery ingestion
-# 
-# - (Potential Future Plans) Add arrayed values (`Voyage Signups`,`Voyage Tier`) into separate table: `Voyage_Signups`
-# - rows in `Voyage_Signups` will be key linked to chingu member row from which they were taken from
-# 
-# - TODO: create another jupyternb for clearning the `Voyage_Signups` table
-
-# # Investigating & Cleaning `Solo Project Tier`
-
-# In[841]:
-
-
-# Solo Project Tier is the only column name with spaces instead of underscores
-# renaming for consistency
-before_renaming = df.columns
-df.rename(columns={"Solo Project Tier":"Solo_Project_Tier"}, inplace=True)
-
-
-# In[842]:
-
-
-df['Solo_Project_Tier'].value_counts()
-
-
-# In[843]:
-
-
-# There appears to be no errors in solo project tier so I'll simply extract the Tier
-df['Solo_Project_Tier_cleaned'] = pd.to_numeric(
-    df['Solo_Project_Tier'].str.extract(r"^Tier\s+(\d).*", expand=False),
-    errors='coerce'
-).astype('Int64')
-
-before = 'Solo_Project_Tier'
-after = 'Solo_Project_Tier_cleaned'
-df[[before, after]].drop_duplicates()
-
-
-# In[844]:
-
-
-print(df.columns)
-df.columns = df.columns.str.replace(pat='Country name (from Country)', repl='Country_name')
-df.columns = df.columns.str.replace(pat=r'[^A-Za-z0-9]+', repl='_', regex=True)
-df.columns = df.columns.str.strip('_')
-print(df.columns)
-
-
-# In[845]:
-
-
-df.info()
-
-
-# In[846]:
-
+Run from `data_cleaning/`:
 
-df.replace('', None, inplace=True)
-df.info()
+    python3 cleaning_chingu_demographics.py
 
+The clean data is saved to `data/chingu_members_cleaned.json`, newline-delimited for BigQuery.
+With `--stream` the raw json array is parsed incrementally and cleaned `--chunk-size` members at a
+time, each chunk appended to the output, so memory stays bounded however large the export grows.
+`--workers N` cleans the chunks on N processes. The results of the expensive per-value cleaners
+are kept in `data/transform_cache.json` and reused by the next run.
 
-# In[847]:
-
-
-# Timestamp: Convert to UTC - Parse to pandas datetime (coerce errors)
-df['Timestamp_cleaned'] = pd.to_datetime(df['Timestamp'], errors='coerce').dt.tz_localize('UTC')
-df.head()
-
-
-# In[848]:
-
-
-rough_timezones = df['Timezone'].unique()
-print(rough_timezones)
-
-
-# # Cleaning `Timezone`
-# To clean the `Timezone` column I will.
-# - coerce dash characters into 1 type
-# - convert values greater than 12 or lower than -11 into appropriately offset values
-# - coerce all other values into `None`/`null`
-# - create a new numeric column with just the GMT offset value
-
-# In[849]:
-
-
-# coerce values into the range of 12 to -11. Account of too high/low levels
-def coerce_gmt_offset(offset: int):
-    offset = offset%24
-    if offset > 12:
-        offset -= 24
-    elif offset < -11:
-        offset += 24
-
-    return offset
-
-offsets =  [25, 24, 23, 13, 12, 11, 5, 1, 0, -1, -5, -11, -12, -13, -20, -23, -24, -25]
-expected = [1,  0, -1, -11, 12, 11, 5, 1, 0, -1, -5, -11,  12,  11,   4,   1,   0, -1]
-
-for offset, answer in zip(offsets, expected):
-    processed_offset = coerce_gmt_offset(offset)
-    assert processed_offset==answer
-
-
-# In[850]:
-
-
-# coerce dash characters into 1 type
-# replace empty `GMT` into `GMT+0`
-# convert values greater than 12 or lower than -11 into appropriately offset values
-# coerce all other values into None
-
+With `--incremental` only members that are new or changed since the last incremental run are
+cleaned; they are written to a delta file (NDJSON or Parquet) for an append or MERGE load.
+"""
+import argparse
+import hashlib
+import json
 import re
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from itertools import islice
+from importlib.metadata import PackageNotFoundError, version
+from os import makedirs, path, replace
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, TextIO, Tuple
+
+import numpy as np
+import pandas as pd
+import requests
 
-def normalize_gmt(tz):
-    if tz is None or tz == "":
-        return None
-
-    # normalize dash types
-    tz = re.sub(r"−", "-", tz)
-
-    m = re.match(r"GMT\s*([+-]?\d+)", tz, re.IGNORECASE)
-    if not m:
-        return None
-
-    offset = int(m.group(1))
-    offset = coerce_gmt_offset(offset)
-    result = (f"GMT+{offset}" if offset >= 0 else f"GMT{offset}")
-    return result
-
-rough_timezones = [None, 'GMT-5 (New York)', 'GMT−5', 'GMT−8', 'GMT+1', 'GMT-5', 'GMT-8', 'GMT+3',
- 'GMT+5', 'GMT+10', 'GMT-12', 'GMT+6', 'GMT-6', 'GMT+2', 'GMT+8', 'GMT-0', 'GMT-7',
- 'GMT-4', 'GMT+7', 'GMT+9', 'GMT-2', 'GMT-3', 'GMT+4', 'GMT+0', 'GMT+12', 'GMT−7',
- 'GMT−6', 'GMT−3', 'GMT−1', 'GMT−10', 'GMT−4', 'GMT+22', '#N/A', 'GMT+)']
-
-
-expected_timezones = [None,'GMT-5','GMT-5', 'GMT-8', 'GMT+1', 'GMT-5', 'GMT-8', 'GMT+3',
- 'GMT+5', 'GMT+10', 'GMT+12', 'GMT+6', 'GMT-6', 'GMT+2', 'GMT+8', 'GMT+0', 'GMT-7',
- 'GMT-4', 'GMT+7', 'GMT+9', 'GMT-2', 'GMT-3', 'GMT+4', 'GMT+0', 'GMT+12', 'GMT-7',
- 'GMT-6', 'GMT-3', 'GMT-1', 'GMT-10', 'GMT-4', 'GMT-2', None, None]
-for rough_tz, answer_tz  in zip(rough_timezones, expected_timezones):
-    processed_tz = normalize_gmt(rough_tz)
-    assert processed_offset==answer
-    # print(rough_tz, processed_tz, answer_tz, processed_tz==answer_tz)
-
-
-# In[851]:
-
-
-# confirming Timezones are cleaned correctly
-before = 'Timezone'
-after = 'Timezone_cleaned'
-
-df['Timezone_cleaned'] = df['Timezone'].map(normalize_gmt)
-
-changed_mask = (df[before] != df[after])
-df.loc[changed_mask, [before, after]].value_counts()
-
-
-# In[852]:
-
-
-# create a numerical column for easier filtering in the future
-# prefer expand=False to get a Series; coerce non-numeric to NaN, then use nullable Int64
-df['GMT_Offset'] = pd.to_numeric(
-    df['Timezone_cleaned'].str.extract(r"GMT\s*([+-]?\d+)", expand=False),
-    errors='coerce'
-).astype('Int64')
-
-before = 'Timezone_cleaned'
-after = 'GMT_Offset'
-changed_mask = (df[before] != df[after])
-df.loc[changed_mask, [before, after]].drop_duplicates()
-
-
-# # Investigating `Country_Code` and `Country_name`
-
-# In[853]:
-
-
-# Finding miss matches between `Country_Code` to `Country_name`
-df_filtered = df[['Country_Code', 'Country_name']].drop_duplicates().groupby('Country_Code').filter(func=lambda x: len(x) > 1, dropna=True)
-
-df_filtered.sort_values('Country_Code')
-
-
-# In[854]:
-
-
-# Finding miss matches between `Country_Code` to `Country_name`
-# Find `Country_Code` mapping to NOT ONLY None values but multiple `Country_name`
-empty_country_name_filter = df['Country_name'].isnull()
-df_filtered = df[empty_country_name_filter != True]
-df_filtered = df_filtered[['Country_Code', 'Country_name']].drop_duplicates().groupby('Country_Code').filter(func=lambda x: len(x) > 1, dropna=True)
-
-df_filtered.sort_values('Country_Code')
-
-
-# # Cleaning `Country_Code` and `Country_name`
-# The previous 2 cells demonstrate that `Country_Code` not only maps to `None` values but also incorrect values. Earlier when we removed empty string values from all of the data, it showed that the `Country_Code` column was 99% complete. I think it's reasonable to assume it's validity over the `Country_name` column entirely and remake `Country_name` column using `Country_Code`.
-
-# In[855]:
-
-
-import country_converter as coco
-cc = coco.CountryConverter()
-
-
-# In[856]:
-
-
-# coerce country Codes to acceptable names
-
-# NOTE: null/None `Country_Code` are set to the STRING 'None' and require cleaning later
-df['Country_Name_cleaned'] = cc.convert(
-    df['Country_Code'],
-    to='name_short',
-    not_found=None
-)
-
-
-# In[857]:
-
-
-df['Country_Code'].unique()
-
-
-# In[858]:
-
-
-No_Code = df['Country_Code']==None
-PH_filter = df['Country_Code']=='Philippines (PH)'
-UT_filter = df['Country_Code']=='UT'
-country_filter = PH_filter | UT_filter | No_Code
-print(df[country_filter][['Country_Code', 'Country_name', 'Country_Name_cleaned']])
-
-
-# In[859]:
-
-
-# errors in 'Country_name' and 'Country_Name_cleaned' are so few now, we can clean them manually
-df['Country_Code_cleaned'] = df['Country_Code'].replace({'Philippines (PH)':'PH', 'UT': None})
-df['Country_Name_cleaned'] = df['Country_Name_cleaned'].replace({'UT': None, 'None': None})
-
-No_Code = df['Country_Code']==None
-No_Code = df['Country_Name_cleaned']==None
-PH_filter = df['Country_Code']=='Philippines (PH)'
-UT_filter = df['Country_Code']=='UT'
-country_filter = PH_filter | UT_filter | No_Code
-
-print(df[country_filter][['Country_Code', 'Country_name', 'Country_Code_cleaned', 'Country_Name_cleaned']])
-print(df[df['Country_Code_cleaned'].isnull()][['Country_Code', 'Country_name', 'Country_Code_cleaned', 'Country_Name_cleaned']])
-
-
-# In[860]:
-
-
-before = 'Country_name'
-after = 'Country_Name_cleaned'
-
-changed_mask = (df[before] != df[after]) & ~(df[before].isna() & df[after].isna())
-df.loc[changed_mask, ['Country_Code_cleaned', before, after]].drop_duplicates()
-
-
-# In[861]:
-
-
-# Confirming `Role_Type` is just a subrole of `Voyage_Role`
-df_grouped = df.groupby(['Voyage_Role', 'Role_Type'], dropna=False).size()
-print(df_grouped)
-
-
-# # Understanding `Role_Type` and Consolidating with `Voyage_Role`
-# I'm unsure why this is the case and requires investigation in the future. For now they will be simpley marked as `Developer` under their `Role`.
-
-# In[862]:
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # only needed for --delta-format parquet
+    pa = pq = None
 
+RAW_URL = 'https://raw.githubusercontent.com/chingu-voyages/voyage-project-chingu-map/main/src/assets/chingu_info.json'
+RAW_PATH = 'data/chingu_members.json'
+CLEANED_PATH = 'data/chingu_members_cleaned.json'
 
-# combine `Role_Type` & `Voyage_Role` into `Role`
+# old dirty columns, replaced by their `_cleaned` versions or folded into `Role`
+DIRTY_COLUMNS = [
+    'Timestamp',
+    'Timezone',
+    'Country_name',
+    'Role_Type',
+    'Voyage_Role',
+    'Country_Code',
+    'Voyage_Tier',
+    'Voyage_from_Voyage_Signups',
+    'Solo_Project_Tier'
+]
 
-# df['Role_agg'] = df[['Role_Type', 'Voyage_Role']].agg(lambda x: ' '.join(x.dropna()), axis='columns') # Alternate code to do this 
-df['Role'] = df['Role_Type'].str.cat(df['Voyage_Role'], sep=' ', na_rep='').str.strip()
-df['Role'] = df['Role'].replace(to_replace='', value=None)
-df['Role'].value_counts(dropna=False)
+# give columns their final names
+FINAL_NAMES = {
+    'Timestamp_cleaned': 'Timestamp',
+    'Timezone_cleaned': 'Timezone',
+    'Country_Name_cleaned': 'Country_Name',
+    'Country_Code_cleaned': 'Country_Code',
+    'Voyage_Signup_split': 'Voyage_Tiers',
+    'Solo_Project_Tier_cleaned': 'Solo_Project_Tier'
+}
 
+GMT_PATTERN = re.compile(r"^GMT\s*([+-]?\d+)", re.IGNORECASE)
+# every offset coerce_gmt_offset can return, -11..12, as its label: GMT-11 ... GMT+0 ... GMT+12
+GMT_LABELS = np.array([f"GMT{offset:+d}" for offset in range(-11, 13)], dtype=object)
+
+TRANSFORM_CACHE_PATH = 'data/transform_cache.json'
+WATERMARK_PATH = 'data/watermark.json'
+DELTA_PATHS = {'ndjson': 'data/chingu_members_delta.json', 'parquet': 'data/chingu_members_delta.parquet'}
+# the raw export has no member id: the signup form's answers, fixed once submitted, identify a member
+MEMBER_KEY_FIELDS = ['Timestamp', 'Gender', 'Country Code', 'Goal', 'Goal-Other', 'Source', 'Source-Other']
+# bump when a memoized cleaner changes, so lookup tables saved by older code are dropped
+TRANSFORM_CACHE_VERSION = 1
+
+# errors in the country codes are so few, they are fixed by hand
+COUNTRY_CODE_FIXES = {'Philippines (PH)': 'PH', 'UT': None}
+COUNTRY_NAME_FIXES = {'UT': None, 'None': None}
+
+
+# # Downloading & Loading
+
+def download_members(url: str = RAW_URL, raw_path: str = RAW_PATH, refresh: bool = False) -> str:
+    """Save the raw member json to `raw_path`, unless it's already there."""
+    if path.exists(raw_path) and not refresh:
+        return raw_path
+    makedirs(path.dirname(raw_path) or '.', exist_ok=True)
+    with requests.get(url, stream=True) as response:
+        if response.status_code != 200:
+            raise Exception(f"Failed to fetch JSON: {response.status_code}")
+        # written as it arrives, never held in memory whole
+        with open(raw_path, 'wb') as f:
+            for block in response.iter_content(chunk_size=1 << 16):
+                f.write(block)
+    return raw_path
+
+
+def load_members(raw_path: str = RAW_PATH) -> pd.DataFrame:
+    return pd.read_json(raw_path)
+
+
+# what may follow a number that reaches the end of the buffer, if the number was cut there ('2.' of '2.5')
+_NUMBER_TAIL = re.compile(r'[0-9.eE+-]*')
+_WHITESPACE = ' \t\r\n'
+
+
+def _truncated(error: json.JSONDecodeError, buffer: str) -> bool:
+    """Whether a decode error may only mean the item continues past the end of the buffer."""
+    # a cut \uXXXX escape or literal ('tru') fails a few characters before the end
+    return error.msg.startswith('Unterminated string') or error.pos >= len(buffer) - 6
+
+
+def iter_json_array(f: TextIO, read_size: int = 1 << 16, with_text: bool = False) -> Iterator[Any]:
+    """Yield the items of the json array in `f` one by one, reading `read_size` characters at a time.
+
+    With `with_text` each item comes as an `(item, text)` pair, `text` being its json as it is in `f`.
+    Raises `json.JSONDecodeError` on anything but `[`, items separated by single commas, and `]`.
+    """
+    decoder = json.JSONDecoder()
+    buffer = ''
+    position = 0
+    # '[' first, then an item or ']' ('first'), then ',' or ']' ('separator'), then an item ('item')
+    expecting = '['
+    eof = False
+    while True:
+        while position < len(buffer) and buffer[position] in _WHITESPACE:
+            position += 1
+        if position < len(buffer):
+            char = buffer[position]
+            if expecting == '[':
+                if char != '[':
+                    raise json.JSONDecodeError("Expecting '['", buffer, position)
+                expecting = 'first'
+                position += 1
+                continue
+            if expecting == 'separator' or (expecting == 'first' and char == ']'):
+                if char == ']':
+                    return
+                if char != ',':
+                    raise json.JSONDecodeError("Expecting ',' delimiter", buffer, position)
+                expecting = 'item'
+                position += 1
+                continue
+            try:
+                item, end = decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError as error:
+                if eof or not _truncated(error, buffer):
+                    raise
+            else:
+                number = isinstance(item, (int, float)) and not isinstance(item, bool)
+                if eof or not (number and _NUMBER_TAIL.fullmatch(buffer, end)):
+                    yield (item, buffer[position:end]) if with_text else item
+                    expecting = 'separator'
+                    position = end
+                    continue
+        elif eof:
+            raise json.JSONDecodeError(
+                "Expecting '['" if expecting == '[' else "Expecting ',' delimiter" if expecting == 'separator' else "Expecting value",
+                buffer, position,
+            )
+        block = f.read(read_size)
+        eof = not block
+        buffer = buffer[position:] + block
+        position = 0
+
+
+def iter_record_chunks(raw_path: str = RAW_PATH, chunk_size: int = 10_000) -> Iterator[Tuple[int, List[dict]]]:
+    """The raw member records `chunk_size` at a time, with the position of each chunk's first member."""
+    with open(raw_path) as f:
+        records = []
+        start = 0
+        for record in iter_json_array(f):
+            records.append(record)
+            if len(records) == chunk_size:
+                yield start, records
+                start += len(records)
+                records = []
+        if records:
+            yield start, records
+
+
+def member_chunk(start: int, records: List[dict]) -> pd.DataFrame:
+    """A chunk of raw members, indexed by their positions in the export."""
+    return pd.DataFrame.from_records(records, index=pd.RangeIndex(start, start + len(records)))
+
+
+def iter_member_chunks(raw_path: str = RAW_PATH, chunk_size: int = 10_000) -> Iterator[pd.DataFrame]:
+    for start, records in iter_record_chunks(raw_path, chunk_size):
+        yield member_chunk(start, records)
+
+
+# # Memoized Transforms
+# Most raw columns are low-cardinality: a few dozen country codes, timezones and tiers repeated
+# across thousands of members. The expensive cleaners run once per distinct value, and the
+# results are kept in lookup tables that persist between runs.
+
+class TransformCache:
+    """Lookup tables of per-value cleaners: table name -> {raw value: cleaned value}."""
+
+    def __init__(self):
+        self.tables: Dict[str, Dict[Any, Any]] = {}
+        # entries computed since the last `take_added`, for worker processes to hand back
+        self.added: Dict[str, Dict[Any, Any]] = {}
+        self.computed: Dict[str, int] = {}
+        self.reused: Dict[str, int] = {}
+        self.enabled = True
+
+    def map_distinct(self, values: pd.Series, transform: Callable[[pd.Series], Iterable], table: str,
+                     missing=None) -> np.ndarray:
+        """`transform` applied to the distinct values it has no result for yet, then spread back to every row.
+
+        `transform` takes a Series of distinct values and returns their results in order. Rows
+        with the same value share the resulting object, and missing values get `missing`.
+        """
+        codes, distinct = pd.factorize(values)
+        known = self.tables.setdefault(table, {}) if self.enabled else {}
+        unknown = [value for value in distinct if value not in known]
+        if unknown:
+            computed = dict(zip(unknown, transform(pd.Series(unknown, dtype=object))))
+            known.update(computed)
+            if self.enabled:
+                self.added.setdefault(table, {}).update(computed)
+        self.computed[table] = self.computed.get(table, 0) + len(unknown)
+        self.reused[table] = self.reused.get(table, 0) + len(distinct) - len(unknown)
+
+        results = np.empty(len(distinct) + 1, dtype=object)
+        # one by one: numpy would turn a list of equal-length lists into a 2-d array
+        for position, value in enumerate(distinct):
+            results[position] = known[value]
+        # factorize codes missing values as -1, which takes the last slot
+        results[-1] = missing
+        return results.take(codes)
+
+    def take_added(self) -> Dict[str, Dict[Any, Any]]:
+        added, self.added = self.added, {}
+        return added
+
+    def merge(self, tables: Dict[str, Dict[Any, Any]]):
+        for table, entries in tables.items():
+            self.tables.setdefault(table, {}).update(entries)
+
+    def replace(self, tables: Dict[str, Dict[Any, Any]], enabled: bool = True):
+        self.tables = {table: dict(entries) for table, entries in tables.items()}
+        self.added = {}
+        self.computed = {}
+        self.reused = {}
+        self.enabled = enabled
+
+    def load(self, cache_path: str) -> bool:
+        """Load tables saved by `save`; tables saved by other cleaner versions are ignored."""
+        try:
+            with open(cache_path) as f:
+                saved = json.load(f)
+        except (OSError, ValueError):
+            return False
+        if saved.get('fingerprint') != _transform_fingerprint():
+            return False
+        self.merge(saved['tables'])
+        return True
+
+    def save(self, cache_path: str):
+        makedirs(path.dirname(cache_path) or '.', exist_ok=True)
+        partial_path = cache_path + '.partial'
+        with open(partial_path, 'w') as f:
+            json.dump({'fingerprint': _transform_fingerprint(), 'tables': self.tables}, f)
+        replace(partial_path, cache_path)
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        return {
+            table: {'entries': len(entries), 'computed': self.computed.get(table, 0), 'reused': self.reused.get(table, 0)}
+            for table, entries in self.tables.items()
+        }
+
+
+transform_cache = TransformCache()
 
-# In[863]:
 
+def _transform_fingerprint() -> str:
+    try:
+        converter_version = version('country_converter')
+    except PackageNotFoundError:
+        converter_version = 'unknown'
+    return f"{TRANSFORM_CACHE_VERSION}/country_converter {converter_version}"
 
-# add a simple enumerated id column for database purposes (fast indexing of a primary key)
-df['id'] = range(1, len(df) + 1)
-df.head()
 
+def _optional_ints(transform: Callable[[pd.Series], pd.Series]) -> Callable[[pd.Series], List[Optional[int]]]:
+    """`transform`, with its nullable Int64 results as ints and `None` (json-serializable)."""
+    def as_optional_ints(values: pd.Series) -> List[Optional[int]]:
+        results = transform(values)
+        return [None if pd.isna(result) else int(result) for result in results]
+    return as_optional_ints
+
+
+# # Cleaning Stages
 
-# # Investigating `Voyage_from_Voyage_Signups`
+def rename_columns(df: pd.DataFrame) -> pd.DataFrame:
+    """Replace special characters in the column names with '_'."""
+    columns = df.columns.str.replace('Country name (from Country)', 'Country_name', regex=False)
+    columns = columns.str.replace(r'[^A-Za-z0-9]+', '_', regex=True)
+    df.columns = columns.str.strip('_')
+    return df
 
-# In[864]:
 
+def solo_project_tiers(tiers: pd.Series) -> pd.Series:
+    # there are no errors in solo project tier so simply extract the Tier
+    return pd.to_numeric(tiers.str.extract(r"^Tier\s+(\d).*", expand=False), errors='coerce').astype('Int64')
 
-df["Voyage_from_Voyage_Signups"].unique()
 
+def clean_solo_project_tier(df: pd.DataFrame) -> pd.DataFrame:
+    tiers = transform_cache.map_distinct(df['Solo_Project_Tier'], _optional_ints(solo_project_tiers), 'solo_project_tiers')
+    df['Solo_Project_Tier_cleaned'] = pd.array(tiers, dtype='Int64')
+    return df
 
-# In[865]:
 
+def replace_empty_strings(df: pd.DataFrame) -> pd.DataFrame:
+    """Empty strings are converted to `None`/`NULL`."""
+    return df.replace('', None)
 
-df["Voyage_Signup_ids"] = df["Voyage_from_Voyage_Signups"].str.split(",")
 
-signup_exploded_df = df.explode("Voyage_Signup_ids")
-signup_exploded_df["Voyage_Signup_ids"].value_counts(dropna=False)
+def clean_timestamp(df: pd.DataFrame) -> pd.DataFrame:
+    # Convert to UTC - Parse to pandas datetime (coerce errors)
+    df['Timestamp_cleaned'] = pd.to_datetime(df['Timestamp'], errors='coerce').dt.tz_localize('UTC')
+    return df
 
 
-# # Cleaning Voyage Signup ids
-# 
+def coerce_gmt_offset(offset):
+    """Coerce offsets into the range of 12 to -11, e.g. 22 -> -2 and -12 -> 12.
 
-# In[866]:
+    Works on an int or element-wise on a Series/array: it's only modular arithmetic.
+    """
+    return (offset + 11) % 24 - 11
 
 
-# extract numerical voyage values from `Voyage_from_Voyage_Signups` and create a list of Voyage_Signup_ids
-ex = df['Voyage_from_Voyage_Signups'].astype(str).str.extractall(r"V(\d+)")
-ex = ex.rename(columns={0: 'voyage_num'}).reset_index()
-ex['voyage_num'] = ex['voyage_num'].astype(int)
+def gmt_offsets(timezones: pd.Series) -> pd.Series:
+    """The coerced GMT offset of each messy timezone ('GMT−5', 'GMT-5 (New York)', 'GMT+22'), `<NA>` if there is none."""
+    # coerce dash characters into 1 type
+    hours = timezones.str.replace("−", "-", regex=False).str.extract(GMT_PATTERN, expand=False)
+    return coerce_gmt_offset(pd.to_numeric(hours, errors='coerce').astype('Int64'))
 
-groups = ex.groupby('level_0')['voyage_num'].apply(list)
-df['Voyage_Signup_ids'] = df.index.map(lambda i: groups[i] if i in groups else [])
 
-# verify results
-df[['Voyage_from_Voyage_Signups', 'Voyage_Signup_ids']].drop_duplicates(subset=['Voyage_from_Voyage_Signups'], keep='first')
+def gmt_labels(offsets: pd.Series) -> pd.Series:
+    """'GMT+n' / 'GMT-n' for each offset in -11..12, `None` where the offset is missing."""
+    missing = offsets.isna().to_numpy()
+    positions = offsets.fillna(0).to_numpy(dtype=np.int64) + 11
+    labels = GMT_LABELS.take(positions)
+    labels[missing] = None
+    return pd.Series(labels, index=offsets.index, dtype=object)
 
 
-# # Investigating `Voyage_Tier`
+def clean_timezone(df: pd.DataFrame) -> pd.DataFrame:
+    """Normalize `Timezone` to 'GMT±n' and add the numeric `GMT_Offset`; other values become `None`."""
+    offsets = transform_cache.map_distinct(df['Timezone'], _optional_ints(gmt_offsets), 'gmt_offsets')
+    offsets = pd.Series(pd.array(offsets, dtype='Int64'), index=df.index)
+    df['Timezone_cleaned'] = gmt_labels(offsets)
+    # a numerical column for easier filtering
+    df['GMT_Offset'] = offsets
+    return df
 
-# In[867]:
 
+@lru_cache(maxsize=None)
+def _country_converter():
+    # building the converter takes ~0.1s, too slow to repeat for every streamed chunk
+    import country_converter as coco
+    return coco.CountryConverter()
 
-df["Voyage_Tier"].unique()
 
+def _convert_country_codes(codes: pd.Series) -> List[Optional[str]]:
+    names = _country_converter().convert(codes.tolist(), to='name_short', not_found=None)
+    # country_converter returns a plain string for a single code
+    return [names] if isinstance(names, str) else names
 
-# In[868]:
 
+def country_names(codes: pd.Series) -> pd.Series:
+    """The short country name for each ISO-3166 alpha-2 code; country_converter only sees codes it hasn't seen before."""
+    return pd.Series(transform_cache.map_distinct(codes, _convert_country_codes, 'country_names'), index=codes.index)
 
-# separating the comma separated list
-df["Voyage_Signup_split"] = df["Voyage_Tier"].apply(
-    lambda x: [] if pd.isna(x) else x.split(",")
-)
 
-signup_exploded_df = df.explode("Voyage_Signup_split")
-signup_exploded_df["Voyage_Signup_split"].value_counts(dropna=False)
+def clean_country(df: pd.DataFrame) -> pd.DataFrame:
+    """Remake `Country_name` from `Country_Code`, which is 99% complete and more reliable."""
+    df['Country_Name_cleaned'] = country_names(df['Country_Code']).replace(COUNTRY_NAME_FIXES)
+    df['Country_Code_cleaned'] = df['Country_Code'].replace(COUNTRY_CODE_FIXES)
+    return df
 
 
-# # rational for NOT cleaning `Voyage_Tier`
-# It is unclear why the voyage tier for some chingu members is set to `Bears`, `Geckos` or `Toucans` but it's clearly intentional and part of the data. I'll be separating it into lists to match `Voyage_Signup_id` but leaving the core of the data as is.
+def combine_role(df: pd.DataFrame) -> pd.DataFrame:
+    """Combine `Role_Type` (a sub-role, e.g. 'Web') & `Voyage_Role` into `Role`, e.g. 'Web Developer'."""
+    role = (df['Role_Type'].fillna('') + ' ' + df['Voyage_Role'].fillna('')).str.strip()
+    df['Role'] = role.replace('', None)
+    return df
 
-# In[869]:
 
+def add_id(df: pd.DataFrame) -> pd.DataFrame:
+    """A simple enumerated id column for database purposes (fast indexing of a primary key).
 
-# verify results
-unique_voyage_tier_lists = df[['Voyage_Tier', 'Voyage_Signup_split']].drop_duplicates(subset='Voyage_Tier')
-unique_voyage_tier_lists.sort_values('Voyage_Tier').reset_index(drop=True)
+    The id is the member's position in the export + 1, taken from the index, so the ids of
+    streamed chunks continue serially from one chunk to the next.
+    """
+    df['id'] = df.index.to_numpy() + 1
+    return df
 
 
-# # Choose & Name Output Columns
+def _signup_ids(signups: pd.Series) -> List[List[int]]:
+    matches = signups.str.extractall(r"V(\d+)")[0]
+    voyage_nums = matches.to_numpy(dtype=np.int64)
+    # matches are grouped by row, in order: split them at the row boundaries
+    counts = np.bincount(matches.index.get_level_values(0), minlength=len(signups))
+    return [nums.tolist() for nums in np.split(voyage_nums, np.cumsum(counts)[:-1])]
 
-# In[ ]:
 
+def extract_signup_ids(df: pd.DataFrame) -> pd.DataFrame:
+    """Voyage numbers from `Voyage_from_Voyage_Signups` ('V55,V??,V56') as a list of ints ([55, 56])."""
+    df['Voyage_Signup_ids'] = transform_cache.map_distinct(
+        df['Voyage_from_Voyage_Signups'], _signup_ids, 'signup_ids', missing=[])
+    return df
 
-df.info()
 
+def split_voyage_tiers(df: pd.DataFrame) -> pd.DataFrame:
+    """Separate the comma separated `Voyage_Tier`; values like 'Bears' are intentional and kept."""
+    df['Voyage_Signup_split'] = transform_cache.map_distinct(
+        df['Voyage_Tier'], lambda tiers: tiers.str.split(','), 'voyage_tiers', missing=[])
+    return df
 
-# In[877]:
 
+def select_output_columns(df: pd.DataFrame) -> pd.DataFrame:
+    return df.drop(columns=DIRTY_COLUMNS).rename(columns=FINAL_NAMES)
 
-# drop old or irrelevant columns
 
-# old dirty columns
-dirty = [
-    'Timestamp',
-    'Timezone',
-    'Country_name',
-    'Role_Type',
-    'Voyage_Role',
-    'Country_Code',
-    'Voyage_Tier',
-    'Voyage_from_Voyage_Signups',
-    'Solo_Project_Tier'
+# in order; each stage reads columns made by the ones before it
+STAGES: List[Tuple[str, Callable[[pd.DataFrame], pd.DataFrame]]] = [
+    ('rename_columns', rename_columns),
+    ('solo_project_tier', clean_solo_project_tier),
+    ('empty_strings', replace_empty_strings),
+    ('timestamp', clean_timestamp),
+    ('timezone', clean_timezone),
+    ('country', clean_country),
+    ('role', combine_role),
+    ('id', add_id),
+    ('signup_ids', extract_signup_ids),
+    ('voyage_tiers', split_voyage_tiers),
+    ('output_columns', select_output_columns),
 ]
 
-cleaned_df = df.drop(columns=dirty)
 
+def clean_members(df: pd.DataFrame) -> pd.DataFrame:
+    """Run every stage on the raw members, as loaded by `load_members`."""
+    for _, stage in STAGES:
+        df = stage(df)
+    return df
 
-# In[878]:
 
+def write_members(df: pd.DataFrame, cleaned_path: str = CLEANED_PATH):
+    """Export to NDJSON (newline-delimited JSON) for BigQuery ingestion."""
+    makedirs(path.dirname(cleaned_path) or '.', exist_ok=True)
+    df.to_json(cleaned_path, orient="records", lines=True, date_format="iso")
 
-# give columns their final names
-final_name_map = {
-    'Timestamp_cleaned': 'Timestamp',
-    'Timezone_cleaned': 'Timezone',
-    'Country_Name_cleaned': 'Country_Name',
-    'Country_Code_cleaned': 'Country_Code',
-    'Voyage_Signup_split': 'Voyage_Tiers',
-    'Solo_Project_Tier_cleaned': 'Solo_Project_Tier'
-}
-renamed_cleaned_df = cleaned_df.rename(columns=final_name_map)
 
+def _clean_chunk(start: int, records: List[dict]) -> str:
+    return clean_members(member_chunk(start, records)).to_json(orient="records", lines=True, date_format="iso")
 
-# In[879]:
-
-
-# count duplicated rows
-array_cols = ['Voyage_Signup_ids', 'Voyage_Tiers']
-print(renamed_cleaned_df.loc[:, ~renamed_cleaned_df.columns.isin(array_cols)].duplicated().sum())
-
-
-# In[880]:
-
-
-renamed_cleaned_df.info()
-
-
-# In[881]:
 
+# module level, so worker processes can run them
+
+def _start_worker(tables: Dict[str, Dict[Any, Any]], enabled: bool):
+    # the worker starts from the parent's lookup tables
+    transform_cache.replace(tables, enabled)
+
+
+def _clean_chunk_in_worker(start: int, records: List[dict]) -> Tuple[str, Dict[str, Dict[Any, Any]]]:
+    # hand the new lookup entries back, so the parent can persist them
+    return _clean_chunk(start, records), transform_cache.take_added()
+
+
+def stream_members(raw_path: str = RAW_PATH, cleaned_path: str = CLEANED_PATH, chunk_size: int = 10_000,
+                   workers: int = 1) -> int:
+    """Clean the raw export `chunk_size` members at a time, appending each chunk's NDJSON; returns the member count.
+
+    With `workers` > 1 the chunks are cleaned in that many processes. Chunks are still written in
+    input order and ids come from each member's position, so the output matches the serial run.
+    """
+    makedirs(path.dirname(cleaned_path) or '.', exist_ok=True)
+    count = 0
+    # a partial file is never left at `cleaned_path`
+    partial_path = cleaned_path + '.partial'
+    with open(partial_path, 'w') as f:
+        if workers <= 1:
+            for start, records in iter_record_chunks(raw_path, chunk_size):
+                f.write(_clean_chunk(start, records))
+                count += len(records)
+        else:
+            initargs = (transform_cache.tables, transform_cache.enabled)
+            with ProcessPoolExecutor(max_workers=workers, initializer=_start_worker, initargs=initargs) as pool:
+                def write_next():
+                    ndjson, added = pending.popleft().result()
+                    f.write(ndjson)
+                    transform_cache.merge(added)
+
+                # at most two chunks per worker in flight, so memory stays bounded
+                pending = deque()
+                for start, records in iter_record_chunks(raw_path, chunk_size):
+                    pending.append(pool.submit(_clean_chunk_in_worker, start, records))
+                    count += len(records)
+                    if len(pending) >= 2 * workers:
+                        write_next()
+                while pending:
+                    write_next()
+    replace(partial_path, cleaned_path)
+    return count
+
+
+# # Incremental Runs
+# The export only ever comes whole, but a nightly run only needs to clean and load the members
+# that signed up, changed or left since the last one. The watermark remembers, per member in the
+# last export, the id it was given and a hash of its raw record; everything else is left out of the
+# delta. There's no timestamp watermark: an edit to an old signup doesn't move its `Timestamp`, so
+# skipping old records would miss it, and hashing them is cheap next to cleaning them.
+
+class Watermark:
+    """What the last incremental run processed: the next free id, and per member key its id and
+    the hash of its raw record."""
+
+    def __init__(self, next_id: int = 1, members: Optional[Dict[str, List]] = None):
+        self.next_id = next_id
+        self.members: Dict[str, List] = members or {}
+
+    @classmethod
+    def load(cls, watermark_path: str = WATERMARK_PATH) -> 'Watermark':
+        if not path.exists(watermark_path):
+            return cls()
+        with open(watermark_path) as f:
+            saved = json.load(f)
+        return cls(saved['next_id'], saved['members'])
+
+    def save(self, watermark_path: str = WATERMARK_PATH):
+        makedirs(path.dirname(watermark_path) or '.', exist_ok=True)
+        partial_path = watermark_path + '.partial'
+        with open(partial_path, 'w') as f:
+            # dumps encodes in C, dump goes through the pure-python encoder
+            f.write(json.dumps({'next_id': self.next_id, 'members': self.members}))
+        replace(partial_path, watermark_path)
+
+
+def _digest(text: str) -> str:
+    return hashlib.blake2b(text.encode(), digest_size=12).hexdigest()
+
+
+def member_key(record: dict) -> str:
+    return _digest('\x1f'.join([str(record.get(field)) for field in MEMBER_KEY_FIELDS]))
+
+
+def record_hash(text: str) -> str:
+    """The hash of a raw record, from its json text: cheaper than encoding the parsed record again."""
+    return _digest(text)
+
+
+def parquet_schema():
+    """The cleaned columns as BigQuery loads them from Parquet."""
+    return pa.schema([
+        ('Gender', pa.string()),
+        ('Goal', pa.string()),
+        ('Goal_Other', pa.string()),
+        ('Source', pa.string()),
+        ('Source_Other', pa.string()),
+        ('Solo_Project_Tier', pa.int64()),
+        ('Timestamp', pa.timestamp('us', tz='UTC')),
+        ('Timezone', pa.string()),
+        ('GMT_Offset', pa.int64()),
+        ('Country_Name', pa.string()),
+        ('Country_Code', pa.string()),
+        ('Role', pa.string()),
+        ('id', pa.int64()),
+        ('Voyage_Signup_ids', pa.list_(pa.int64())),
+        ('Voyage_Tiers', pa.list_(pa.string())),
+    ])
+
+
+class DeltaWriter:
+    """Appends cleaned chunks to an NDJSON or Parquet file, moved into place by `close`."""
+
+    def __init__(self, delta_path: str, delta_format: str = 'ndjson'):
+        if delta_format == 'parquet' and pq is None:
+            raise RuntimeError("--delta-format parquet needs the `pyarrow` package")
+        makedirs(path.dirname(delta_path) or '.', exist_ok=True)
+        self.delta_path = delta_path
+        self.partial_path = delta_path + '.partial'
+        if delta_format == 'parquet':
+            self.schema = parquet_schema()
+            self._parquet = pq.ParquetWriter(self.partial_path, self.schema, compression='zstd')
+            self._ndjson = None
+        else:
+            self._parquet = None
+            self._ndjson = open(self.partial_path, 'w')
+
+    def write(self, df: pd.DataFrame):
+        if self._parquet is not None:
+            self._parquet.write_table(pa.Table.from_pandas(df[self.schema.names], schema=self.schema, preserve_index=False))
+        else:
+            self._ndjson.write(df.to_json(orient="records", lines=True, date_format="iso"))
+
+    def close(self):
+        (self._parquet or self._ndjson).close()
+        replace(self.partial_path, self.delta_path)
+
+
+def removed_ids_path(delta_path: str) -> str:
+    """Where the ids to delete go: next to the delta, e.g. `chingu_members_delta_removed.json`."""
+    root, extension = path.splitext(delta_path)
+    return f"{root}_removed{extension}"
+
+
+def write_removed_ids(ids: List[int], removed_path: str, delta_format: str = 'ndjson'):
+    """Write the ids of members no longer exported, one `id` column in the delta's format."""
+    makedirs(path.dirname(removed_path) or '.', exist_ok=True)
+    partial_path = removed_path + '.partial'
+    if delta_format == 'parquet':
+        pq.write_table(pa.table({'id': pa.array(ids, pa.int64())}), partial_path, compression='zstd')
+    else:
+        with open(partial_path, 'w') as f:
+            f.write(''.join(f'{{"id":{member_id}}}\n' for member_id in ids))
+    replace(partial_path, removed_path)
+
+
+def clean_new_members(raw_path: str = RAW_PATH, delta_path: str = DELTA_PATHS['ndjson'],
+                      watermark_path: str = WATERMARK_PATH, chunk_size: int = 10_000,
+                      delta_format: str = 'ndjson') -> Dict[str, Any]:
+    """Clean only the members that are new or changed since the watermark, into a delta file, and
+    list the ids of members no longer exported next to it (see `removed_ids_path`).
+
+    New members get ids continuing the sequence, in export order, so a first run with no
+    watermark gives the same ids as a full run. Changed members keep their id, so loading the
+    delta with a MERGE on `id` updates them in place. Members are keyed by their signup answers
+    (`MEMBER_KEY_FIELDS`): editing one of those retires the old id into the removals and gives the
+    member a new one in the delta, so the removals have to be deleted along with the MERGE. Removed
+    members are dropped from the watermark, which is saved once both files are complete. Returns
+    the counts of new, changed, unchanged and removed members.
+    """
+    watermark = Watermark.load(watermark_path)
+    counts = {'new': 0, 'changed': 0, 'unchanged': 0}
+    occurrences = Counter()
+    writer = DeltaWriter(delta_path, delta_format)
+    with open(raw_path) as f:
+        items = iter_json_array(f, with_text=True)
+        while True:
+            batch = list(islice(items, chunk_size))
+            if not batch:
+                break
+            ids = []
+            delta = []
+            for record, text in batch:
+                key = member_key(record)
+                # members with identical signup answers are told apart by their order in the export
+                occurrences[key] += 1
+                key = f"{key}/{occurrences[key]}"
+                content = record_hash(text)
+                known = watermark.members.get(key)
+                if known is None:
+                    known = watermark.members[key] = [watermark.next_id, content]
+                    watermark.next_id += 1
+                    counts['new'] += 1
+                elif known[1] != content:
+                    known[1] = content
+                    counts['changed'] += 1
+                else:
+                    counts['unchanged'] += 1
+                    continue
+                ids.append(known[0])
+                delta.append(record)
+            if delta:
+                # add_id makes the id from the index
+                writer.write(clean_members(pd.DataFrame.from_records(delta, index=pd.Index(ids) - 1)))
+    writer.close()
+
+    # `<key>/<n>` was exported this time if its signup answers came up at least n times
+    gone = [key for key in watermark.members
+            if occurrences[key.rpartition('/')[0]] < int(key.rpartition('/')[2])]
+    removed = sorted(watermark.members.pop(key)[0] for key in gone)
+    write_removed_ids(removed, removed_ids_path(delta_path), delta_format)
+    watermark.save(watermark_path)
+    return {**counts, 'removed': len(removed), 'next_id': watermark.next_id}
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Download, clean & prepare chingu_member data for BigQuery.")
+    parser.add_argument('--input', default=RAW_PATH, help="raw member json, downloaded if missing")
+    parser.add_argument('--output', default=CLEANED_PATH, help="newline-delimited json to write")
+    parser.add_argument('--url', default=RAW_URL, help="where to download the raw member json from")
+    parser.add_argument('--refresh', action='store_true', help="download the raw member json even if it exists")
+    parser.add_argument('--stream', action='store_true', help="clean in chunks with bounded memory")
+    parser.add_argument('--chunk-size', type=int, default=10_000, help="members per chunk with --stream")
+    parser.add_argument('--workers', type=int, default=1, help="processes cleaning chunks in parallel (implies --stream)")
+    parser.add_argument('--transform-cache', default=TRANSFORM_CACHE_PATH, help="lookup tables kept between runs")
+    parser.add_argument('--no-transform-cache', action='store_true', help="don't load or save the lookup tables")
+    parser.add_argument('--incremental', action='store_true',
+                        help="clean only members new or changed since the last incremental run, into --delta-output")
+    parser.add_argument('--delta-format', choices=sorted(DELTA_PATHS), default='ndjson')
+    parser.add_argument('--delta-output', help="delta file to write (default data/chingu_members_delta.json or .parquet)")
+    parser.add_argument('--watermark', default=WATERMARK_PATH, help="what earlier incremental runs processed")
+    args = parser.parse_args(argv)
+
+    download_members(args.url, args.input, refresh=args.refresh)
+    if not args.no_transform_cache:
+        transform_cache.load(args.transform_cache)
+    if args.incremental:
+        delta_path = args.delta_output or DELTA_PATHS[args.delta_format]
+        counts = clean_new_members(args.input, delta_path, args.watermark, args.chunk_size, args.delta_format)
+        print(f"{counts['new']} new and {counts['changed']} changed members from {args.input} into {delta_path}, "
+              f"{counts['removed']} removed into {removed_ids_path(delta_path)} "
+              f"({counts['unchanged']} unchanged, next id {counts['next_id']})")
+    elif args.stream or args.workers > 1:
+        count = stream_members(args.input, args.output, args.chunk_size, args.workers)
+    else:
+        cleaned = clean_members(load_members(args.input))
+        write_members(cleaned, args.output)
+        count = len(cleaned)
+    if not args.no_transform_cache:
+        transform_cache.save(args.transform_cache)
+    if not args.incremental:
+        print(f"Cleaned {count} members from {args.input} into {args.output}")
 
-renamed_cleaned_df.to_json("data/chingu_members_cleaned.json", orient="records", lines=True, date_format="iso")
 
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,135 @@
+"""Benchmark: a full re-clean vs. `--incremental` when an export grows by a few new signups.
+
+Writes a synthetic base export and runs the incremental cleaner on it once (checking that first
+delta is exactly the full output), then grows it: `--new` members with later timestamps are put at
+the top, as the newest signups, `--changed` existing members join another voyage, `--rekeyed`
+members edit their Gender (a signup answer members are recognised by) and `--removed` members leave
+the export. Times a full re-clean of the grown export against the incremental run, and checks that
+the delta holds only the new, changed and re-keyed members, that the removals hold exactly the ids
+of the re-keyed and removed ones, that the new ids continue the sequence, and that deleting the
+removals from the base output and MERGE-ing the delta on `id` gives the same members as the full
+re-clean. Run from `data_cleaning/`:
+
+    python -m scripts.benchmark_incremental --rows 200000 --new 1000 --changed 200 --rekeyed 50 --removed 50
+"""
+import argparse
+import filecmp
+import json
+import os
+import random
+import tempfile
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+import cleaning_chingu_demographics as pipeline
+from scripts.synthetic_members import iter_raw_members, make_raw_members
+
+
+def write_members_json(members, raw_path: str):
+    with open(raw_path, 'w') as f:
+        json.dump(members, f)
+
+
+def read_ndjson(cleaned_path: str):
+    with open(cleaned_path) as f:
+        return [json.loads(line) for line in f]
+
+
+def without_id(rows):
+    return sorted(json.dumps({key: value for key, value in row.items() if key != 'id'}, sort_keys=True) for row in rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=200_000)
+    parser.add_argument('--new', type=int, default=1_000)
+    parser.add_argument('--changed', type=int, default=200)
+    parser.add_argument('--rekeyed', type=int, default=50)
+    parser.add_argument('--removed', type=int, default=50)
+    parser.add_argument('--chunk-size', type=int, default=10_000)
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp()
+    raw_path = os.path.join(directory, 'chingu_members.json')
+    watermark_path = os.path.join(directory, 'watermark.json')
+    base = make_raw_members(args.rows)
+    write_members_json(base, raw_path)
+
+    base_path = os.path.join(directory, 'cleaned_base.json')
+    pipeline.stream_members(raw_path, base_path, args.chunk_size)
+    first_delta_path = os.path.join(directory, 'delta_first.json')
+    pipeline.clean_new_members(raw_path, first_delta_path, watermark_path, args.chunk_size)
+    assert filecmp.cmp(base_path, first_delta_path, shallow=False), "first incremental run differs from a full run"
+
+    rng = random.Random(25)
+    newest = datetime(2026, 1, 1)
+    new_members = list(iter_raw_members(args.new, seed=2026))
+    for position, member in enumerate(new_members):
+        member['Timestamp'] = (newest + timedelta(minutes=args.new - position)).strftime('%Y-%m-%d %H:%M')
+    grown = [dict(member) for member in base]
+    # unique signup answers, so the base ids of the members picked below are their positions + 1
+    keys = [pipeline.member_key(member) for member in base]
+    repeats = Counter(keys)
+    singles = [position for position, key in enumerate(keys) if repeats[key] == 1]
+    picked = rng.sample(singles, args.changed + args.rekeyed + args.removed)
+    changed, rekeyed, removed = (picked[:args.changed], picked[args.changed:args.changed + args.rekeyed],
+                                 picked[args.changed + args.rekeyed:])
+    for position in changed:
+        member = grown[position]
+        member['Voyage (from Voyage Signups)'] = ','.join(filter(None, [member['Voyage (from Voyage Signups)'], 'V60']))
+        member['Voyage Tier'] = ','.join(filter(None, [member['Voyage Tier'], 'Tier 2']))
+    for position in rekeyed:
+        grown[position]['Gender'] = 'NON-BINARY' if grown[position]['Gender'] != 'NON-BINARY' else 'TRANS'
+    for position in sorted(removed, reverse=True):
+        del grown[position]
+    write_members_json(new_members + grown, raw_path)
+
+    full_path = os.path.join(directory, 'cleaned_full.json')
+    started = time.perf_counter()
+    pipeline.stream_members(raw_path, full_path, args.chunk_size)
+    full_seconds = time.perf_counter() - started
+
+    delta_path = os.path.join(directory, 'delta.json')
+    started = time.perf_counter()
+    counts = pipeline.clean_new_members(raw_path, delta_path, watermark_path, args.chunk_size)
+    incremental_seconds = time.perf_counter() - started
+
+    exported = args.rows + args.new - args.removed
+    print(f"{args.rows} members, then {args.new} new, {args.changed} changed, {args.rekeyed} re-keyed "
+          f"and {args.removed} removed")
+    print(f"{'run':<12} {'seconds':>8} {'rows written':>13}")
+    print(f"{'full':<12} {full_seconds:>8.2f} {exported:>13}")
+    print(f"{'incremental':<12} {incremental_seconds:>8.2f} {args.new + args.changed + args.rekeyed:>13}")
+    print(f"speedup {full_seconds / incremental_seconds:.1f}x, watermark {os.path.getsize(watermark_path) / 2 ** 20:.1f} MiB")
+
+    expected = (args.new + args.rekeyed, args.changed, args.rekeyed + args.removed)
+    assert (counts['new'], counts['changed'], counts['removed']) == expected, counts
+    assert len(pipeline.Watermark.load(watermark_path).members) == exported, "watermark keeps members that left"
+    delta = read_ndjson(delta_path)
+    assert len(delta) == args.new + args.changed + args.rekeyed
+    removed_ids = [row['id'] for row in read_ndjson(pipeline.removed_ids_path(delta_path))]
+    assert removed_ids == sorted(position + 1 for position in rekeyed + removed), "removals hold the wrong ids"
+    new_ids = sorted(row['id'] for row in delta if row['id'] > args.rows)
+    assert new_ids == list(range(args.rows + 1, args.rows + args.new + args.rekeyed + 1)), \
+        "new ids don't continue the sequence"
+
+    merged = {row['id']: row for row in read_ndjson(base_path)}
+    for member_id in removed_ids:
+        del merged[member_id]
+    merged.update((row['id'], row) for row in delta)
+    assert without_id(merged.values()) == without_id(read_ndjson(full_path)), "merged delta differs from a full re-clean"
+
+    if pipeline.pq is not None:
+        parquet_path = os.path.join(directory, 'delta.parquet')
+        os.remove(watermark_path)
+        pipeline.clean_new_members(raw_path, parquet_path, watermark_path, args.chunk_size, 'parquet')
+        assert len(pd.read_parquet(parquet_path)) == exported
+        assert pd.read_parquet(pipeline.removed_ids_path(parquet_path)).empty
+    print("\ndelta matches the full re-clean")
+
+
+if __name__ == '__main__':
+    main()
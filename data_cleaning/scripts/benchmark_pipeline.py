@@ -0,0 +1,143 @@
+"""Benchmark: time per cleaning stage, row-wise (the original notebook code) vs. vectorized.
+
+Generates `--rows` synthetic raw members, then runs every stage of `cleaning_chingu_demographics`
+on the same input as the original row-wise code (`.map(normalize_gmt)`, `df.index.map(lambda ...)`,
+`.apply(lambda x: x.split(','))`, `cc.convert` on the whole column, `str.cat`) and checks both give
+the same NDJSON. Stages the notebook already wrote with pandas methods are shared and timed once.
+Run from `data_cleaning/`:
+
+    python -m scripts.benchmark_pipeline --rows 50000
+"""
+import argparse
+import gc
+import os
+import re
+import tempfile
+import time
+
+import pandas as pd
+
+import cleaning_chingu_demographics as pipeline
+from scripts.synthetic_members import write_raw_members
+
+
+# # The original row-wise code, from the notebook export
+
+def legacy_coerce_gmt_offset(offset: int):
+    offset = offset % 24
+    if offset > 12:
+        offset -= 24
+    elif offset < -11:
+        offset += 24
+    return offset
+
+
+def legacy_normalize_gmt(tz):
+    if tz is None or tz == "":
+        return None
+    tz = re.sub(r"−", "-", tz)
+    m = re.match(r"GMT\s*([+-]?\d+)", tz, re.IGNORECASE)
+    if not m:
+        return None
+    offset = legacy_coerce_gmt_offset(int(m.group(1)))
+    return (f"GMT+{offset}" if offset >= 0 else f"GMT{offset}")
+
+
+def legacy_timezone(df):
+    df['Timezone_cleaned'] = df['Timezone'].map(lambda tz: None if pd.isna(tz) else legacy_normalize_gmt(tz))
+    df['GMT_Offset'] = pd.to_numeric(
+        df['Timezone_cleaned'].str.extract(r"GMT\s*([+-]?\d+)", expand=False),
+        errors='coerce'
+    ).astype('Int64')
+    return df
+
+
+def legacy_country(df):
+    import country_converter as coco
+    cc = coco.CountryConverter()
+    df['Country_Name_cleaned'] = cc.convert(df['Country_Code'], to='name_short', not_found=None)
+    df['Country_Code_cleaned'] = df['Country_Code'].replace({'Philippines (PH)': 'PH', 'UT': None})
+    # pandas 3 hands missing codes to country_converter as 'nan' rather than 'None'
+    df['Country_Name_cleaned'] = df['Country_Name_cleaned'].replace({'UT': None, 'None': None, 'nan': None})
+    return df
+
+
+def legacy_role(df):
+    df['Role'] = df['Role_Type'].str.cat(df['Voyage_Role'], sep=' ', na_rep='').str.strip()
+    df['Role'] = df['Role'].replace(to_replace='', value=None)
+    return df
+
+
+def legacy_signup_ids(df):
+    ex = df['Voyage_from_Voyage_Signups'].astype(str).str.extractall(r"V(\d+)")
+    ex = ex.rename(columns={0: 'voyage_num'}).reset_index()
+    ex['voyage_num'] = ex['voyage_num'].astype(int)
+    groups = ex.groupby('level_0')['voyage_num'].apply(list)
+    df['Voyage_Signup_ids'] = df.index.map(lambda i: groups[i] if i in groups else [])
+    return df
+
+
+def legacy_voyage_tiers(df):
+    df['Voyage_Signup_split'] = df['Voyage_Tier'].apply(lambda x: [] if pd.isna(x) else x.split(","))
+    return df
+
+
+LEGACY_STAGES = {
+    'timezone': legacy_timezone,
+    'country': legacy_country,
+    'role': legacy_role,
+    'signup_ids': legacy_signup_ids,
+    'voyage_tiers': legacy_voyage_tiers,
+}
+
+
+def check_known_answers():
+    # the cases the notebook checked by hand
+    offsets = [25, 24, 23, 13, 12, 11, 5, 1, 0, -1, -5, -11, -12, -13, -20, -23, -24, -25]
+    expected = [1, 0, -1, -11, 12, 11, 5, 1, 0, -1, -5, -11, 12, 11, 4, 1, 0, -1]
+    assert [pipeline.coerce_gmt_offset(offset) for offset in offsets] == expected
+    assert pipeline.coerce_gmt_offset(pd.Series(offsets)).tolist() == expected
+
+    rough = pd.Series([None, 'GMT-5 (New York)', 'GMT−5', 'GMT-12', 'GMT-0', 'GMT+12', 'GMT+22', '#N/A', 'GMT+)'])
+    labels = [None, 'GMT-5', 'GMT-5', 'GMT+12', 'GMT+0', 'GMT+12', 'GMT-2', None, None]
+    assert pipeline.gmt_labels(pipeline.gmt_offsets(rough)).tolist() == labels
+
+
+def timed(stage, df):
+    gc.collect()
+    started = time.perf_counter()
+    df = stage(df)
+    return df, time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=50_000)
+    args = parser.parse_args()
+
+    check_known_answers()
+    raw_path = os.path.join(tempfile.mkdtemp(), 'chingu_members.json')
+    write_raw_members(args.rows, raw_path)
+    raw = pipeline.load_members(raw_path)
+
+    print(f"{args.rows} synthetic members")
+    print(f"{'stage':<18} {'row-wise ms':>12} {'vectorized ms':>14} {'speedup':>8}")
+    legacy_df, vectorized_df = raw.copy(), raw.copy()
+    legacy_total = vectorized_total = 0.0
+    for name, stage in pipeline.STAGES:
+        legacy_df, legacy_seconds = timed(LEGACY_STAGES.get(name, stage), legacy_df)
+        vectorized_df, vectorized_seconds = timed(stage, vectorized_df)
+        legacy_total += legacy_seconds
+        vectorized_total += vectorized_seconds
+        speedup = f"{legacy_seconds / vectorized_seconds:>7.1f}x" if name in LEGACY_STAGES else f"{'same':>8}"
+        print(f"{name:<18} {legacy_seconds * 1000:>12.1f} {vectorized_seconds * 1000:>14.1f} {speedup}")
+    print(f"{'total':<18} {legacy_total * 1000:>12.1f} {vectorized_total * 1000:>14.1f} {legacy_total / vectorized_total:>7.1f}x")
+
+    legacy_json = legacy_df.to_json(orient="records", lines=True, date_format="iso")
+    vectorized_json = vectorized_df.to_json(orient="records", lines=True, date_format="iso")
+    assert legacy_json == vectorized_json, "vectorized output differs from the row-wise output"
+    print("\noutputs identical")
+
+
+if __name__ == '__main__':
+    main()
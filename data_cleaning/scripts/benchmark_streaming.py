@@ -0,0 +1,75 @@
+"""Benchmark: peak memory and wall time of the in-memory pipeline vs. `--stream`, by input size.
+
+For every `--rows` size it writes a synthetic raw export, then cleans it in a fresh process per
+mode (so each peak RSS is that run's alone) and checks both modes write the same NDJSON. The
+in-memory peak grows with the export; the streaming peak follows `--chunk-size` instead.
+Run from `data_cleaning/`:
+
+    python -m scripts.benchmark_streaming --rows 50000 200000 --chunk-size 10000
+"""
+import argparse
+import filecmp
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+from scripts.synthetic_members import write_raw_members
+
+
+def run_child(mode: str, raw_path: str, cleaned_path: str, chunk_size: int):
+    import cleaning_chingu_demographics as pipeline
+
+    started = time.perf_counter()
+    if mode == 'stream':
+        pipeline.stream_members(raw_path, cleaned_path, chunk_size)
+    else:
+        pipeline.write_members(pipeline.clean_members(pipeline.load_members(raw_path)), cleaned_path)
+    # ru_maxrss is in KiB on Linux
+    print(json.dumps({
+        'seconds': time.perf_counter() - started,
+        'peak_mib': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    }))
+
+
+def measure(mode: str, raw_path: str, cleaned_path: str, chunk_size: int):
+    output = subprocess.run(
+        [sys.executable, '-m', 'scripts.benchmark_streaming', '--child', mode, raw_path, cleaned_path, str(chunk_size)],
+        check=True, capture_output=True, text=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, nargs='+', default=[50_000, 200_000])
+    parser.add_argument('--chunk-size', type=int, default=10_000)
+    parser.add_argument('--child', nargs=4, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        mode, raw_path, cleaned_path, chunk_size = args.child
+        run_child(mode, raw_path, cleaned_path, int(chunk_size))
+        return
+
+    directory = tempfile.mkdtemp()
+    print(f"chunk size {args.chunk_size}")
+    print(f"{'rows':>9} {'input MiB':>10} {'mode':<10} {'seconds':>8} {'peak MiB':>9}")
+    for rows in args.rows:
+        raw_path = os.path.join(directory, f'chingu_members_{rows}.json')
+        write_raw_members(rows, raw_path)
+        input_mib = os.path.getsize(raw_path) / 2 ** 20
+        outputs = {}
+        for mode in ('in-memory', 'stream'):
+            outputs[mode] = os.path.join(directory, f'cleaned_{mode}_{rows}.json')
+            result = measure(mode, raw_path, outputs[mode], args.chunk_size)
+            print(f"{rows:>9} {input_mib:>10.1f} {mode:<10} {result['seconds']:>8.2f} {result['peak_mib']:>9.1f}")
+        assert filecmp.cmp(outputs['in-memory'], outputs['stream'], shallow=False), "streamed output differs"
+        os.remove(raw_path)
+    print("\noutputs identical")
+
+
+if __name__ == '__main__':
+    main()
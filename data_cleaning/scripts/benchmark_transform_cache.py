@@ -0,0 +1,83 @@
+"""Benchmark: the memoized cleaners with the transform cache off, cold and warm (loaded from disk).
+
+Streams a synthetic export in chunks three times: with the cache off every chunk recomputes its
+own distinct values; cold starts from empty tables and saves them; warm loads the saved tables, as
+the next run of the pipeline would. Prints the time spent in each memoized stage, how many values
+country_converter was asked for, and checks all three outputs match. Run from `data_cleaning/`:
+
+    python -m scripts.benchmark_transform_cache --rows 200000 --chunk-size 10000
+"""
+import argparse
+import filecmp
+import os
+import tempfile
+import time
+
+import cleaning_chingu_demographics as pipeline
+from scripts.synthetic_members import write_raw_members
+
+MEMOIZED_STAGES = ['solo_project_tier', 'timezone', 'country', 'signup_ids', 'voyage_tiers']
+
+
+def timed_stages(seconds):
+    def timed(name, stage):
+        def run(df):
+            started = time.perf_counter()
+            df = stage(df)
+            seconds[name] = seconds.get(name, 0.0) + time.perf_counter() - started
+            return df
+        return run
+    return [(name, timed(name, stage)) for name, stage in pipeline.STAGES]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=200_000)
+    parser.add_argument('--chunk-size', type=int, default=10_000)
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp()
+    raw_path = os.path.join(directory, 'chingu_members.json')
+    cache_path = os.path.join(directory, 'transform_cache.json')
+    write_raw_members(args.rows, raw_path)
+
+    converter = pipeline._country_converter()
+    convert = converter.convert
+    converted = []
+
+    def counting_convert(names, *args, **kwargs):
+        converted.append(len(names))
+        return convert(names, *args, **kwargs)
+
+    converter.convert = counting_convert
+    stages = pipeline.STAGES
+
+    print(f"{args.rows} members in chunks of {args.chunk_size}")
+    print(f"{'cache':<6} " + " ".join(f"{name:>17}" for name in MEMOIZED_STAGES) + f" {'total s':>8} {'codes converted':>16}")
+    outputs = []
+    for mode in ('off', 'cold', 'warm'):
+        pipeline.transform_cache.replace({}, enabled=mode != 'off')
+        if mode == 'warm':
+            assert pipeline.transform_cache.load(cache_path)
+        converted.clear()
+        seconds = {}
+        pipeline.STAGES = timed_stages(seconds)
+        outputs.append(os.path.join(directory, f'cleaned_{mode}.json'))
+        started = time.perf_counter()
+        pipeline.stream_members(raw_path, outputs[-1], args.chunk_size)
+        total = time.perf_counter() - started
+        pipeline.STAGES = stages
+        if mode == 'cold':
+            pipeline.transform_cache.save(cache_path)
+        print(f"{mode:<6} " + " ".join(f"{seconds[name] * 1000:>14.1f} ms" for name in MEMOIZED_STAGES)
+              + f" {total:>8.2f} {sum(converted):>16}")
+
+    assert all(filecmp.cmp(outputs[0], output, shallow=False) for output in outputs[1:]), "outputs differ"
+    entries = {table: stats['entries'] for table, stats in pipeline.transform_cache.stats().items()}
+    print(f"\nlookup table entries: {entries}")
+    print(f"saved tables: {os.path.getsize(cache_path) / 1024:.1f} KiB")
+    print("outputs identical")
+
+
+if __name__ == '__main__':
+    main()
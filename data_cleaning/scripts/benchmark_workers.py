@@ -0,0 +1,57 @@
+"""Benchmark: scaling of `stream_members(..., workers=N)` from 1 process to every core.
+
+Cleans the same synthetic export with each worker count and checks every output matches the
+serial run byte for byte. The parent process parses the json and writes the chunks in order while
+the workers clean them, so the parse time it prints is the part that doesn't scale.
+Run from `data_cleaning/`:
+
+    python -m scripts.benchmark_workers --rows 200000 --workers 1 2 4 8
+"""
+import argparse
+import filecmp
+import os
+import tempfile
+import time
+
+import cleaning_chingu_demographics as pipeline
+from scripts.synthetic_members import write_raw_members
+
+
+def main():
+    cores = len(os.sched_getaffinity(0)) if hasattr(os, 'sched_getaffinity') else os.cpu_count()
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=200_000)
+    parser.add_argument('--chunk-size', type=int, default=10_000)
+    parser.add_argument('--workers', type=int, nargs='+',
+                        default=sorted({1, *(2 ** power for power in range(1, cores.bit_length())), cores}))
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp()
+    raw_path = os.path.join(directory, 'chingu_members.json')
+    write_raw_members(args.rows, raw_path)
+
+    started = time.perf_counter()
+    for _ in pipeline.iter_record_chunks(raw_path, args.chunk_size):
+        pass
+    parse_seconds = time.perf_counter() - started
+
+    print(f"{args.rows} members, chunk size {args.chunk_size}, {cores} cores available")
+    print(f"json parsing in the parent: {parse_seconds:.2f} s")
+    print(f"{'workers':>7} {'seconds':>8} {'speedup':>8} {'efficiency':>11}")
+    serial_path = serial_seconds = None
+    for workers in args.workers:
+        cleaned_path = os.path.join(directory, f'cleaned_{workers}.json')
+        started = time.perf_counter()
+        pipeline.stream_members(raw_path, cleaned_path, args.chunk_size, workers=workers)
+        seconds = time.perf_counter() - started
+        if serial_path is None:
+            serial_path, serial_seconds = cleaned_path, seconds
+        else:
+            assert filecmp.cmp(serial_path, cleaned_path, shallow=False), f"output with {workers} workers differs"
+        speedup = serial_seconds / seconds
+        print(f"{workers:>7} {seconds:>8.2f} {speedup:>7.2f}x {speedup / workers:>10.0%}")
+    print("\noutputs identical")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,64 @@
+"""Synthetic raw member data for the benchmark scripts, shaped like `chingu_info.json`.
+
+Values are drawn from the ones the real data holds, messy ones included ('GMT−5' with a unicode
+minus, 'GMT+22', 'Philippines (PH)', 'V??', empty strings), so every cleaning branch is exercised.
+"""
+import json
+import random
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterator, List
+
+GENDERS = ['MALE', 'FEMALE', 'PREFER NOT TO SAY', 'NON-BINARY', 'TRANS', '']
+COUNTRY_CODES = ['US', 'IN', 'GB', 'NG', 'CA', 'NZ', 'GE', 'KE', 'IR', 'BR', 'DE', 'PH', 'KR', 'TW',
+                 'Philippines (PH)', 'UT', '']
+COUNTRY_NAMES = {'US': 'United States', 'IN': 'India', 'GB': 'United Kingdom', 'NG': 'Nigeria',
+                 'IR': 'Iran, Islamic Republic of', 'KR': 'Korea, Republic of', 'Philippines (PH)': 'Philippines'}
+TIMEZONES = ['', 'GMT-5 (New York)', 'GMT−5', 'GMT−8', 'GMT+1', 'GMT-5', 'GMT-8', 'GMT+3', 'GMT+10',
+             'GMT-12', 'GMT-0', 'GMT+0', 'GMT+12', 'GMT−10', 'GMT+22', '#N/A', 'GMT+)']
+GOALS = ['ACCELERATE LEARNING', 'GAIN EXPERIENCE', 'NETWORK WITH SHARED GOALS',
+         'GET OUT OF TUTORIAL PURGATORY', 'OTHER', '']
+SOURCES = ['PERSONAL NETWORK', 'GOOGLE SEARCH', 'The Job Hackers', 'OTHER', '']
+SOLO_TIERS = ['', '', '', 'Tier 1 - HTML - Basic Javascript - Basic Algorithms (LANDING PAGES)',
+              'Tier 2  - Intermediate Algorithms - Front-end Projects (FRONT-END)',
+              'Tier 3 - Advanced Projects - Apps having both Front-end and Back-end components (FULL STACK)']
+ROLE_TYPES = ['', '', '', 'Web', 'Python']
+VOYAGE_ROLES = ['Developer', 'Developer', 'Data Scientist', 'Product Owner', 'Scrum Master', 'UI/UX Designer', '']
+VOYAGES = ['V??'] + [f'V{number}' for number in range(32, 60)]
+VOYAGE_TIERS = ['Tier 1', 'Tier 2', 'Tier 3', 'Bears', 'Geckos', 'Toucans']
+
+
+def iter_raw_members(count: int, seed: int = 21) -> Iterator[Dict[str, Any]]:
+    rng = random.Random(seed)
+    start = datetime(2019, 1, 1)
+    for _ in range(count):
+        country_code = rng.choice(COUNTRY_CODES)
+        voyages = rng.choices(VOYAGES, k=rng.choice([0, 0, 0, 0, 1, 2, 4]))
+        yield {
+            'Timestamp': (start + timedelta(minutes=rng.randrange(7 * 365 * 24 * 60))).strftime('%Y-%m-%d %H:%M'),
+            'Gender': rng.choice(GENDERS),
+            'Country Code': country_code,
+            'Timezone': rng.choice(TIMEZONES) if rng.random() < 0.1 else '',
+            'Goal': rng.choice(GOALS),
+            'Goal-Other': rng.choice(['', '', 'Gain real experience and also networking', ' Learn industry standards ']),
+            'Source': rng.choice(SOURCES),
+            'Source-Other': rng.choice(['', 'Frontend masters', 'reddit']),
+            'Country name (from Country)': rng.choice([COUNTRY_NAMES.get(country_code, ''), 'Germany', '']),
+            'Solo Project Tier': rng.choice(SOLO_TIERS),
+            'Role Type': rng.choice(ROLE_TYPES),
+            'Voyage Role': rng.choice(VOYAGE_ROLES),
+            'Voyage (from Voyage Signups)': ','.join(voyages),
+            'Voyage Tier': ','.join(rng.choices(VOYAGE_TIERS, k=len(voyages))),
+        }
+
+
+def make_raw_members(count: int, seed: int = 21) -> List[Dict[str, Any]]:
+    return list(iter_raw_members(count, seed))
+
+
+def write_raw_members(count: int, raw_path: str, seed: int = 21):
+    """Write a json array of `count` members one at a time, without holding them all in memory."""
+    with open(raw_path, 'w') as f:
+        f.write('[')
+        for position, member in enumerate(iter_raw_members(count, seed)):
+            f.write((',\n' if position else '\n') + json.dumps(member))
+        f.write('\n]\n')
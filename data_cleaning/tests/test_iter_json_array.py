@@ -0,0 +1,82 @@
+"""The incremental parser behind `--stream` must accept exactly what `json.loads` accepts for an array.
+
+Every case is parsed with tiny read sizes too, so items, numbers and literals get cut at buffer
+boundaries. Run from `data_cleaning/`:
+
+    python -m pytest tests
+"""
+import io
+import json
+
+import pytest
+
+import cleaning_chingu_demographics as pipeline
+
+READ_SIZES = [1, 2, 3, 7, 1 << 16]
+
+VALID = [
+    '[]',
+    ' [ ] ',
+    '[1,2]',
+    '[1.5e3, -2, 2.5E-3, true, false, null]',
+    '["a,]", "\\u00e9\\n", {"x": [1, [2]]}, [3], []]',
+    '[\n  {"Timestamp": "2024-01-01 10:00", "Voyage Tier": "Tier 1,Tier 2"},\n  {"Timestamp": "2024-01-02 11:30"}\n]\n',
+]
+
+MALFORMED = [
+    '',
+    'x',
+    '{"a": 1}',
+    '[,,1]',
+    '[,1]',
+    '[1,,2]',
+    '[1,]',
+    '[,]',
+    '[1 2]',
+    '[1x]',
+    '[{"a": 1}garbage]',
+    '[tru]',
+    '[1.e5]',
+    '[',
+    '[1',
+    '[1,',
+    '["abc',
+    '[{"a": 1}',
+]
+
+
+def parse(text: str, read_size: int, with_text: bool = False):
+    return list(pipeline.iter_json_array(io.StringIO(text), read_size, with_text))
+
+
+@pytest.mark.parametrize("read_size", READ_SIZES)
+@pytest.mark.parametrize("text", VALID)
+def test_valid_arrays(text, read_size):
+    assert parse(text, read_size) == json.loads(text)
+
+
+@pytest.mark.parametrize("read_size", READ_SIZES)
+@pytest.mark.parametrize("text", MALFORMED)
+def test_malformed_arrays(text, read_size):
+    with pytest.raises(json.JSONDecodeError):
+        parse(text, read_size)
+
+
+def test_malformed_input_fails_without_reading_the_rest():
+    class CountingReader(io.StringIO):
+        reads = 0
+
+        def read(self, size=-1):
+            self.reads += 1
+            return super().read(size)
+
+    f = CountingReader('[{"a": 1} {"b": 2}' + ', 1' * 100_000 + ']')
+    with pytest.raises(json.JSONDecodeError):
+        list(pipeline.iter_json_array(f, 1 << 10))
+    assert f.reads == 1
+
+
+@pytest.mark.parametrize("read_size", READ_SIZES)
+def test_item_text(read_size):
+    text = '[ {"b": 1, "a": 2} ,\n 2.50 ]'
+    assert parse(text, read_size, with_text=True) == [({'b': 1, 'a': 2}, '{"b": 1, "a": 2}'), (2.5, '2.50')]
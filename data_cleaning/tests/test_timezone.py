@@ -0,0 +1,69 @@
+"""The GMT wrap-around checks the notebook ran inline, against the vectorized timezone stage.
+
+Run from `data_cleaning/`:
+
+    python -m pytest tests
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+import cleaning_chingu_demographics as pipeline
+
+# the cases the notebook checked by hand
+OFFSETS = [25, 24, 23, 13, 12, 11, 5, 1, 0, -1, -5, -11, -12, -13, -20, -23, -24, -25]
+COERCED = [1, 0, -1, -11, 12, 11, 5, 1, 0, -1, -5, -11, 12, 11, 4, 1, 0, -1]
+
+# raw timezone -> (Timezone_cleaned, GMT_Offset); half-hour offsets keep their whole hours, as the notebook's regex did
+TIMEZONES = {
+    'GMT+12': ('GMT+12', 12),
+    'GMT-12': ('GMT+12', 12),
+    'GMT+13': ('GMT-11', -11),
+    'GMT-11': ('GMT-11', -11),
+    'GMT+22': ('GMT-2', -2),
+    'GMT-0': ('GMT+0', 0),
+    'GMT−5': ('GMT-5', -5),
+    'GMT-5 (New York)': ('GMT-5', -5),
+    'gmt +3': ('GMT+3', 3),
+    'GMT+5:30': ('GMT+5', 5),
+    'GMT-3:30': ('GMT-3', -3),
+    'GMT+9.5': ('GMT+9', 9),
+    'GMT+13:45': ('GMT-11', -11),
+    '#N/A': (None, None),
+    'GMT+)': (None, None),
+    '': (None, None),
+}
+
+
+@pytest.fixture(autouse=True)
+def empty_transform_cache():
+    # no lookup tables left over from other tests or a saved run
+    pipeline.transform_cache.replace({})
+    yield
+    pipeline.transform_cache.replace({})
+
+
+@pytest.mark.parametrize("offset, coerced", list(zip(OFFSETS, COERCED)))
+def test_coerce_gmt_offset(offset, coerced):
+    assert pipeline.coerce_gmt_offset(offset) == coerced
+
+
+def test_coerce_gmt_offset_element_wise():
+    assert pipeline.coerce_gmt_offset(pd.Series(OFFSETS)).tolist() == COERCED
+    assert pipeline.coerce_gmt_offset(np.array(OFFSETS)).tolist() == COERCED
+
+
+def test_clean_timezone():
+    raw = list(TIMEZONES) + [np.nan, None]
+    cleaned = pipeline.clean_timezone(pd.DataFrame({'Timezone': raw}))
+    expected = list(TIMEZONES.values()) + [(None, None), (None, None)]
+    assert cleaned['Timezone_cleaned'].tolist() == [timezone for timezone, _ in expected]
+    assert [None if pd.isna(offset) else offset for offset in cleaned['GMT_Offset']] == [offset for _, offset in expected]
+    assert str(cleaned['GMT_Offset'].dtype) == 'Int64'
+
+
+def test_clean_timezone_from_warm_cache():
+    raw = pd.DataFrame({'Timezone': list(TIMEZONES)})
+    cold = pipeline.clean_timezone(raw.copy())
+    warm = pipeline.clean_timezone(raw.copy())
+    pd.testing.assert_frame_equal(cold, warm)
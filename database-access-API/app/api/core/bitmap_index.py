@@ -0,0 +1,113 @@
+"""Inverted bitmap index over a `MemberSnapshot`.
+
+Every (attribute, value) pair maps to a packed bitmap of the rows holding that value; for
+`AttributeLists` a row is set when any of its elements equals the value. A `FilterBody` then
+resolves to a handful of bitmap AND / OR / AND-NOT operations, and counts are popcounts:
+
+- include A: [a1, a2]  ->  rows &= bitmap(A, a1) | bitmap(A, a2)
+- exclude A: [a1]      ->  rows &= not_null(A) & ~bitmap(A, a1)   (NULL NOT IN (...) is NULL in SQL)
+- exclude list L: [l1] ->  rows &= ~bitmap(L, l1)                 (empty lists pass NOT EXISTS)
+
+Bitmaps are numpy uint8 arrays from `np.packbits`, so each operation touches n/8 bytes.
+"""
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from app.models import FilterBody
+
+# popcount of every byte value
+_POPCOUNT = np.array([bin(byte).count("1") for byte in range(256)], dtype=np.uint8)
+
+
+class BitmapIndex:
+    def __init__(self, row_count: int):
+        self.row_count = row_count
+        self.all_rows = np.packbits(np.ones(row_count, dtype=bool))
+        self.bitmaps: Dict[str, Dict[Any, np.ndarray]] = {}
+        self.not_null: Dict[str, np.ndarray] = {}
+
+    @classmethod
+    def build(cls, categoricals: Dict[str, Any], lists: Dict[str, Any], row_count: int) -> "BitmapIndex":
+        """Index the dictionary-encoded columns of a snapshot."""
+        index = cls(row_count)
+        for name, column in categoricals.items():
+            index.bitmaps[name] = {
+                value: np.packbits(column.codes == code) for code, value in enumerate(column.dictionary)
+            }
+            index.not_null[name] = np.packbits(column.codes >= 0)
+
+        for name, column in lists.items():
+            bitmaps = {}
+            for code, value in enumerate(column.dictionary):
+                rows = np.zeros(row_count, dtype=bool)
+                rows[column.element_rows[column.codes == code]] = True
+                bitmaps[value] = np.packbits(rows)
+            index.bitmaps[name] = bitmaps
+        return index
+
+    # -----------------------------------------------------------
+
+    def has_value(self, attribute: str, value: Any) -> bool:
+        return value in self.bitmaps.get(attribute, {})
+
+    def from_mask(self, mask: np.ndarray) -> np.ndarray:
+        return np.packbits(mask)
+
+    def any_of(self, attribute: str, values: List[Any]) -> np.ndarray:
+        """OR of the bitmaps for `values`; values absent from the table match nothing."""
+        bitmaps = self.bitmaps[attribute]
+        result = np.zeros_like(self.all_rows)
+        for value in set(values):
+            bitmap = bitmaps.get(value)
+            if bitmap is not None:
+                result |= bitmap
+        return result
+
+    def resolve(self, filters: FilterBody, rows: Optional[np.ndarray] = None) -> np.ndarray:
+        """Bitmap of the rows matching every include and exclude predicate in `filters`."""
+        result = self.all_rows.copy() if rows is None else rows.copy()
+        for attr, values in (filters.include or {}).items():
+            result &= self.any_of(attr.value, values)
+        for attr, values in (filters.exclude or {}).items():
+            if attr.value in self.not_null:
+                result &= self.not_null[attr.value]
+            result &= ~self.any_of(attr.value, values)
+        return result
+
+    def popcount(self, bitmap: np.ndarray) -> int:
+        return int(_POPCOUNT[bitmap].sum(dtype=np.int64))
+
+    def value_bitmaps(self, attribute: str) -> Dict[Any, np.ndarray]:
+        """Bitmap per value of `attribute`, with the NULL rows of a scalar attribute under None."""
+        bitmaps = dict(self.bitmaps[attribute])
+        if attribute in self.not_null:
+            bitmaps[None] = self.all_rows & ~self.not_null[attribute]
+        return bitmaps
+
+    def group_counts(self, attribute: str, rows: np.ndarray) -> Dict[Any, int]:
+        """Members per value of `attribute` over `rows`; list attributes count each member once per distinct element."""
+        counts = {}
+        for value, bitmap in self.value_bitmaps(attribute).items():
+            count = self.popcount(rows & bitmap)
+            if count:
+                counts[value] = count
+        return counts
+
+    def cross_counts(self, attribute: str, by: str, rows: np.ndarray) -> Dict[Tuple[Any, Any], int]:
+        """Members per (`attribute` value, `by` value) pair over `rows`."""
+        counts = {}
+        by_bitmaps = self.value_bitmaps(by)
+        for value, bitmap in self.value_bitmaps(attribute).items():
+            value_rows = rows & bitmap
+            if not value_rows.any():
+                continue
+            for by_value, by_bitmap in by_bitmaps.items():
+                count = self.popcount(value_rows & by_bitmap)
+                if count:
+                    counts[(value, by_value)] = count
+        return counts
+
+    def row_numbers(self, bitmap: np.ndarray) -> np.ndarray:
+        """Positions of the set bits, in row (id) order."""
+        return np.flatnonzero(np.unpackbits(bitmap, count=self.row_count))
@@ -0,0 +1,42 @@
+"""Arrow IPC stream and Parquet output for `/table/filtered`.
+
+Analytics jobs pull large parts of the table and rebuild columns from row-oriented JSON. The
+BigQuery client (and the snapshot backend) can hand back Arrow directly, so the columnar formats skip
+per-row encoding entirely and load into pandas/polars without parsing. With `dictionary=true` the
+categorical columns (and list elements) stay dictionary-encoded, which becomes `category` dtype in
+pandas and shrinks the payload further.
+"""
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from app.models import AttributeLists, CategoricalAttribute
+
+ARROW_STREAM_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+PARQUET_MEDIA_TYPE = "application/vnd.apache.parquet"
+
+
+def dictionary_encode(table: pa.Table) -> pa.Table:
+    """Dictionary-encode the categorical columns and the elements of the list columns of `table`."""
+    for index, name in enumerate(table.column_names):
+        column = table.column(index)
+        if name in CategoricalAttribute._value2member_map_ and not pa.types.is_dictionary(column.type):
+            table = table.set_column(index, name, column.dictionary_encode())
+        elif name in AttributeLists._value2member_map_ and pa.types.is_list(column.type):
+            lists = column.combine_chunks()
+            encoded = pa.ListArray.from_arrays(lists.offsets, lists.values.dictionary_encode(), mask=lists.is_null())
+            table = table.set_column(index, name, encoded)
+    return table
+
+
+def to_arrow_ipc(table: pa.Table) -> bytes:
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+def to_parquet(table: pa.Table) -> bytes:
+    sink = pa.BufferOutputStream()
+    # Parquet dictionary-encodes and compresses on its own; the Arrow schema it stores keeps `dictionary` columns as such
+    pq.write_table(table, sink, compression="zstd")
+    return sink.getvalue().to_pybytes()
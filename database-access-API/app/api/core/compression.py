@@ -0,0 +1,160 @@
+"""Negotiated response compression (brotli or gzip) for JSON and NDJSON responses.
+
+Member rows repeat the same country names, roles and timezones on every line, so `/table/filtered`
+pages shrink several-fold compressed, which matters for bandwidth-bound mobile clients. The
+middleware picks `br` when the `brotli` package is installed and the client accepts it, then `gzip`.
+Bodies under the minimum size are sent as-is. Streaming responses are compressed chunk by chunk,
+and each chunk is flushed so NDJSON rows still reach the client as soon as they are written.
+
+A compressed body is a different representation, so a strong ETag is weakened (as nginx does).
+`If-None-Match` is compared weakly, so the weakened ETag still yields a 304.
+"""
+import zlib
+from typing import Dict, Optional
+
+import anyio.to_thread
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError:  # gzip only
+    brotli = None
+
+# Parquet is compressed already; an uncompressed Arrow IPC stream is not
+COMPRESSIBLE_TYPES = ("application/json", "application/x-ndjson", "application/vnd.apache.arrow.stream", "text/")
+
+# compressing chunks bigger than this inline would stall the event loop
+THREAD_MINIMUM_SIZE = 128 * 1024
+
+
+class GzipCompressor:
+    def __init__(self, level: int):
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def compress(self, data: bytes, finish: bool) -> bytes:
+        return self._compressor.compress(data) + self._compressor.flush(zlib.Z_FINISH if finish else zlib.Z_SYNC_FLUSH)
+
+
+class BrotliCompressor:
+    def __init__(self, quality: int):
+        self._compressor = brotli.Compressor(quality=quality)
+
+    def compress(self, data: bytes, finish: bool) -> bytes:
+        compressed = self._compressor.process(data)
+        return compressed + (self._compressor.finish() if finish else self._compressor.flush())
+
+
+def supported_encodings() -> tuple:
+    return ("br", "gzip") if brotli is not None else ("gzip",)
+
+
+def negotiate_encoding(accept_encoding: str) -> Optional[str]:
+    """The content coding to use for an `Accept-Encoding` header, or None to send the body as-is."""
+    qualities: Dict[str, float] = {}
+    for part in accept_encoding.split(","):
+        coding, _, parameters = part.partition(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        quality = 1.0
+        parameters = parameters.strip().replace(" ", "")
+        if parameters.startswith("q="):
+            try:
+                quality = float(parameters[2:])
+            except ValueError:
+                quality = 0.0
+        qualities[coding] = quality
+
+    for coding in supported_encodings():
+        if qualities.get(coding, qualities.get("*", 0.0)) > 0:
+            return coding
+    return None
+
+
+class CompressionMiddleware:
+    def __init__(self, app: ASGIApp, minimum_size: int = 1024, gzip_level: int = 6, brotli_quality: int = 4):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    def make_compressor(self, encoding: str):
+        if encoding == "br":
+            return BrotliCompressor(self.brotli_quality)
+        return GzipCompressor(self.gzip_level)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = negotiate_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+        await self.app(scope, receive, CompressingSend(send, encoding, self))
+
+
+class CompressingSend:
+    """Wraps `send` for one response, deciding on its first body message whether to compress."""
+
+    def __init__(self, send: Send, encoding: str, middleware: CompressionMiddleware):
+        self.send = send
+        self.encoding = encoding
+        self.middleware = middleware
+        self.start_message: Optional[Message] = None
+        self.compressor = None
+        self.passthrough = False
+
+    async def __call__(self, message: Message):
+        if message["type"] == "http.response.start":
+            headers = Headers(raw=message["headers"])
+            content_type = headers.get("content-type", "").lower()
+            self.passthrough = (
+                "content-encoding" in headers
+                or message["status"] in (204, 206, 304)
+                or not content_type.startswith(COMPRESSIBLE_TYPES)
+            )
+            if self.passthrough:
+                await self.send(message)
+            else:
+                # held back until the first body message shows whether compression is worth it
+                self.start_message = message
+            return
+
+        if message["type"] != "http.response.body" or self.passthrough:
+            await self.send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+        if self.start_message is None:
+            await self.send({"type": "http.response.body", "body": await self.compress(body, not more_body), "more_body": more_body})
+            return
+
+        start_message, self.start_message = self.start_message, None
+        headers = MutableHeaders(raw=start_message["headers"])
+        if not more_body and len(body) < self.middleware.minimum_size:
+            self.passthrough = True
+            await self.send(start_message)
+            await self.send(message)
+            return
+
+        self.compressor = self.middleware.make_compressor(self.encoding)
+        compressed = await self.compress(body, not more_body)
+        headers["Content-Encoding"] = self.encoding
+        headers.add_vary_header("Accept-Encoding")
+        etag = headers.get("etag")
+        if etag is not None and not etag.startswith("W/"):
+            headers["ETag"] = "W/" + etag
+        if more_body:
+            del headers["Content-Length"]
+        else:
+            headers["Content-Length"] = str(len(compressed))
+        await self.send(start_message)
+        await self.send({"type": "http.response.body", "body": compressed, "more_body": more_body})
+
+    async def compress(self, body: bytes, finish: bool) -> bytes:
+        if len(body) >= THREAD_MINIMUM_SIZE:
+            return await anyio.to_thread.run_sync(self.compressor.compress, body, finish)
+        return self.compressor.compress(body, finish)
@@ -1,3 +1,5 @@
+from typing import Literal, Optional
+
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 class Settings(BaseSettings):
@@ -20,6 +22,58 @@ class Settings(BaseSettings):
     SERVICE_ACCOUNT: str
 
     # file path to a json credentials for accessing BigQuery outside of Cloud Run in the same Project
-    GOOGLE_APPLICATION_CREDENTIALS: str
+    GOOGLE_APPLICATION_CREDENTIALS: Optional[str] = None
+
+    # "bigquery" runs every request as a BigQuery job
+    # "snapshot" serves every request from an in-memory columnar copy of the table
+    # "local" runs the same SQL jobs on an embedded DuckDB copy of the table, without GCP credentials
+    QUERY_BACKEND: Literal["bigquery", "snapshot", "local"] = "bigquery"
+    # cleaning pipeline output (`chingu_members_cleaned.json`) loaded at startup in snapshot and local mode
+    SNAPSHOT_PATH: Optional[str] = None
+    # BigQuery schema file used to type the local copy's columns in local mode
+    LOCAL_SCHEMA_PATH: Optional[str] = "../data_cleaning/bigquery_schema.json"
+    # re-pull the snapshot from BigQuery at startup; disable for offline use without GCP credentials
+    SNAPSHOT_REFRESH_FROM_BIGQUERY: bool = True
+
+    # BigQuery job execution: jobs run on a bounded thread pool so they never block the event loop
+    BQ_MAX_CONCURRENT_QUERIES: int = 8
+    BQ_QUERY_TIMEOUT_SECONDS: float = 30.0
+    # byte budget for request-driven jobs: sent to BigQuery as maximum_bytes_billed (0 = no limit)
+    BQ_MAXIMUM_BYTES_BILLED: int = 0
+    # dry-run each query template first: "estimate" only reports the bytes in a response header,
+    # "reject" answers 400 over budget, "downgrade" narrows `fields` to the default columns first
+    BQ_COST_GUARD: Literal["off", "estimate", "reject", "downgrade"] = "off"
+
+    # In-process response cache; the table only changes when the cleaning pipeline re-uploads it
+    RESULT_CACHE_MAX_BYTES: int = 64 * 1024 * 1024
+    RESULT_CACHE_TTL_SECONDS: float = 3600.0
+
+    # HTTP conditional caching: ETags follow the table version, re-checked at most this often
+    DATASET_VERSION_TTL_SECONDS: float = 60.0
+    # Cache-Control max-age for the Express proxy and CDNs; 0 makes them revalidate every time
+    HTTP_CACHE_MAX_AGE_SECONDS: int = 300
+
+    # on-disk copy of the distinct values used to validate filters, so startup doesn't wait on BigQuery;
+    # the Docker image ships one (scripts/export_unique_values.py) and points this at it
+    UNIQUE_VALUE_CACHE_PATH: Optional[str] = None
+    # write each background refresh back to UNIQUE_VALUE_CACHE_PATH; off in the image, where /app is read-only
+    UNIQUE_VALUE_CACHE_SAVE: bool = True
+    # background refresh interval; after a failed refresh, retry sooner
+    UNIQUE_VALUE_REFRESH_SECONDS: float = 3600.0
+    UNIQUE_VALUE_RETRY_SECONDS: float = 30.0
+
+    # rows per page fetched from BigQuery and written to the socket in streaming (NDJSON) mode
+    STREAM_PAGE_SIZE: int = 1000
+
+    # negotiated brotli/gzip response compression; smaller bodies are sent as-is
+    COMPRESSION_MINIMUM_SIZE: int = 1024
+    GZIP_LEVEL: int = 6
+    BROTLI_QUALITY: int = 4
+
+    # shared secret for POST /cache/invalidate and /snapshot/refresh, sent as `X-Admin-Token`; unset disables them
+    ADMIN_TOKEN: Optional[str] = None
+
+    # print one structured JSON log line per request with its timing spans (the same spans go to /metrics)
+    LOG_REQUEST_TIMINGS: bool = False
 
 settings = Settings()
\ No newline at end of file
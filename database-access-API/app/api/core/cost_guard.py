@@ -0,0 +1,94 @@
+"""Dry-run byte estimates and a per-query byte budget.
+
+BigQuery bills on-demand queries by the bytes they process, so one request with a wide `fields`
+list can cost far more than the landing-page queries. A dry run returns the bytes a job would
+process without running or billing it. The members table is neither partitioned nor clustered,
+so those bytes depend only on the columns a query reads, not on the filter values or the LIMIT:
+one dry run per SQL template (the compiled SQL, without its parameters) stays exact until the table
+is re-uploaded.
+"""
+import re
+from typing import Any, Dict, Optional
+
+from google.cloud import bigquery
+
+from app.api.core.config import settings
+from app.api.core.metrics import registry
+
+ESTIMATE_HEADER = "X-BigQuery-Estimated-Bytes"
+DOWNGRADED_HEADER = "X-BigQuery-Downgraded"
+
+# the job error when BigQuery itself refuses to bill past maximum_bytes_billed:
+# "Query exceeded limit for bytes billed: 1000. 10485760 or higher required."
+BYTES_BILLED_LIMIT_REASON = "bytesBilledLimitExceeded"
+_REQUIRED_BYTES = re.compile(r"(\d+) or higher required")
+
+dry_runs = registry.counter("bigquery_dry_runs_total", "Dry-run jobs sent to estimate bytes processed.")
+guard_decisions = registry.counter(
+    "bigquery_cost_guard_total", "Byte-budget decisions: allowed, downgraded, rejected or unestimated (dry run failed).", ("decision",))
+
+
+class CostEstimates:
+    """Bytes processed per SQL template, filled by dry runs and cleared when the table changes."""
+
+    def __init__(self):
+        self._bytes: Dict[str, int] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, query_sql: str) -> Optional[int]:
+        estimate = self._bytes.get(query_sql)
+        if estimate is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return estimate
+
+    def put(self, query_sql: str, estimate: int):
+        self._bytes[query_sql] = estimate
+
+    def invalidate(self) -> int:
+        dropped = len(self._bytes)
+        self._bytes.clear()
+        return dropped
+
+    def stats(self) -> Dict[str, Any]:
+        return {"templates": len(self._bytes), "hits": self.hits, "misses": self.misses}
+
+
+cost_estimates = CostEstimates()
+
+
+def capped_job_config(**properties) -> bigquery.QueryJobConfig:
+    """A job config that BQ_MAXIMUM_BYTES_BILLED caps: BigQuery fails the job instead of billing past it."""
+    job_config = bigquery.QueryJobConfig(**properties)
+    # passing maximum_bytes_billed=None would send the string "None"
+    if settings.BQ_MAXIMUM_BYTES_BILLED:
+        job_config.maximum_bytes_billed = settings.BQ_MAXIMUM_BYTES_BILLED
+    return job_config
+
+
+def dry_run_config(job_config: Optional[bigquery.QueryJobConfig]) -> bigquery.QueryJobConfig:
+    """The dry-run twin of `job_config`: same parameters, never answered from the query cache."""
+    parameters = list(job_config.query_parameters) if job_config is not None else []
+    return bigquery.QueryJobConfig(dry_run=True, use_query_cache=False, query_parameters=parameters)
+
+
+def dry_run_bytes(client, query_sql: str, job_config: bigquery.QueryJobConfig) -> int:
+    # a dry run comes back at once with the statistics; there is no result to wait for
+    dry_runs.inc()
+    return client.query(query_sql, job_config=job_config).total_bytes_processed
+
+
+def bytes_billed_limit_exceeded(error: Exception) -> bool:
+    return any(detail.get("reason") == BYTES_BILLED_LIMIT_REASON for detail in getattr(error, "errors", None) or [])
+
+
+def required_bytes(error: Exception) -> Optional[int]:
+    """The bytes BigQuery says the rejected job needed, if its error message reports them."""
+    match = _REQUIRED_BYTES.search(str(error))
+    return int(match.group(1)) if match else None
+
+
+def over_budget(estimate: int) -> bool:
+    return bool(settings.BQ_MAXIMUM_BYTES_BILLED) and estimate > settings.BQ_MAXIMUM_BYTES_BILLED
@@ -0,0 +1,56 @@
+"""Version of the members table, used for HTTP conditional caching.
+
+The table only changes when the cleaning pipeline re-uploads it, so responses carry an ETag derived
+from the table version plus the normalized request. A client (or the Express proxy) that sends the
+ETag back in `If-None-Match` gets a 304 without any query running.
+
+In BigQuery mode the version is the table's last-modified time, a metadata lookup rather than a
+query job, re-checked at most every DATASET_VERSION_TTL_SECONDS. In snapshot mode it is the
+snapshot's content hash.
+"""
+import hashlib
+import time
+from typing import Hashable, Optional
+
+from app.api.core.config import settings
+
+
+class DatasetVersion:
+    def __init__(self, ttl_seconds: float):
+        self.ttl_seconds = ttl_seconds
+        self.value: Optional[str] = None
+        self._checked_at: Optional[float] = None
+
+    def is_stale(self) -> bool:
+        return self._checked_at is None or time.monotonic() - self._checked_at >= self.ttl_seconds
+
+    def update(self, value: str) -> bool:
+        """Record a freshly checked version; True if it replaced a different known version."""
+        changed = self.value is not None and value != self.value
+        self.value = value
+        self._checked_at = time.monotonic()
+        return changed
+
+    def touch(self):
+        """Keep the last known version until the next check, e.g. after a failed lookup."""
+        self._checked_at = time.monotonic()
+
+    def expire(self):
+        self._checked_at = None
+
+
+def make_etag(version: str, request_key: Hashable) -> str:
+    # request keys are tuples of str/int/date, so their repr is stable across processes
+    return '"' + hashlib.sha1(repr((version, request_key)).encode()).hexdigest() + '"'
+
+
+def etag_matches(etag: Optional[str], if_none_match: Optional[str]) -> bool:
+    """Whether an `If-None-Match` header covers `etag` (weak comparison, as RFC 9110 requires)."""
+    if etag is None or not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return etag in {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+
+
+dataset_version = DatasetVersion(settings.DATASET_VERSION_TTL_SECONDS)
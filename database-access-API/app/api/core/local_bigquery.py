@@ -0,0 +1,215 @@
+"""An embedded stand-in for the BigQuery client, for running the API offline.
+
+With `QUERY_BACKEND=local` the routes talk to `LocalBigQueryClient` instead of `bigquery.Client`.
+It loads the cleaning pipeline output (`chingu_members_cleaned.json`) into an in-memory DuckDB
+table typed by `bigquery_schema.json`, and answers the same `client.query(sql, job_config).result()`
+calls: the routes, the query compiler and the runner are exercised unchanged, only the SQL engine
+differs. The BigQuery dialect the app emits is rewritten to DuckDB on the way in:
+
+- `` `project.dataset.table` `` becomes the local table and other backticks become double quotes
+- `@name` parameters become `$name`, bound from the job config's query parameters
+- `x IN UNNEST(@values)` becomes `x IN (SELECT UNNEST($values))`
+- `UNNEST(column) AS v` becomes `UNNEST(column) AS v_unnest(v)`
+- `ARRAY_AGG(DISTINCT x IGNORE NULLS)` and `LOGICAL_OR` become their DuckDB spellings
+
+Jobs report `total_bytes_processed` the way on-demand BigQuery bills an unpartitioned table (the
+full size of every column the query reads), so the cost guard and `/metrics` behave as in production.
+A job over its `maximum_bytes_billed` fails with BigQuery's `bytesBilledLimitExceeded` error.
+SQL errors surface as `BadRequest`, like BigQuery's, so routes answer them with 502.
+"""
+import json
+import re
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterator, List, Optional
+
+import pyarrow as pa
+from google.api_core.exceptions import BadRequest
+
+try:
+    import duckdb
+except ImportError:  # only needed for QUERY_BACKEND=local
+    duckdb = None
+
+DUCKDB_TYPES = {
+    "STRING": "VARCHAR",
+    "INTEGER": "BIGINT",
+    "INT64": "BIGINT",
+    "FLOAT": "DOUBLE",
+    "FLOAT64": "DOUBLE",
+    "NUMERIC": "DECIMAL(38, 9)",
+    "BOOLEAN": "BOOLEAN",
+    "BOOL": "BOOLEAN",
+    "TIMESTAMP": "TIMESTAMPTZ",
+    "DATETIME": "TIMESTAMP",
+    "DATE": "DATE",
+}
+
+_TABLE_REF = re.compile(r"`[\w-]+\.[\w-]+\.[\w-]+`")
+_IN_UNNEST = re.compile(r"IN UNNEST\(@(\w+)\)")
+_UNNEST_ALIAS = re.compile(r"UNNEST\((`\w+`)\)(?:\s+AS)?\s+(\w+)")
+_IGNORE_NULLS = re.compile(r"ARRAY_AGG\(DISTINCT (`\w+`) IGNORE NULLS\)")
+_PARAMETER = re.compile(r"@(\w+)")
+
+
+def to_duckdb_sql(query_sql: str, table: str) -> str:
+    """Rewrite the BigQuery SQL this app emits into DuckDB SQL against the local `table`."""
+    sql = _TABLE_REF.sub(f'"{table}"', query_sql)
+    sql = _IN_UNNEST.sub(r"IN (SELECT UNNEST($\1))", sql)
+    sql = _UNNEST_ALIAS.sub(r"UNNEST(\1) AS \2_unnest(\2)", sql)
+    sql = _IGNORE_NULLS.sub(r"ARRAY_AGG(DISTINCT \1) FILTER (WHERE \1 IS NOT NULL)", sql)
+    sql = sql.replace("LOGICAL_OR(", "BOOL_OR(")
+    sql = _PARAMETER.sub(r"$\1", sql)
+    return sql.replace("`", '"')
+
+
+def parameter_values(job_config) -> Dict[str, Any]:
+    values = {}
+    for parameter in getattr(job_config, "query_parameters", None) or []:
+        # ArrayQueryParameter has `values`, ScalarQueryParameter has `value`
+        values[parameter.name] = list(parameter.values) if hasattr(parameter, "values") else parameter.value
+    return values
+
+
+def _column_size_sql(name: str, duckdb_type: str) -> str:
+    # BigQuery's logical sizes: STRING is 2 bytes + its UTF-8 length, numbers and timestamps 8, NULL 0
+    column = f'"{name}"'
+    if duckdb_type == "VARCHAR":
+        return f"COALESCE(SUM(2 + strlen({column})), 0)"
+    if duckdb_type == "VARCHAR[]":
+        return f"COALESCE(SUM(list_sum(list_transform({column}, x -> 2 + strlen(x)))), 0)"
+    if duckdb_type.endswith("[]"):
+        return f"COALESCE(SUM(len({column})), 0) * 8"
+    if duckdb_type == "BOOLEAN":
+        return f"COUNT({column})"
+    return f"COUNT({column}) * 8"
+
+
+class SchemaField:
+    def __init__(self, name: str):
+        self.name = name
+
+
+class LocalRowIterator(list):
+    """The rows of a finished job: iterable as dicts, like `RowIterator`, with `schema`, `pages` and `to_arrow()`."""
+
+    def __init__(self, table: pa.Table, page_size: Optional[int] = None):
+        super().__init__(table.to_pylist())
+        self._table = table
+        self.schema = [SchemaField(name) for name in table.column_names]
+        self.total_rows = table.num_rows
+        self.page_size = page_size or max(table.num_rows, 1)
+
+    def to_arrow(self) -> pa.Table:
+        return self._table
+
+    @property
+    def pages(self) -> Iterator[List[Dict[str, Any]]]:
+        for start in range(0, len(self), self.page_size):
+            yield self[start:start + self.page_size]
+
+
+class LocalQueryJob:
+    def __init__(self, client: "LocalBigQueryClient", query_sql: str, job_config, bytes_processed: int):
+        self._client = client
+        self._sql = to_duckdb_sql(query_sql, client.table)
+        self._parameters = parameter_values(job_config)
+        self._cursor = None
+        self.total_bytes_processed = self.total_bytes_billed = bytes_processed
+        self._maximum_bytes_billed = getattr(job_config, "maximum_bytes_billed", None)
+        self.cache_hit = False
+        self.slot_millis = 0
+
+    def result(self, timeout: Optional[float] = None, page_size: Optional[int] = None) -> LocalRowIterator:
+        if self._maximum_bytes_billed and self.total_bytes_billed > self._maximum_bytes_billed:
+            message = (f"Query exceeded limit for bytes billed: {self._maximum_bytes_billed}. "
+                       f"{self.total_bytes_billed} or higher required.")
+            raise BadRequest(message, errors=[{"reason": "bytesBilledLimitExceeded", "message": message}])
+        # each job gets its own cursor, so jobs on different pool threads don't share a connection
+        self._cursor = self._client.connection.cursor()
+        timer = threading.Timer(timeout, self._cursor.interrupt) if timeout else None
+        started = time.perf_counter()
+        try:
+            if timer is not None:
+                timer.start()
+            table = self._cursor.execute(self._sql, self._parameters).fetch_arrow_table()
+        except duckdb.InterruptException:
+            raise TimeoutError()
+        except duckdb.Error as e:
+            raise BadRequest(f"{e} (while running: {self._sql})")
+        finally:
+            if timer is not None:
+                timer.cancel()
+            self._cursor.close()
+        self.slot_millis = int((time.perf_counter() - started) * 1000)
+        return LocalRowIterator(table, page_size)
+
+    def cancel(self) -> bool:
+        if self._cursor is not None:
+            self._cursor.interrupt()
+        return True
+
+
+class LocalBigQueryClient:
+    """Answers `query(...)` / `get_table(...)` like `bigquery.Client`, from an in-memory DuckDB table."""
+
+    def __init__(self, connection, table: str):
+        self.connection = connection
+        self.table = table
+        self.modified = datetime.now(timezone.utc)
+        types = dict(connection.execute(f'SELECT column_name, column_type FROM (DESCRIBE "{table}")').fetchall())
+        sizes = connection.execute(
+            f'SELECT {", ".join(_column_size_sql(name, duckdb_type) for name, duckdb_type in types.items())} FROM "{table}"'
+        ).fetchone()
+        self.column_bytes = dict(zip(types, (int(size) for size in sizes)))
+        self.num_rows = connection.execute(f'SELECT COUNT(*) FROM "{table}"').fetchone()[0]
+
+    @classmethod
+    def from_files(cls, data_path: str, schema_path: Optional[str] = None, table: str = "members") -> "LocalBigQueryClient":
+        """Load newline-delimited JSON, typed by a BigQuery schema file where it lists the column."""
+        if duckdb is None:
+            raise RuntimeError("QUERY_BACKEND=local needs the `duckdb` package")
+        connection = duckdb.connect(":memory:")
+        # BigQuery computes DATE(timestamp) in UTC
+        connection.execute("SET TimeZone = 'UTC'")
+        source = "read_json_auto(?, format = 'newline_delimited')"
+        present = {row[0] for row in connection.execute(f"DESCRIBE SELECT * FROM {source}", [data_path]).fetchall()}
+        casts = []
+        if schema_path:
+            with open(schema_path) as f:
+                for field in json.load(f):
+                    if field["name"] not in present:
+                        continue
+                    duckdb_type = DUCKDB_TYPES[field["type"]] + ("[]" if field.get("mode") == "REPEATED" else "")
+                    casts.append(f'CAST("{field["name"]}" AS {duckdb_type}) AS "{field["name"]}"')
+        # columns the schema file doesn't list keep the inferred type
+        select = f"SELECT * REPLACE ({', '.join(casts)})" if casts else "SELECT *"
+        connection.execute(f'CREATE TABLE "{table}" AS {select} FROM {source}', [data_path])
+        return cls(connection, table)
+
+    def bytes_read(self, query_sql: str) -> int:
+        """What on-demand BigQuery would bill: the full size of every column the query references."""
+        if re.search(r"SELECT\s+\*", query_sql):
+            return sum(self.column_bytes.values())
+        return sum(size for name, size in self.column_bytes.items() if f"`{name}`" in query_sql)
+
+    def query(self, query_sql: str, job_config=None) -> LocalQueryJob:
+        job = LocalQueryJob(self, query_sql, job_config, self.bytes_read(query_sql))
+        if getattr(job_config, "dry_run", False):
+            # like a BigQuery dry run: validate the query without running it
+            try:
+                self.connection.cursor().execute("EXPLAIN " + job._sql, job._parameters)
+            except duckdb.Error as e:
+                raise BadRequest(str(e))
+        return job
+
+    def get_table(self, table_id: str):
+        return LocalTable(table_id, self.modified, self.num_rows)
+
+
+class LocalTable:
+    def __init__(self, table_id: str, modified: datetime, num_rows: int):
+        self.table_id = table_id
+        self.modified = modified
+        self.num_rows = num_rows
@@ -0,0 +1,239 @@
+"""Prometheus-style metrics and per-request timing spans.
+
+`GET /metrics` serves the Prometheus text format: request latency per route, BigQuery job latency,
+bytes processed/billed, slot time, BigQuery cache hits, rows returned and the in-process caches.
+The registry is a few dicts rendered by hand instead of `prometheus_client`: each Cloud Run
+instance is a single process, so nothing needs its multiprocess mode.
+
+Inside a request, `span(stage)` times one step (validate, compile, execute, serialize, ...). The
+middleware adds the steps to a per-route stage histogram, sends them as a `Server-Timing` header
+(visible in the browser dev tools) and, with `LOG_REQUEST_TIMINGS`, prints one JSON log line per
+request, which Cloud Logging parses as a structured entry.
+"""
+import json
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from threading import Lock
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels: Labels) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in labels) + "}"
+
+
+def _format_value(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+class Counter:
+    def __init__(self, name: str, help: str, labels: Tuple[str, ...] = ()):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self._values: Dict[Labels, float] = {}
+        self._lock = Lock()
+
+    def inc(self, amount: float = 1, **labels: Any):
+        key = tuple((name, str(labels[name])) for name in self.labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            lines += [f"{self.name}{_format_labels(key)} {_format_value(value)}" for key, value in self._values.items()]
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, help: str, labels: Tuple[str, ...] = (), buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.buckets = buckets
+        # per label set: one count per bucket (not cumulative), then sum and count
+        self._values: Dict[Labels, List[float]] = {}
+        self._lock = Lock()
+
+    def observe(self, value: float, **labels: Any):
+        key = tuple((name, str(labels[name])) for name in self.labels)
+        with self._lock:
+            series = self._values.get(key)
+            if series is None:
+                series = self._values[key] = [0] * (len(self.buckets) + 2)
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+                    break
+            series[-2] += value
+            series[-1] += 1
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for key, series in self._values.items():
+                cumulative = 0
+                for bound, count in zip(self.buckets, series):
+                    cumulative += count
+                    lines.append(f"{self.name}_bucket{_format_labels(key + (('le', _format_value(bound)),))} {cumulative}")
+                lines.append(f"{self.name}_bucket{_format_labels(key + (('le', '+Inf'),))} {_format_value(series[-1])}")
+                lines.append(f"{self.name}_sum{_format_labels(key)} {repr(float(series[-2]))}")
+                lines.append(f"{self.name}_count{_format_labels(key)} {_format_value(series[-1])}")
+        return lines
+
+
+# (name, type, help, [(labels, value)]) read from another component's own counters at scrape time
+Collected = Tuple[str, str, str, List[Tuple[Dict[str, str], float]]]
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: List[Any] = []
+        self._collectors: List[Callable[[], List[Collected]]] = []
+
+    def counter(self, name: str, help: str, labels: Tuple[str, ...] = ()) -> Counter:
+        metric = Counter(name, help, labels)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(self, name: str, help: str, labels: Tuple[str, ...] = (), buckets: Tuple[float, ...] = LATENCY_BUCKETS) -> Histogram:
+        metric = Histogram(name, help, labels, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def register_collector(self, collect: Callable[[], List[Collected]]):
+        """Expose values another component already keeps (e.g. cache hit counters) without double counting."""
+        self._collectors.append(collect)
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics:
+            lines += metric.render()
+        for collect in self._collectors:
+            for name, kind, help, samples in collect():
+                lines += [f"# HELP {name} {help}", f"# TYPE {name} {kind}"]
+                lines += [f"{name}{_format_labels(tuple(labels.items()))} {_format_value(value)}" for labels, value in samples]
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+http_request_duration = registry.histogram(
+    "http_request_duration_seconds", "Time from request start to the last response byte.", ("method", "route", "status"))
+request_stage_duration = registry.histogram(
+    "request_stage_duration_seconds", "Time spent in each step of a request.", ("route", "stage"))
+bigquery_job_duration = registry.histogram(
+    "bigquery_job_duration_seconds", "Time from submitting a BigQuery job until its result is ready.", ("outcome",))
+bigquery_jobs = registry.counter(
+    "bigquery_jobs_total", "Finished BigQuery jobs, by whether BigQuery answered from its own query cache.", ("cache_hit",))
+bigquery_bytes_processed = registry.counter("bigquery_bytes_processed_total", "Bytes processed by BigQuery jobs.")
+bigquery_bytes_billed = registry.counter("bigquery_bytes_billed_total", "Bytes billed for BigQuery jobs.")
+bigquery_slot_milliseconds = registry.counter("bigquery_slot_milliseconds_total", "Slot milliseconds used by BigQuery jobs.")
+bigquery_rows_returned = registry.counter("bigquery_rows_returned_total", "Rows fetched from BigQuery job results.")
+background_errors = registry.counter(
+    "background_errors_total", "Failures of startup and background tasks that are otherwise only logged.", ("task",))
+
+
+def record_bigquery_job(job, seconds: float, outcome: str):
+    """Record a finished (or failed) job; its statistics are already on the job, no API call is made."""
+    bigquery_job_duration.observe(seconds, outcome=outcome)
+    if outcome != "ok":
+        return
+    bigquery_jobs.inc(cache_hit="true" if getattr(job, "cache_hit", False) else "false")
+    for counter, attribute in (
+        (bigquery_bytes_processed, "total_bytes_processed"),
+        (bigquery_bytes_billed, "total_bytes_billed"),
+        (bigquery_slot_milliseconds, "slot_millis"),
+    ):
+        value = getattr(job, attribute, None)
+        if value:
+            counter.inc(value)
+
+
+# ---------------------------------------------------------------
+
+class RequestTimings:
+    def __init__(self):
+        self.spans: Dict[str, float] = {}
+
+    def add(self, stage: str, seconds: float):
+        # a stage that runs more than once (e.g. serializing each streamed page) adds up
+        self.spans[stage] = self.spans.get(stage, 0.0) + seconds
+
+    def server_timing(self) -> str:
+        return ", ".join(f"{stage};dur={seconds * 1000:.2f}" for stage, seconds in self.spans.items())
+
+
+_request_timings: ContextVar[Optional[RequestTimings]] = ContextVar("request_timings", default=None)
+
+
+@contextmanager
+def span(stage: str) -> Iterator[None]:
+    """Time a step of the current request; a no-op outside a request (e.g. in the benchmark scripts)."""
+    timings = _request_timings.get()
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        if timings is not None:
+            timings.add(stage, time.perf_counter() - started)
+
+
+class MetricsMiddleware:
+    def __init__(self, app: ASGIApp, log_timings: bool = False):
+        self.app = app
+        self.log_timings = log_timings
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        timings = RequestTimings()
+        token = _request_timings.set(timings)
+        started = time.perf_counter()
+        status = 500
+
+        async def send_with_timings(message: Message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                if timings.spans:
+                    # spans after this point (streamed pages) only reach the histogram and the log
+                    MutableHeaders(raw=message["headers"]).append("Server-Timing", timings.server_timing())
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timings)
+        finally:
+            _request_timings.reset(token)
+            elapsed = time.perf_counter() - started
+            # the route template, not the raw path, so label values stay bounded
+            route = scope.get("route")
+            route_path = getattr(route, "path", "unmatched")
+            http_request_duration.observe(elapsed, method=scope["method"], route=route_path, status=status)
+            for stage, seconds in timings.spans.items():
+                request_stage_duration.observe(seconds, route=route_path, stage=stage)
+            if self.log_timings:
+                print(json.dumps({
+                    "severity": "INFO",
+                    "message": f"{scope['method']} {route_path} {status}",
+                    "route": route_path,
+                    "status": status,
+                    "duration_ms": round(elapsed * 1000, 2),
+                    "spans_ms": {stage: round(seconds * 1000, 2) for stage, seconds in timings.spans.items()},
+                }))
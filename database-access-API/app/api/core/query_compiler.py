@@ -0,0 +1,177 @@
+"""Compile filtered requests into BigQuery SQL plus query parameters.
+
+Each endpoint used to build its WHERE clause in request order, so the same logical filter could
+produce different SQL text (and miss BigQuery's query cache) depending on how the JSON was written.
+Filters are normalized through `FilterBody.canonical()` first, sorting attributes and sorting and
+de-duplicating values, so identical logical filters always compile to byte-identical jobs.
+
+The SQL text only depends on which attributes are filtered (the filter *shape*) and on the query
+kind, so templates are memoized by shape; only the parameter values are built per request.
+"""
+import json
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple
+
+from google.cloud import bigquery
+
+from app.api.core.config import settings
+from app.api.core.cost_guard import capped_job_config
+from app.api.core.metrics import span
+from app.models import MEMBER_CARD_FIELDS, AttributeLists, FilterBody, MemberField
+
+int_attributes = {"Solo_Project_Tier", "GMT_Offset", "Voyage_Signup_ids"}
+
+# (included attributes, excluded attributes), each sorted
+FilterShape = Tuple[Tuple[str, ...], Tuple[str, ...]]
+
+
+@dataclass(frozen=True)
+class CompiledQuery:
+    sql: str
+    parameters: Tuple[Any, ...]
+
+    @property
+    def key(self) -> Tuple[str, str]:
+        """Hashable identity of the job: the SQL text plus its bound parameter values."""
+        return self.sql, json.dumps([parameter.to_api_repr() for parameter in self.parameters], sort_keys=True)
+
+    def job_config(self) -> bigquery.QueryJobConfig:
+        return capped_job_config(dry_run=False, use_query_cache=True, query_parameters=list(self.parameters))
+
+
+def table_ref() -> str:
+    return f"`{settings.GCP_PROJECT_ID}.{settings.DATASET}.{settings.TABLE}`"
+
+
+def filter_shape(canonical_filters: Tuple) -> FilterShape:
+    include, exclude = canonical_filters
+    return tuple(attr for attr, _ in include), tuple(attr for attr, _ in exclude)
+
+
+def filter_parameters(canonical_filters: Tuple) -> List[bigquery.ArrayQueryParameter]:
+    """One array parameter per filtered attribute, in the order their predicates appear in the template."""
+    include, exclude = canonical_filters
+    return [
+        bigquery.ArrayQueryParameter(f"{attr}_filter", "INT64" if attr in int_attributes else "STRING", list(values))
+        for attr, values in include + exclude
+    ]
+
+
+@lru_cache(maxsize=256)
+def where_template(shape: FilterShape) -> str:
+    """`WHERE` clause for a filter shape; values are bound from `@<attribute>_filter` parameters."""
+    predicates = ["1=1"]
+    for negate, attributes in ((False, shape[0]), (True, shape[1])):
+        maybe = "NOT " if negate else ""
+        for attr in attributes:
+            if attr in AttributeLists._value2member_map_:
+                # ANSI SQL version; BigQuery also has ARRAY_INTERSECT but it needs the standard dialect flag
+                predicates.append(f"{maybe}EXISTS (SELECT 1 FROM UNNEST(`{attr}`) v WHERE v IN UNNEST(@{attr}_filter))")
+            else:
+                predicates.append(f"`{attr}` {maybe}IN UNNEST(@{attr}_filter)")
+    return "WHERE " + " AND ".join(predicates)
+
+
+def group_by_column(attribute: str, alias: str) -> Tuple[str, str]:
+    """SELECT expression and extra FROM item for grouping by `attribute`; list attributes are unnested."""
+    if attribute in AttributeLists._value2member_map_:
+        return alias, f", UNNEST(`{attribute}`) AS {alias}"
+    return f"`{attribute}`", ""
+
+
+def normalize_fields(fields: Optional[List[MemberField]]) -> Tuple[str, ...]:
+    """Columns for `fields=` in schema order, defaulting to what MemberCard needs; ("*",) selects all of them.
+
+    `id` is always included since it is the keyset cursor.
+    """
+    if not fields:
+        fields = MEMBER_CARD_FIELDS
+    if MemberField.ALL in fields:
+        return ("*",)
+    selected = set(fields) | {MemberField.ID}
+    return tuple(field.value for field in MemberField if field in selected)
+
+# ---------------------------------------------------------------
+
+@lru_cache(maxsize=256)
+def _table_template(table: str, shape: FilterShape, has_after_id: bool, has_offset: bool, columns: Tuple[str, ...]) -> str:
+    # BigQuery is columnar: only the projected columns are scanned and billed
+    select_sql = "*" if columns == ("*",) else ", ".join(f"`{column}`" for column in columns)
+    query_sql = f"SELECT {select_sql} FROM {table} {where_template(shape)}"
+    # Keyset pagination: seek past the previous page instead of scanning and discarding it
+    if has_after_id:
+        query_sql += " AND `id` > @after_id"
+    # BQ doesn't gurantee a stable output order unless ORDER BY is given
+    query_sql += " ORDER BY `id` LIMIT @window_limit"
+    if has_offset:
+        query_sql += " OFFSET @window_offset"
+    return query_sql + ";"
+
+
+@span("compile")
+def compile_table_query(
+    filters: FilterBody, offset: Optional[int], limit: Optional[int], after_id: Optional[int], columns: Tuple[str, ...] = ("*",)
+) -> CompiledQuery:
+    canonical_filters = filters.canonical()
+    parameters = filter_parameters(canonical_filters)
+    if after_id is not None:
+        parameters.append(bigquery.ScalarQueryParameter("after_id", "INT64", after_id))
+    parameters.append(bigquery.ScalarQueryParameter("window_limit", "INT64", limit))
+    if offset is not None:
+        parameters.append(bigquery.ScalarQueryParameter("window_offset", "INT64", offset))
+
+    query_sql = _table_template(table_ref(), filter_shape(canonical_filters), after_id is not None, offset is not None, columns)
+    return CompiledQuery(query_sql, tuple(parameters))
+
+
+@lru_cache(maxsize=256)
+def _facet_template(table: str, shape: FilterShape, facets: Tuple[str, ...]) -> str:
+    columns = ", ".join(f"`{facet}`" for facet in facets)
+    groupings = ", ".join(f"GROUPING(`{facet}`) AS `{facet}_grouping`" for facet in facets)
+    grouping_sets = ", ".join(f"(`{facet}`)" for facet in facets)
+    return (
+        f"SELECT {columns}, {groupings}, COUNT(*) AS count FROM {table} {where_template(shape)}"
+        f" GROUP BY GROUPING SETS ({grouping_sets}, ());"
+    )
+
+
+@span("compile")
+def compile_facet_query(filters: FilterBody, facets: Tuple[str, ...]) -> CompiledQuery:
+    canonical_filters = filters.canonical()
+    query_sql = _facet_template(table_ref(), filter_shape(canonical_filters), facets)
+    return CompiledQuery(query_sql, tuple(filter_parameters(canonical_filters)))
+
+
+@lru_cache(maxsize=256)
+def _count_template(table: str, shape: FilterShape, attribute: str, by: Optional[str]) -> str:
+    select_sql, from_sql = group_by_column(attribute, "a_value")
+    select_sql += f" AS `{attribute}`"
+    group_sql = "1"
+    if by is not None:
+        by_select_sql, by_from_sql = group_by_column(by, "b_value")
+        select_sql += f", {by_select_sql} AS `{by}`"
+        from_sql += by_from_sql
+        group_sql += ", 2"
+    # an unnested member appears once per element; count members, not elements
+    count_sql = "COUNT(DISTINCT `id`)" if from_sql else "COUNT(*)"
+    return f"SELECT {select_sql}, {count_sql} AS count FROM {table}{from_sql} {where_template(shape)} GROUP BY {group_sql};"
+
+
+@span("compile")
+def compile_count_query(filters: FilterBody, attribute: str, by: Optional[str] = None) -> CompiledQuery:
+    canonical_filters = filters.canonical()
+    query_sql = _count_template(table_ref(), filter_shape(canonical_filters), attribute, by)
+    return CompiledQuery(query_sql, tuple(filter_parameters(canonical_filters)))
+
+# ---------------------------------------------------------------
+
+def template_cache_stats() -> Dict[str, Dict[str, int]]:
+    """Hits and size of each memoized template cache."""
+    return {
+        template.__name__.strip("_"): {"hits": info.hits, "misses": info.misses, "size": info.currsize}
+        for template, info in (
+            (template, template.cache_info())
+            for template in (where_template, _table_template, _facet_template, _count_template)
+        )
+    }
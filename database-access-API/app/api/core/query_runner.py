@@ -0,0 +1,148 @@
+"""Run blocking BigQuery jobs off the event loop.
+
+The google-cloud-bigquery client is synchronous: `client.query(...).result()` blocks until the
+job finishes and every page of rows has been fetched. Calling it inline from an `async def` route
+stalls every other request on the uvicorn worker, so all jobs go through `run_query`, which runs
+them on a bounded thread pool with a per-query timeout.
+"""
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Dict, List, Optional, Protocol
+
+from app.api.core.config import settings
+from app.api.core.metrics import bigquery_rows_returned, record_bigquery_job
+
+
+class QueryClient(Protocol):
+    """What the app needs from a client: `bigquery.Client`, or `LocalBigQueryClient` in local mode."""
+
+    def query(self, query_sql: str, job_config=None) -> Any: ...
+
+    def get_table(self, table_id: str) -> Any: ...
+
+
+@dataclass
+class QueryResult:
+    rows: List[Dict[str, Any]]
+    schema: List[str]
+
+
+_executor: ThreadPoolExecutor = None
+_semaphore: asyncio.Semaphore = None
+_timeout: float = None
+
+
+def configure(max_concurrent_queries: int, timeout_seconds: float):
+    """(Re)build the worker pool. Queries beyond `max_concurrent_queries` wait their turn on the event loop."""
+    global _executor, _semaphore, _timeout
+    if _executor is not None:
+        _executor.shutdown(wait=False)
+    _executor = ThreadPoolExecutor(max_workers=max_concurrent_queries, thread_name_prefix="bigquery")
+    _semaphore = asyncio.Semaphore(max_concurrent_queries)
+    _timeout = timeout_seconds
+
+configure(settings.BQ_MAX_CONCURRENT_QUERIES, settings.BQ_QUERY_TIMEOUT_SECONDS)
+
+
+def _wait(client, query_sql: str, job_config, timeout: float, page_size: Optional[int] = None):
+    started = time.perf_counter()
+    job = client.query(query_sql, job_config=job_config)
+    try:
+        result = job.result(timeout=timeout, page_size=page_size)
+    except TimeoutError:
+        record_bigquery_job(job, time.perf_counter() - started, "timeout")
+        # don't leave an abandoned job burning slots
+        job.cancel()
+        raise
+    except Exception:
+        record_bigquery_job(job, time.perf_counter() - started, "error")
+        raise
+    record_bigquery_job(job, time.perf_counter() - started, "ok")
+    return result
+
+
+def _execute(client, query_sql: str, job_config, timeout: float) -> QueryResult:
+    # runs on a worker thread: both the job wait and the row page fetches block
+    result = _wait(client, query_sql, job_config, timeout)
+    rows = [dict(row) for row in result]
+    bigquery_rows_returned.inc(len(rows))
+    return QueryResult(rows=rows, schema=[field.name for field in result.schema])
+
+
+def _execute_arrow(client, query_sql: str, job_config, timeout: float):
+    # the client assembles the Arrow table itself, via the BigQuery Storage API when it is installed
+    table = _wait(client, query_sql, job_config, timeout).to_arrow()
+    bigquery_rows_returned.inc(table.num_rows)
+    return table
+
+
+def _next_page(pages) -> Optional[List[Dict[str, Any]]]:
+    page = next(pages, None)
+    if page is None:
+        return None
+    rows = [dict(row) for row in page]
+    bigquery_rows_returned.inc(len(rows))
+    return rows
+
+
+async def run_query(client, query_sql: str, job_config=None, timeout: Optional[float] = None) -> QueryResult:
+    """Execute `query_sql` on a worker thread and return its materialized rows.
+
+    Raises TimeoutError if the job takes longer than `timeout` (default BQ_QUERY_TIMEOUT_SECONDS).
+    """
+    timeout = _timeout if timeout is None else timeout
+    loop = asyncio.get_running_loop()
+    async with _semaphore:
+        # the worker also enforces the timeout; this is the backstop if the client ignores it
+        return await asyncio.wait_for(
+            loop.run_in_executor(_executor, _execute, client, query_sql, job_config, timeout),
+            timeout=timeout + 1,
+        )
+
+
+async def run_query_arrow(client, query_sql: str, job_config=None, timeout: Optional[float] = None):
+    """Like `run_query`, but returns the rows as a `pyarrow.Table` instead of dicts."""
+    timeout = _timeout if timeout is None else timeout
+    loop = asyncio.get_running_loop()
+    async with _semaphore:
+        return await asyncio.wait_for(
+            loop.run_in_executor(_executor, _execute_arrow, client, query_sql, job_config, timeout),
+            timeout=timeout + 1,
+        )
+
+
+async def run_blocking(fn, *args, timeout: Optional[float] = None):
+    """Run a short blocking client call that isn't a query job (e.g. a table metadata lookup) on the pool."""
+    timeout = _timeout if timeout is None else timeout
+    loop = asyncio.get_running_loop()
+    return await asyncio.wait_for(loop.run_in_executor(_executor, fn, *args), timeout=timeout)
+
+
+async def start_query(client, query_sql: str, job_config=None, page_size: int = 1000, timeout: Optional[float] = None):
+    """Wait for the job to finish without fetching its rows; pass the result to `iter_pages`.
+
+    Job errors and timeouts surface here, before a streaming response has started.
+    """
+    timeout = _timeout if timeout is None else timeout
+    loop = asyncio.get_running_loop()
+    async with _semaphore:
+        return await asyncio.wait_for(
+            loop.run_in_executor(_executor, _wait, client, query_sql, job_config, timeout, page_size),
+            timeout=timeout + 1,
+        )
+
+
+async def iter_pages(result) -> AsyncIterator[List[Dict[str, Any]]]:
+    """Yield the rows of a finished job one page at a time, fetching each page on a worker thread.
+
+    Only one page is held in memory at a time, however many rows the job returned.
+    """
+    loop = asyncio.get_running_loop()
+    pages = iter(result.pages)
+    while True:
+        page = await loop.run_in_executor(_executor, _next_page, pages)
+        if page is None:
+            return
+        yield page
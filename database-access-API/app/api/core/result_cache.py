@@ -0,0 +1,89 @@
+"""In-process cache for query responses.
+
+The members table only changes when the cleaning pipeline re-uploads it, while dashboards re-issue
+the same handful of filter combinations constantly. Responses are cached by a canonical request key
+under a memory budget, evicting least-recently-used entries first and expiring entries after a TTL.
+Call `invalidate()` (or POST /chingu_members/cache/invalidate) after a re-upload.
+"""
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+from app.api.core.config import settings
+from app.api.core.serialization import dumps
+
+
+def estimate_size(value: Any) -> int:
+    """Approximate memory cost of a response: the length of its JSON encoding."""
+    return len(dumps(value))
+
+
+class ResultCache:
+    def __init__(self, max_bytes: int, ttl_seconds: float):
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        # key -> (expires_at, size, value); ordered from least to most recently used
+        self._entries: "OrderedDict[Hashable, Tuple[float, int, Any]]" = OrderedDict()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        expires_at, size, value = entry
+        if expires_at <= time.monotonic():
+            self._discard(key)
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key: Hashable, value: Any):
+        size = estimate_size(value)
+        # a single response larger than the whole budget is never worth evicting everything for
+        if size > self.max_bytes:
+            return
+
+        if key in self._entries:
+            self._discard(key)
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, size, value)
+        self._bytes += size
+
+        while self._bytes > self.max_bytes:
+            oldest_key = next(iter(self._entries))
+            self._discard(oldest_key)
+            self.evictions += 1
+
+    def invalidate(self) -> int:
+        """Drop every entry and return how many were dropped."""
+        dropped = len(self._entries)
+        self._entries.clear()
+        self._bytes = 0
+        return dropped
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "max_bytes": self.max_bytes,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+        }
+
+    def _discard(self, key: Hashable):
+        _, size, _ = self._entries.pop(key)
+        self._bytes -= size
+
+
+result_cache = ResultCache(settings.RESULT_CACHE_MAX_BYTES, settings.RESULT_CACHE_TTL_SECONDS)
@@ -0,0 +1,41 @@
+"""Fast JSON encoding for query results.
+
+Query results are trusted internal data: dicts of str/int/float/None, lists for the `AttributeLists`
+columns and datetimes for `Timestamp`. Running a few hundred of them through `response_model`
+validation and FastAPI's `jsonable_encoder` costs more CPU than sending the page, so the data
+endpoints encode them straight to bytes with orjson, which handles datetimes and numpy scalars
+natively. The `response_model`s stay on the routes and still document the response shape.
+"""
+from decimal import Decimal
+from typing import Any, Dict, Iterable, Optional
+
+import orjson
+from fastapi import Response
+
+from app.api.core.metrics import span
+
+# OPT_UTC_Z writes UTC timestamps as `...Z`, the way pydantic did before
+_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_UTC_Z
+
+
+def _default(value: Any) -> Any:
+    # BigQuery NUMERIC/BIGNUMERIC columns come back as Decimal
+    if isinstance(value, Decimal):
+        return str(value)
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+
+def dumps(value: Any) -> bytes:
+    return orjson.dumps(value, default=_default, option=_OPTIONS)
+
+
+def dumps_lines(rows: Iterable[Dict[str, Any]]) -> bytes:
+    """Newline-delimited JSON, one row per line."""
+    return b"".join(orjson.dumps(row, default=_default, option=_OPTIONS | orjson.OPT_APPEND_NEWLINE) for row in rows)
+
+
+def json_response(content: Any, headers: Optional[Dict[str, str]] = None) -> Response:
+    """A JSON response encoded directly, skipping `response_model` validation."""
+    with span("serialize"):
+        body = dumps(content)
+    return Response(content=body, media_type="application/json", headers=headers)
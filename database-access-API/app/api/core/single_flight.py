@@ -0,0 +1,51 @@
+"""Coalesce identical concurrent queries into one in-flight job.
+
+On a deploy or traffic spike many browsers load the landing page at once and request the same
+handful of queries before any of them has landed in the result cache. Instead of each request
+launching its own BigQuery job, the first one (the leader) runs it and every identical request that
+arrives while it is running awaits the same result.
+"""
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+
+class SingleFlight:
+    def __init__(self):
+        self._in_flight: Dict[Hashable, asyncio.Future] = {}
+        self.leaders = 0
+        self.coalesced = 0
+
+    async def do(self, key: Hashable, make_call: Callable[[], Awaitable[Any]]) -> Any:
+        """Await `make_call()`, or the already running call for `key` if there is one.
+
+        Errors are shared too: every waiter of a failed call gets its exception.
+        """
+        future = self._in_flight.get(key)
+        if future is not None:
+            self.coalesced += 1
+        else:
+            self.leaders += 1
+            future = asyncio.ensure_future(make_call())
+            self._in_flight[key] = future
+            future.add_done_callback(lambda done: self._finish(key, done))
+        # a disconnecting client cancels its own wait, not the job the others are waiting on
+        return await asyncio.shield(future)
+
+    def _finish(self, key: Hashable, future: asyncio.Future):
+        if self._in_flight.get(key) is future:
+            del self._in_flight[key]
+        # mark the error as retrieved even if every waiter went away
+        if not future.cancelled():
+            future.exception()
+
+    def stats(self) -> Dict[str, Any]:
+        requests = self.leaders + self.coalesced
+        return {
+            "in_flight": len(self._in_flight),
+            "leaders": self.leaders,
+            "coalesced": self.coalesced,
+            "coalesced_ratio": self.coalesced / requests if requests else 0.0,
+        }
+
+
+single_flight = SingleFlight()
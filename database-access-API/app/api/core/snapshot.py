@@ -0,0 +1,260 @@
+"""Columnar in-memory snapshot of the Chingu members table.
+
+The cleaned table is a few thousand rows, so with `QUERY_BACKEND=snapshot` the service loads it once
+(from the cleaning pipeline's `chingu_members_cleaned.json` and/or a `SELECT *` from BigQuery) and
+answers UNIQUE, COUNT and filtered queries from memory. BigQuery stays the source of truth; the
+snapshot is refreshed from it at startup and on demand.
+
+Layout:
+- every `CategoricalAttribute` is dictionary-encoded: sorted distinct values + an int32 code per row (-1 = NULL)
+- every `AttributeLists` column is offset-encoded: element codes for row i are `codes[offsets[i]:offsets[i + 1]]`
+- the remaining columns (id, Timestamp, free text) are kept as plain per-row values for output
+
+Rows are stored sorted by `id`, matching the `ORDER BY id` of the SQL path. Filters and counts
+are evaluated on a `BitmapIndex` built over the encoded columns.
+"""
+import hashlib
+import json
+from datetime import date, datetime
+from typing import Any, Dict, Iterator, List, Optional
+
+import numpy as np
+import pyarrow as pa
+
+from app.models import AttributeLists, CategoricalAttribute, FilterBody
+from app.api.core.bitmap_index import BitmapIndex
+from app.api.core.query_runner import QueryResult
+
+NULL_CODE = -1
+
+
+def _sort_key(value: Any):
+    # columns can mix ints and strings only across attributes, but keep sorting total regardless
+    return (isinstance(value, str), value)
+
+
+def _parse_timestamp(value: Any) -> Optional[datetime]:
+    if value is None or isinstance(value, datetime):
+        return value
+    return datetime.fromisoformat(value)
+
+
+class CategoricalColumn:
+    """Dictionary-encoded scalar column."""
+
+    def __init__(self, values: List[Any]):
+        self.dictionary: List[Any] = sorted({v for v in values if v is not None}, key=_sort_key)
+        self.lookup: Dict[Any, int] = {value: code for code, value in enumerate(self.dictionary)}
+        self.codes = np.fromiter(
+            (NULL_CODE if v is None else self.lookup[v] for v in values), dtype=np.int32, count=len(values)
+        )
+        # indexing with NULL_CODE (-1) picks the trailing None
+        self._decode = self.dictionary + [None]
+
+    def values_at(self, rows: np.ndarray) -> List[Any]:
+        decode = self._decode
+        return [decode[code] for code in self.codes[rows].tolist()]
+
+    def to_arrow(self, rows: np.ndarray, dictionary: bool = False) -> pa.Array:
+        """The column at `rows` as Arrow; the codes are already dictionary indices."""
+        codes = self.codes[rows]
+        array = pa.DictionaryArray.from_arrays(pa.array(codes, mask=codes == NULL_CODE), pa.array(self.dictionary))
+        return array if dictionary else array.dictionary_decode()
+
+
+class ListColumn:
+    """Dictionary-encoded repeated column stored as flat element codes plus per-row offsets."""
+
+    def __init__(self, values: List[Optional[List[Any]]]):
+        lists = [[v for v in (row_values or []) if v is not None] for row_values in values]
+        self.row_count = len(lists)
+        self.dictionary: List[Any] = sorted({v for row_values in lists for v in row_values}, key=_sort_key)
+        self.lookup: Dict[Any, int] = {value: code for code, value in enumerate(self.dictionary)}
+
+        lengths = np.fromiter((len(row_values) for row_values in lists), dtype=np.int64, count=len(lists))
+        self.offsets = np.zeros(len(lists) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=self.offsets[1:])
+        self.codes = np.fromiter(
+            (self.lookup[v] for row_values in lists for v in row_values), dtype=np.int32, count=int(self.offsets[-1])
+        )
+        # owning row of every element
+        self.element_rows = np.repeat(np.arange(len(lists), dtype=np.int64), lengths)
+
+    def values_at(self, rows: np.ndarray) -> List[List[Any]]:
+        dictionary, codes, offsets = self.dictionary, self.codes, self.offsets
+        return [[dictionary[c] for c in codes[offsets[r]:offsets[r + 1]].tolist()] for r in rows.tolist()]
+
+    def to_arrow(self, rows: np.ndarray, dictionary: bool = False) -> pa.Array:
+        """The column at `rows` as an Arrow list array, gathering the element codes without decoding them."""
+        starts = self.offsets[rows]
+        lengths = self.offsets[rows + 1] - starts
+        offsets = np.zeros(len(rows) + 1, dtype=np.int32)
+        np.cumsum(lengths, out=offsets[1:])
+        # position of every selected element in the flat `codes` array
+        elements = np.arange(offsets[-1]) - np.repeat(offsets[:-1] - starts, lengths)
+        values = pa.DictionaryArray.from_arrays(pa.array(self.codes[elements]), pa.array(self.dictionary))
+        return pa.ListArray.from_arrays(pa.array(offsets), values if dictionary else values.dictionary_decode())
+
+
+class MemberSnapshot:
+    def __init__(self, rows: List[Dict[str, Any]], schema: Optional[List[str]] = None):
+        rows = sorted(rows, key=lambda row: row["id"])
+        self.schema: List[str] = schema or (list(rows[0]) if rows else [])
+        self.row_count = len(rows)
+        self.loaded_at = datetime.now().astimezone()
+        # content hash: changes exactly when the table does, whichever source the rows came from
+        self.version = hashlib.sha1(json.dumps(rows, sort_keys=True, default=str).encode()).hexdigest()
+
+        self.categoricals = {
+            attr.value: CategoricalColumn([row.get(attr.value) for row in rows]) for attr in CategoricalAttribute
+        }
+        self.lists = {
+            attr.value: ListColumn([row.get(attr.value) for row in rows]) for attr in AttributeLists
+        }
+
+        self.ids = np.fromiter((row["id"] for row in rows), dtype=np.int64, count=len(rows))
+        timestamps = [_parse_timestamp(row.get("Timestamp")) for row in rows]
+        self.dates = np.array(
+            [np.datetime64(ts.date()) if ts is not None else np.datetime64("NaT") for ts in timestamps],
+            dtype="datetime64[D]",
+        )
+        encoded = set(self.categoricals) | set(self.lists)
+        self.plain: Dict[str, List[Any]] = {
+            name: [row.get(name) for row in rows] for name in self.schema if name not in encoded
+        }
+        if "Timestamp" in self.plain:
+            self.plain["Timestamp"] = timestamps
+
+        self.index = BitmapIndex.build(self.categoricals, self.lists, self.row_count)
+
+    @classmethod
+    def from_ndjson(cls, path: str) -> "MemberSnapshot":
+        """Load the cleaning pipeline's newline-delimited output (`chingu_members_cleaned.json`)."""
+        with open(path) as f:
+            rows = [json.loads(line) for line in f if line.strip()]
+        return cls(rows)
+
+    # -----------------------------------------------------------
+
+    def unique(self, attribute: str) -> List[Any]:
+        if attribute in self.lists:
+            return list(self.lists[attribute].dictionary)
+        column = self.categoricals[attribute]
+        has_null = bool((column.codes == NULL_CODE).any())
+        return list(column.dictionary) + ([None] if has_null else [])
+
+    def date_rows(self, start_date: Optional[date], end_date: Optional[date]) -> np.ndarray:
+        """Bitmap for `DATE(Timestamp) BETWEEN @start_date AND @end_date`; rows without a Timestamp never match."""
+        if start_date is None or end_date is None:
+            return self.index.all_rows
+        return self.index.from_mask((self.dates >= np.datetime64(start_date)) & (self.dates <= np.datetime64(end_date)))
+
+    def filter_rows(self, filters: FilterBody) -> np.ndarray:
+        """Bitmap of the rows matching `filters`."""
+        return self.index.resolve(filters)
+
+    def count(self, attribute: str, rows: Optional[np.ndarray] = None) -> QueryResult:
+        """`SELECT attribute, COUNT(*) AS count ... GROUP BY attribute` over the `rows` bitmap.
+
+        List attributes count members per element value, like `COUNT(DISTINCT id)` over the UNNEST.
+        """
+        counts = self.index.group_counts(attribute, self.index.all_rows if rows is None else rows)
+        return QueryResult(
+            rows=[{attribute: value, "count": count} for value, count in counts.items()],
+            schema=[attribute, "count"],
+        )
+
+    def cross_count(self, attribute: str, by: str, rows: np.ndarray) -> QueryResult:
+        """Members per (`attribute`, `by`) value pair over the `rows` bitmap."""
+        counts = self.index.cross_counts(attribute, by, rows)
+        return QueryResult(
+            rows=[{attribute: value, by: by_value, "count": count} for (value, by_value), count in counts.items()],
+            schema=[attribute, by, "count"],
+        )
+
+    def facet_counts(self, attributes: List[str], rows: np.ndarray) -> Dict[str, Any]:
+        """Total plus per-value counts for every attribute in `attributes`, from one resolved bitmap."""
+        facets = {}
+        for attribute in attributes:
+            counts = self.index.group_counts(attribute, rows)
+            facets[attribute] = [{attribute: value, "count": count} for value, count in counts.items()]
+        return {"total_count": self.index.popcount(rows), "response": facets}
+
+    def _select(
+        self, rows: np.ndarray, offset: Optional[int], limit: Optional[int], after_id: Optional[int]
+    ) -> np.ndarray:
+        selected = self.index.row_numbers(rows)
+        if after_id is not None:
+            # rows are sorted by id, so the cursor is a binary search
+            first_row = np.searchsorted(self.ids, after_id, side="right")
+            selected = selected[np.searchsorted(selected, first_row):]
+        start = offset or 0
+        stop = None if limit is None else start + limit
+        return selected[start:stop]
+
+    def table(
+        self,
+        rows: np.ndarray,
+        offset: Optional[int] = None,
+        limit: Optional[int] = None,
+        after_id: Optional[int] = None,
+        columns: Optional[List[str]] = None,
+    ) -> QueryResult:
+        """`SELECT <columns> ... [AND id > @after_id] ORDER BY id LIMIT @limit OFFSET @offset` over the `rows` bitmap."""
+        columns = self.project(columns)
+        return QueryResult(rows=self.rows_at(self._select(rows, offset, limit, after_id), columns), schema=columns)
+
+    def iter_table(
+        self,
+        rows: np.ndarray,
+        offset: Optional[int] = None,
+        limit: Optional[int] = None,
+        after_id: Optional[int] = None,
+        chunk_size: int = 1000,
+        columns: Optional[List[str]] = None,
+    ) -> Iterator[List[Dict[str, Any]]]:
+        """Same rows as `table`, materialized `chunk_size` rows at a time."""
+        columns = self.project(columns)
+        selected = self._select(rows, offset, limit, after_id)
+        for start in range(0, len(selected), chunk_size):
+            yield self.rows_at(selected[start:start + chunk_size], columns)
+
+    def arrow_table(
+        self,
+        rows: np.ndarray,
+        offset: Optional[int] = None,
+        limit: Optional[int] = None,
+        after_id: Optional[int] = None,
+        columns: Optional[List[str]] = None,
+        dictionary: bool = False,
+    ) -> pa.Table:
+        """Same rows as `table`, built column by column as Arrow; categoricals stay dictionary-encoded if `dictionary`."""
+        selected = self._select(rows, offset, limit, after_id)
+        arrays = {}
+        for name in self.project(columns):
+            if name in self.categoricals:
+                arrays[name] = self.categoricals[name].to_arrow(selected, dictionary)
+            elif name in self.lists:
+                arrays[name] = self.lists[name].to_arrow(selected, dictionary)
+            else:
+                values = self.plain[name]
+                arrays[name] = pa.array([values[r] for r in selected.tolist()])
+        return pa.table(arrays)
+
+    def project(self, columns: Optional[List[str]]) -> List[str]:
+        """The requested columns this snapshot has, or its whole schema for None / ["*"]."""
+        if columns is None or "*" in columns:
+            return list(self.schema)
+        return [name for name in columns if name in self.schema]
+
+    def rows_at(self, rows: np.ndarray, names: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        columns = {}
+        for name in self.schema if names is None else names:
+            if name in self.categoricals:
+                columns[name] = self.categoricals[name].values_at(rows)
+            elif name in self.lists:
+                columns[name] = self.lists[name].values_at(rows)
+            else:
+                values = self.plain[name]
+                columns[name] = [values[r] for r in rows.tolist()]
+        return [dict(zip(columns, row_values)) for row_values in zip(*columns.values())]
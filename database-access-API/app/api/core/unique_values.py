@@ -0,0 +1,89 @@
+"""Cache of the distinct values of every `Attribute`, used to validate filters.
+
+Filter values are checked against this cache before they reach SQL, so it has to be ready for the
+first filtered request. It starts from an on-disk copy (UNIQUE_VALUE_CACHE_PATH) so startup never
+waits on BigQuery, and a background task refreshes it and writes the copy back.
+
+`fingerprint` hashes the cached values, so the UNIQUE endpoint's ETag changes when a refresh brings
+new values, not only when the table version does; it is the same on every instance.
+"""
+import hashlib
+import json
+import os
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, Optional, Set
+
+
+class UniqueValueCache:
+    def __init__(self):
+        self.values: Dict[str, Set[Any]] = {}
+        self.fingerprint: Optional[str] = None
+        self.refreshed_at: Optional[datetime] = None
+        self.source: Optional[str] = None
+        self.last_error: Optional[str] = None
+        self.last_error_at: Optional[datetime] = None
+
+    # validate_FilterBody treats the cache like the dict it used to be
+    def __bool__(self) -> bool:
+        return bool(self.values)
+
+    def get(self, attribute: str, default: Optional[Set[Any]] = None) -> Optional[Set[Any]]:
+        return self.values.get(attribute, default)
+
+    def replace(self, values: Dict[str, Iterable[Any]], source: str, refreshed_at: Optional[datetime] = None):
+        self.values = {attribute: set(attribute_values) for attribute, attribute_values in values.items()}
+        # repr sorts str, int and None together, and is stable across processes
+        canonical = sorted((attribute, sorted(map(repr, attribute_values))) for attribute, attribute_values in self.values.items())
+        self.fingerprint = hashlib.sha1(repr(canonical).encode()).hexdigest()
+        self.refreshed_at = refreshed_at or datetime.now(timezone.utc)
+        self.source = source
+        self.last_error = None
+        self.last_error_at = None
+
+    def record_error(self, error: Exception):
+        self.last_error = f"{type(error).__name__}: {error}"
+        self.last_error_at = datetime.now(timezone.utc)
+
+    def age_seconds(self) -> Optional[float]:
+        if self.refreshed_at is None:
+            return None
+        return (datetime.now(timezone.utc) - self.refreshed_at).total_seconds()
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "ready": bool(self.values),
+            "source": self.source,
+            "refreshed_at": self.refreshed_at,
+            "age_seconds": self.age_seconds(),
+            "last_error": self.last_error,
+            "last_error_at": self.last_error_at,
+        }
+
+    # -----------------------------------------------------------
+
+    def load(self, path: str) -> bool:
+        """Fill the cache from a copy written by `save`; returns False if there is no usable copy."""
+        if not os.path.exists(path):
+            return False
+        try:
+            with open(path) as f:
+                saved = json.load(f)
+            self.replace(saved["values"], source=path, refreshed_at=datetime.fromisoformat(saved["refreshed_at"]))
+            return True
+        except (OSError, ValueError, KeyError) as e:
+            self.record_error(e)
+            return False
+
+    def save(self, path: str):
+        saved = {
+            "refreshed_at": self.refreshed_at.isoformat(),
+            "values": {attribute: list(values) for attribute, values in self.values.items()},
+        }
+        # write then rename so a crash mid-write never leaves a truncated copy behind
+        temporary_path = f"{path}.tmp"
+        with open(temporary_path, "w") as f:
+            json.dump(saved, f)
+        os.replace(temporary_path, path)
+
+
+unique_value_cache = UniqueValueCache()
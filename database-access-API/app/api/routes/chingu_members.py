@@ -1,16 +1,34 @@
 from datetime import date
-from typing import Any, List, Optional, Dict
+from typing import Any, AsyncIterator, Callable, Hashable, List, Literal, Optional, Dict, Tuple
 
-from asyncio import gather
-from fastapi import APIRouter, Body, HTTPException, Query
+import asyncio
+import hmac
+from fastapi import APIRouter, Body, Depends, Header, HTTPException, Query, Response
+from fastapi.responses import StreamingResponse
 
-from app.models import CategoricalAttribute, AttributeLists, Attribute, FilterBody, FilteredTableResponse, CountResponse
+from app.models import CategoricalAttribute, AttributeLists, Attribute, FilterBody, FilteredTableResponse, CountResponse, FacetCountResponse, CrossTabResponse, MemberField
+from app.api.core.columnar import ARROW_STREAM_MEDIA_TYPE, PARQUET_MEDIA_TYPE, dictionary_encode, to_arrow_ipc, to_parquet
 from app.api.core.config import settings
+from app.api.core.cost_guard import DOWNGRADED_HEADER, ESTIMATE_HEADER, bytes_billed_limit_exceeded, capped_job_config, cost_estimates, dry_run_bytes, dry_run_config, guard_decisions, over_budget, required_bytes
+from app.api.core.dataset_version import dataset_version, etag_matches, make_etag
+from app.api.core.metrics import background_errors, registry, span
+from app.api.core.query_compiler import CompiledQuery, compile_count_query, compile_facet_query, compile_table_query, normalize_fields, template_cache_stats
+from app.api.core.local_bigquery import LocalBigQueryClient
+from app.api.core.query_runner import QueryClient, QueryResult, iter_pages, run_blocking, run_query, run_query_arrow, start_query
+from app.api.core.result_cache import result_cache
+from app.api.core.single_flight import single_flight
+from app.api.core.serialization import dumps_lines, json_response
+from app.api.core.snapshot import MemberSnapshot
+from app.api.core.unique_values import unique_value_cache
 
 from google.cloud import bigquery
 from google.cloud.exceptions import GoogleCloudError
 
-bigquery_client: bigquery.Client = None
+# bigquery.Client, or the embedded stand-in when settings.QUERY_BACKEND == "local"
+bigquery_client: QueryClient = None
+
+# in-memory copy of the table, only used when settings.QUERY_BACKEND == "snapshot"
+member_snapshot: Optional[MemberSnapshot] = None
 
 router = APIRouter(prefix="/chingu_members", tags=["chingu"])
 
@@ -25,7 +43,18 @@ async def get_categorical_columns() -> List[str]:
 
 # ---------------------------------------------------------------
 
+@span("validate")
 def validate_FilterBody(filters: FilterBody):
+    # snapshot mode: membership checks against the bitmap index, which knows every (attribute, value)
+    if member_snapshot is not None:
+        index = member_snapshot.index
+        for kind, predicate_map in (("include", filters.include), ("exclude", filters.exclude)):
+            for attr_enum, attributes in predicate_map.items():
+                invalid_values = {value for value in attributes if not index.has_value(attr_enum.value, value)}
+                if invalid_values:
+                    raise HTTPException(status_code=400, detail=f"Invalid {kind} values for {attr_enum.value}: {invalid_values}")
+        return
+
     # Fast fail if cache is empty (e.g., BigQuery unreachable at startup)
     if not unique_value_cache:
         raise HTTPException(status_code=502, detail="Filter cache unavailable; service failed to warm with BigQuery")
@@ -41,56 +70,311 @@ def validate_FilterBody(filters: FilterBody):
             raise HTTPException(status_code=400, detail=f"Invalid exclude values for {attr_enum.value}: {invalid_values}")
 
 
+def distinct_query(chingu_attribute: Attribute) -> str:
+    if chingu_attribute.name in AttributeLists.__members__:
+        return f"""
+            SELECT DISTINCT v AS value
+            FROM `{settings.GCP_PROJECT_ID}.{settings.DATASET}.{settings.TABLE}`,
+            UNNEST(`{chingu_attribute.value}`) AS v
+        """
+    return f"""
+        SELECT DISTINCT `{chingu_attribute.value}` AS value
+        FROM `{settings.GCP_PROJECT_ID}.{settings.DATASET}.{settings.TABLE}`
+    """
 
-int_attributes = {"Solo_Project_Tier", "GMT_Offset", "Voyage_Signup_ids"}
+def combined_distinct_query() -> str:
+    """One job, one result row: the distinct values of every Attribute as an array column each.
 
-unique_value_cache: Dict[str, set[str | int]] = {}
+    ARRAY_AGG can't hold NULLs, so each scalar attribute also gets a `<attribute>_has_null` flag.
+    """
+    table = f"`{settings.GCP_PROJECT_ID}.{settings.DATASET}.{settings.TABLE}`"
+    columns = []
+    for attr in Attribute:
+        if attr.name in AttributeLists.__members__:
+            columns.append(f"(SELECT ARRAY_AGG(DISTINCT v) FROM {table}, UNNEST(`{attr.value}`) AS v) AS `{attr.value}`")
+        else:
+            columns.append(f"ARRAY_AGG(DISTINCT `{attr.value}` IGNORE NULLS) AS `{attr.value}`")
+            columns.append(f"LOGICAL_OR(`{attr.value}` IS NULL) AS `{attr.value}_has_null`")
+    return "SELECT\n    " + ",\n    ".join(columns) + f"\nFROM {table}"
+
+def parse_combined_distinct(row: Dict[str, Any]) -> Dict[str, List[str | int | None]]:
+    values: Dict[str, List[str | int | None]] = {}
+    for attr in Attribute:
+        # ARRAY_AGG over zero rows is NULL
+        values[attr.value] = list(row[attr.value] or [])
+        if row.get(f"{attr.value}_has_null"):
+            values[attr.value].append(None)
+    return values
+
+def _null_last(value: Any):
+    return (value is None, isinstance(value, str), "" if value is None else value)
 
 @router.get("/{chingu_attribute}/UNIQUE", response_model=List[str | int | None])
-async def get_unique_values(chingu_attribute: Attribute) -> List[str | int]:
-    """Return all unique values in {chingu_attribute}."""
-    try:
-        if chingu_attribute.name in AttributeLists.__members__:
-            query = f"""
-                SELECT DISTINCT v AS value
-                FROM `{settings.GCP_PROJECT_ID}.{settings.DATASET}.{settings.TABLE}`,
-                UNNEST(`{chingu_attribute.value}`) AS v
-            """
-        else:
-            query = f"""
-                SELECT DISTINCT `{chingu_attribute.value}` AS value
-                FROM `{settings.GCP_PROJECT_ID}.{settings.DATASET}.{settings.TABLE}`
-            """
+async def get_unique_values(
+    chingu_attribute: Attribute,
+    response: Response,
+    if_none_match: Optional[str] = Header(None)
+) -> List[str | int]:
+    """Return all unique values in {chingu_attribute}.
+
+    Served from the distinct-value cache, which one combined BigQuery job keeps fresh in the
+    background; only queries BigQuery directly while that cache is still empty.
+    """
+    # a re-upload noticed here starts a refresh of the cache
+    await current_dataset_version()
+    # the body and the ETag come from the same refresh: it can land while the version is checked
+    cached_values = unique_value_cache.values
+    cache_headers = await conditional_headers(("UNIQUE", chingu_attribute.value, unique_value_cache.fingerprint))
+    if etag_matches(cache_headers.get("ETag"), if_none_match):
+        return Response(status_code=304, headers=cache_headers)
+    response.headers.update(cache_headers)
+
+    snapshot = active_snapshot()
+    if snapshot is not None:
+        return snapshot.unique(chingu_attribute.value)
+
+    if cached_values:
+        return sorted(cached_values.get(chingu_attribute.value, set()), key=_null_last)
 
-        query_result = bigquery_client.query(query).result()
-        unique_values = [row["value"] for row in query_result]
+    try:
+        with span("execute"):
+            query_result = await run_shared_query(distinct_query(chingu_attribute))
+        unique_values = [row["value"] for row in query_result.rows]
 
         return unique_values
     except GoogleCloudError as e:
-        raise HTTPException(status_code=502, detail=f"BigQuery error: {e}")
+        raise bigquery_error(e)
+    except TimeoutError:
+        raise HTTPException(status_code=504, detail="BigQuery query timed out")
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 # ---------------------------------------------------------------
 
+def make_bigquery_client() -> QueryClient:
+    import os
+    if settings.QUERY_BACKEND == "local":
+        local_client = LocalBigQueryClient.from_files(settings.SNAPSHOT_PATH, settings.LOCAL_SCHEMA_PATH)
+        print(f"[startup] Loaded {local_client.num_rows} members from {settings.SNAPSHOT_PATH} into the local query engine")
+        return local_client
+    # on Cloud Run the service account's default credentials are used instead of a key file
+    if settings.GOOGLE_APPLICATION_CREDENTIALS:
+        os.environ["GOOGLE_APPLICATION_CREDENTIALS"] = settings.GOOGLE_APPLICATION_CREDENTIALS
+    return bigquery.Client()
+
+def active_snapshot() -> Optional[MemberSnapshot]:
+    """The in-memory snapshot in snapshot mode, None when requests should run on BigQuery."""
+    if settings.QUERY_BACKEND != "snapshot":
+        return None
+    if member_snapshot is None:
+        raise HTTPException(status_code=503, detail="Member snapshot unavailable; failed to load from file and BigQuery")
+    return member_snapshot
+
+async def run_shared_query(query_sql: str, job_config=None, key: Optional[Hashable] = None) -> QueryResult:
+    """`run_query`, except identical concurrent requests attach to the one job already in flight."""
+    return await single_flight.do(query_sql if key is None else key, lambda: run_query(bigquery_client, query_sql, job_config))
+
+async def current_dataset_version() -> Optional[str]:
+    """Content hash of the snapshot, or the BigQuery table's last-modified time; None if unknown."""
+    snapshot = active_snapshot()
+    if snapshot is not None:
+        return snapshot.version
+    if dataset_version.is_stale():
+        table_id = f"{settings.GCP_PROJECT_ID}.{settings.DATASET}.{settings.TABLE}"
+        try:
+            table = await single_flight.do("dataset_version", lambda: run_blocking(bigquery_client.get_table, table_id))
+            if dataset_version.update(table.modified.isoformat()):
+                # the pipeline re-uploaded the table since the responses were cached
+                result_cache.invalidate()
+                cost_estimates.invalidate()
+                # new values must validate, and show up under UNIQUE, before the next scheduled refresh
+                start_unique_value_refresh()
+        except Exception as e:
+            print(f"[etag] Unable to read the table version: {e}")
+            background_errors.inc(task="dataset_version")
+            dataset_version.touch()
+    return dataset_version.value
+
+async def conditional_headers(request_key: Hashable) -> Dict[str, str]:
+    """ETag and Cache-Control for a response to `request_key`; empty when the table version is unknown."""
+    with span("etag"):
+        version = await current_dataset_version()
+    if version is None:
+        return {}
+    return {
+        "ETag": make_etag(version, request_key),
+        "Cache-Control": f"public, max-age={settings.HTTP_CACHE_MAX_AGE_SECONDS}",
+    }
+
+async def estimate_query_bytes(compiled_query: CompiledQuery) -> Optional[int]:
+    """Bytes the job would process, from one dry run per SQL template; None if the dry run failed."""
+    estimate = cost_estimates.get(compiled_query.sql)
+    if estimate is None:
+        job_config = dry_run_config(compiled_query.job_config())
+        try:
+            estimate = await single_flight.do(
+                ("dry_run", compiled_query.sql),
+                lambda: run_blocking(dry_run_bytes, bigquery_client, compiled_query.sql, job_config),
+            )
+        except Exception as e:
+            print(f"[cost guard] Unable to dry-run query: {e}")
+            return None
+        cost_estimates.put(compiled_query.sql, estimate)
+    return estimate
+
+async def guard_query_cost(
+        compiled_query: CompiledQuery,
+        downgrade: Optional[Callable[[], CompiledQuery]] = None,
+    ) -> Tuple[CompiledQuery, Dict[str, str]]:
+    """Apply BQ_COST_GUARD: the query to run, and headers reporting its estimated bytes.
+
+    Over BQ_MAXIMUM_BYTES_BILLED, "reject" answers 400; "downgrade" runs `downgrade()` instead when
+    that fits the budget. A failed dry run lets the query through: BigQuery still enforces
+    `maximum_bytes_billed` on the job itself.
+    """
+    if settings.BQ_COST_GUARD == "off":
+        return compiled_query, {}
+    with span("estimate"):
+        estimate = await estimate_query_bytes(compiled_query)
+    if estimate is None:
+        guard_decisions.inc(decision="unestimated")
+        return compiled_query, {}
+    if settings.BQ_COST_GUARD == "estimate" or not over_budget(estimate):
+        guard_decisions.inc(decision="allowed")
+        return compiled_query, {ESTIMATE_HEADER: str(estimate)}
+
+    if settings.BQ_COST_GUARD == "downgrade" and downgrade is not None:
+        downgraded_query = downgrade()
+        with span("estimate"):
+            downgraded_estimate = await estimate_query_bytes(downgraded_query)
+        if downgraded_estimate is not None and not over_budget(downgraded_estimate):
+            guard_decisions.inc(decision="downgraded")
+            return downgraded_query, {ESTIMATE_HEADER: str(downgraded_estimate), DOWNGRADED_HEADER: "fields"}
+
+    guard_decisions.inc(decision="rejected")
+    raise HTTPException(
+        status_code=400,
+        detail=f"Query would process {estimate} bytes, over the budget of {settings.BQ_MAXIMUM_BYTES_BILLED} bytes",
+        headers={ESTIMATE_HEADER: str(estimate)},
+    )
+
+def bigquery_error(error: GoogleCloudError) -> HTTPException:
+    """502 for a failed job; the cost guard's 400 when BigQuery refused to bill past maximum_bytes_billed.
+
+    That happens when a failed dry run let the query through, or with BQ_COST_GUARD=off.
+    """
+    if not bytes_billed_limit_exceeded(error):
+        return HTTPException(status_code=502, detail=f"BigQuery error: {error}")
+    estimate = required_bytes(error)
+    return HTTPException(
+        status_code=400,
+        detail=f"Query would process {estimate if estimate is not None else 'more'} bytes, over the budget of {settings.BQ_MAXIMUM_BYTES_BILLED} bytes",
+        headers={ESTIMATE_HEADER: str(estimate)} if estimate is not None else None,
+    )
+
+def install_snapshot(snapshot: MemberSnapshot, source: str):
+    global member_snapshot
+    member_snapshot = snapshot
+    unique_value_cache.replace({attr.value: snapshot.unique(attr.value) for attr in Attribute}, source=source)
+    # cached responses were computed from the previous copy of the table
+    result_cache.invalidate()
+
+async def refresh_snapshot_from_bigquery() -> MemberSnapshot:
+    """Pull the whole table into a new snapshot; concurrent refreshes share one job."""
+    query_sql = f"SELECT * FROM `{settings.GCP_PROJECT_ID}.{settings.DATASET}.{settings.TABLE}`"
+    # a full scan, so it is held to the same byte budget as request-driven jobs
+    job_config = capped_job_config()
+
+    async def pull() -> MemberSnapshot:
+        query_result = await run_query(bigquery_client, query_sql, job_config)
+        snapshot = MemberSnapshot(query_result.rows, query_result.schema)
+        install_snapshot(snapshot, source="bigquery")
+        return snapshot
+
+    return await single_flight.do("snapshot_refresh", pull)
+
+async def load_snapshot():
+    global bigquery_client
+    import os
+    if settings.SNAPSHOT_PATH and os.path.exists(settings.SNAPSHOT_PATH):
+        install_snapshot(MemberSnapshot.from_ndjson(settings.SNAPSHOT_PATH), source=settings.SNAPSHOT_PATH)
+        print(f"[startup] Loaded {member_snapshot.row_count} members from {settings.SNAPSHOT_PATH}")
+
+    if not settings.SNAPSHOT_REFRESH_FROM_BIGQUERY:
+        return
+    try:
+        bigquery_client = make_bigquery_client()
+        snapshot = await refresh_snapshot_from_bigquery()
+        print(f"[startup] Refreshed snapshot with {snapshot.row_count} members from BigQuery")
+    except Exception as e:
+        # keep serving the file snapshot, if there is one
+        print(f"[startup] Unable to refresh snapshot from BigQuery: {e}")
+        background_errors.inc(task="snapshot_refresh")
+        unique_value_cache.record_error(e)
+
+async def refresh_unique_values():
+    # the scheduled refresh and one started by a re-upload share a job when they overlap
+    query_result = await single_flight.do("unique_values", lambda: run_query(bigquery_client, combined_distinct_query()))
+    unique_value_cache.replace(parse_combined_distinct(query_result.rows[0]), source="bigquery")
+    if settings.UNIQUE_VALUE_CACHE_PATH and settings.UNIQUE_VALUE_CACHE_SAVE:
+        try:
+            unique_value_cache.save(settings.UNIQUE_VALUE_CACHE_PATH)
+        except OSError as e:
+            print(f"[unique values] Unable to save {settings.UNIQUE_VALUE_CACHE_PATH}: {e}")
+            background_errors.inc(task="unique_value_save")
+
+async def refresh_unique_values_periodically():
+    global bigquery_client
+    while True:
+        try:
+            if bigquery_client is None:
+                bigquery_client = make_bigquery_client()
+            await refresh_unique_values()
+            delay = settings.UNIQUE_VALUE_REFRESH_SECONDS
+        except Exception as e:
+            print(f"[unique values] Unable to refresh from BigQuery: {e}")
+            background_errors.inc(task="unique_value_refresh")
+            unique_value_cache.record_error(e)
+            delay = settings.UNIQUE_VALUE_RETRY_SECONDS
+        if delay <= 0:
+            return
+        await asyncio.sleep(delay)
+
+unique_value_refresh_task: Optional[asyncio.Task] = None
+# the one-off refresh started when the table version changes; kept so it isn't garbage collected
+unique_value_upload_refresh: Optional[asyncio.Task] = None
+
+async def refresh_unique_values_after_upload():
+    try:
+        await refresh_unique_values()
+    except Exception as e:
+        print(f"[unique values] Unable to refresh after a re-upload: {e}")
+        background_errors.inc(task="unique_value_refresh")
+        unique_value_cache.record_error(e)
+
+def start_unique_value_refresh():
+    global unique_value_upload_refresh
+    if unique_value_upload_refresh is None or unique_value_upload_refresh.done():
+        unique_value_upload_refresh = asyncio.create_task(refresh_unique_values_after_upload())
+
 # prefill a cache of acceptable attributes to speed up queries and avoid SQL injection for filters
 @router.on_event("startup")
 async def prefill_filter_cache():
-    global unique_value_cache, bigquery_client
-    try:
-        import os
-        os.environ["GOOGLE_APPLICATION_CREDENTIALS"] = settings.GOOGLE_APPLICATION_CREDENTIALS
-        bigquery_client = bigquery.Client()
-        buffer = {attr.value: get_unique_values(attr) for attr in Attribute}
-        results = await gather(*buffer.values())
-        unique_value_cache = {attr_val: set(res) for attr_val, res in zip(buffer.keys(), results)}
-    except GoogleCloudError as gce:
-        print(f"[startup] Unable to reach BigQuery {gce}")
-        unique_value_cache = {}
-    except Exception as e:
-        print(f"[startup] Unexpected error trying to reach BigQuery: {e}")
-        print()
-        unique_value_cache = {}
+    global unique_value_refresh_task
+    if settings.QUERY_BACKEND == "snapshot":
+        await load_snapshot()
+        return
+
+    # serve from the saved copy right away; BigQuery catches up in the background
+    if settings.UNIQUE_VALUE_CACHE_PATH and unique_value_cache.load(settings.UNIQUE_VALUE_CACHE_PATH):
+        print(f"[startup] Loaded unique values from {settings.UNIQUE_VALUE_CACHE_PATH}")
+    if unique_value_refresh_task is None or unique_value_refresh_task.done():
+        unique_value_refresh_task = asyncio.create_task(refresh_unique_values_periodically())
+
+@router.on_event("shutdown")
+async def stop_background_refresh():
+    if unique_value_refresh_task is not None:
+        unique_value_refresh_task.cancel()
 
 # ---------------------------------------------------------------
 
@@ -102,7 +386,8 @@ async def prefill_filter_cache():
 async def get_unique_count(
     chingu_attribute: CategoricalAttribute,
     start_date: Optional[date] = Query(None, description="Start date in YYYY-MM-DD format"),
-    end_date: Optional[date] = Query(None, description="End date in YYYY-MM-DD format")
+    end_date: Optional[date] = Query(None, description="End date in YYYY-MM-DD format"),
+    if_none_match: Optional[str] = Header(None)
 ) -> Dict[str, Any]:
     """Returns the number of rows for each unique value in {chingu_attribute}.
     """
@@ -111,12 +396,8 @@ async def get_unique_count(
         Count(*) as count
         FROM `{settings.GCP_PROJECT_ID}.{settings.DATASET}.{settings.TABLE}`
     """
-    job_config = bigquery.QueryJobConfig(
-        dry_run=False,
-        use_query_cache=True,
-    )
+    query_parameters = []
 
-    
     if start_date and end_date:
         if end_date < start_date:
             raise HTTPException(
@@ -124,32 +405,52 @@ async def get_unique_count(
                 detail="end_date must be greater than or equal to start_date"
             )
         query_sql += """ WHERE DATE(Timestamp) BETWEEN @start_date AND @end_date"""
-        job_config.query_parameters=[
+        query_parameters = [
             bigquery.ScalarQueryParameter("start_date", "DATE", start_date),
             bigquery.ScalarQueryParameter("end_date", "DATE", end_date),
         ]
     elif start_date or end_date:
         raise HTTPException(status_code=400, detail="start_date and end_date must be provided together")
 
+    cache_key = ("COUNT", chingu_attribute.value, start_date, end_date)
+    cache_headers = await conditional_headers(cache_key)
+    if etag_matches(cache_headers.get("ETag"), if_none_match):
+        return Response(status_code=304, headers=cache_headers)
+
+    cached_response = result_cache.get(cache_key)
+    if cached_response is not None:
+        return json_response(cached_response, cache_headers)
 
     query_sql += f""" GROUP BY `{chingu_attribute.value}`;"""
+    compiled_query = CompiledQuery(query_sql, tuple(query_parameters))
+    snapshot = active_snapshot()
+    if snapshot is None:
+        compiled_query, cost_headers = await guard_query_cost(compiled_query)
+        cache_headers.update(cost_headers)
     try:
-        result = bigquery_client.query(query_sql, job_config=job_config).result()
-        result_json: List[Dict[str, Any]] = [dict(row) for row in result]
+        with span("execute"):
+            if snapshot is not None:
+                result = snapshot.count(chingu_attribute.value, snapshot.date_rows(start_date, end_date))
+            else:
+                result = await run_shared_query(compiled_query.sql, compiled_query.job_config(), key=cache_key)
+        result_json: List[Dict[str, Any]] = result.rows
 
-        response = {
+        count_response = {
             "row_count": len(result_json),
-            "response_schema": [field.name for field in result.schema]
+            "response_schema": result.schema
         }
 
         if start_date and end_date:
-            response["day_count"] = (end_date - start_date).days + 1
+            count_response["day_count"] = (end_date - start_date).days + 1
 
 
-        response["response"] = result_json
-        return response
+        count_response["response"] = result_json
+        result_cache.put(cache_key, count_response)
+        return json_response(count_response, cache_headers)
     except GoogleCloudError as e:
-        raise HTTPException(status_code=502, detail=f"BigQuery error: {e}")
+        raise bigquery_error(e)
+    except TimeoutError:
+        raise HTTPException(status_code=504, detail="BigQuery query timed out")
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -160,6 +461,46 @@ example_filter = {
                     "exclude": {"Goal": ["GAIN EXPERIENCE"], "Source": ["LinkedIn","OTHER"]}
                 }
 
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+async def stream_ndjson(pages: AsyncIterator[List[Dict[str, Any]]]) -> AsyncIterator[bytes]:
+    """Encode each page of rows as newline-delimited JSON as soon as it arrives."""
+    async for page in pages:
+        with span("serialize"):
+            body = dumps_lines(page)
+        yield body
+
+async def _async_pages(pages) -> AsyncIterator[List[Dict[str, Any]]]:
+    for page in pages:
+        yield page
+
+OutputFormat = Literal["json", "ndjson", "arrow", "parquet"]
+
+def negotiate_output_format(output_format: Optional[str], stream: bool, accept: Optional[str]) -> str:
+    """An explicit `format=` wins, then `stream=true`, then the Accept header; JSON by default."""
+    if output_format is not None:
+        return output_format
+    accept = accept or ""
+    if stream or NDJSON_MEDIA_TYPE in accept:
+        return "ndjson"
+    if ARROW_STREAM_MEDIA_TYPE in accept:
+        return "arrow"
+    if PARQUET_MEDIA_TYPE in accept:
+        return "parquet"
+    return "json"
+
+def columnar_response(table, output_format: str, limit: Optional[int], headers: Dict[str, str]) -> Response:
+    headers = dict(headers)
+    # there is no JSON envelope to carry the cursor
+    if limit and table.num_rows == limit:
+        headers["X-Next-Cursor"] = str(table.column("id")[-1].as_py())
+    with span("serialize"):
+        body = to_parquet(table) if output_format == "parquet" else to_arrow_ipc(table)
+    if output_format == "parquet":
+        headers["Content-Disposition"] = 'attachment; filename="chingu_members.parquet"'
+        return Response(content=body, media_type=PARQUET_MEDIA_TYPE, headers=headers)
+    return Response(content=body, media_type=ARROW_STREAM_MEDIA_TYPE, headers=headers)
+
 @router.post(
         "/table/filtered",
         response_model=FilteredTableResponse,
@@ -176,83 +517,154 @@ example_filter = {
 async def query_filtered_table(
         filters: FilterBody = Body(),
         offset: Optional[int] = Query(None, description="Start the result from a particular row", ge=0),
-        limit: Optional[int] = Query(200, description="LIMIT the length of the output", ge=0)
+        limit: Optional[int] = Query(200, description="LIMIT the length of the output", ge=0),
+        after_id: Optional[int] = Query(None, description="Keyset cursor: pass the `next_cursor` of the previous page", ge=0),
+        fields: Optional[List[MemberField]] = Query(None, description="Columns to return; repeat for each one, `*` for all. Defaults to the MemberCard columns"),
+        stream: bool = Query(False, description="Stream rows as newline-delimited JSON (same as `Accept: application/x-ndjson`)"),
+        output_format: Optional[OutputFormat] = Query(None, alias="format", description="json, ndjson, arrow (Arrow IPC stream) or parquet; defaults to the Accept header"),
+        dictionary: bool = Query(False, description="arrow/parquet: keep categorical columns dictionary-encoded"),
+        accept: Optional[str] = Header(None),
+        if_none_match: Optional[str] = Header(None)
     ) -> Dict[str, Any]:
-    """Returns rows from the Chingu members table. Result is filtered by given attributes in the request body."""
-    
-    validate_FilterBody(filters)
+    """Returns rows from the Chingu members table. Result is filtered by given attributes in the request body.
 
-    query_sql = f"""SELECT *
-        FROM `{settings.GCP_PROJECT_ID}.{settings.DATASET}.{settings.TABLE}`
-        WHERE 1=1
+    Page with `offset`, or with `after_id` set to the previous response's `next_cursor`. The cursor
+    seeks straight to the next page (`WHERE id > @after_id`), so deep pages cost the same as the first.
+
+    For large exports, `?stream=true` or `Accept: application/x-ndjson` returns one JSON row per line,
+    written page by page as BigQuery returns them, so memory stays bounded whatever the `limit`.
+
+    Only the `fields` columns are selected (plus `id`, the cursor), so BigQuery scans and bills
+    just those columns.
+
+    Bulk consumers can ask for `format=arrow` (`Accept: application/vnd.apache.arrow.stream`) or
+    `format=parquet` (`Accept: application/vnd.apache.parquet`) to load columns straight into
+    pandas/polars; the cursor is then in the `X-Next-Cursor` header.
     """
+    output_format = negotiate_output_format(output_format, stream, accept)
+    stream = output_format == "ndjson"
     
-    job_config = bigquery.QueryJobConfig(
-        dry_run=False,
-        use_query_cache=True,
-    )
+    validate_FilterBody(filters)
+
+    if offset is not None and after_id is not None:
+        raise HTTPException(status_code=400, detail="offset and after_id cannot be combined")
 
     # NOTE: if ever relaxed, append _include/_exclude to ScalarQueryParameters for the predicates
     overlapping_attributes = set(filters.exclude.keys()) & set(filters.include.keys())
     if overlapping_attributes:
         raise HTTPException(status_code=400, detail=f"Cannot include and exclude from the same attributes: {overlapping_attributes}")
 
-    job_params = []
-
-    # WHERE filter
-    for excludes_at_one, predicate_map in enumerate([filters.include, filters.exclude]):
-        for col_enum, attributes in predicate_map.items():
-            BQ_TYPE = "INT64" if col_enum.value in int_attributes else "STRING"
-            MAYBE = "NOT" if excludes_at_one == 1 else ""
-            if isinstance(col_enum, CategoricalAttribute):
-                query_sql += f" AND `{col_enum.value}` {MAYBE} IN UNNEST(@{col_enum.value}_filter)"
-            else:
-                # BigQuery Version
-                # query_sql += f" AND {MAYBE} (ARRAY_LENGTH(ARRAY_INTERSECT(`{col_enum.value}`, @{col_enum.value})) > 0)"  
-                # job_config.use_legacy_sql = False  # for the BigQuery Version
-
-                # ANSI SQL version
-                query_sql += f" AND {MAYBE} EXISTS (SELECT 1 FROM UNNEST(`{col_enum.value}`) v WHERE v IN UNNEST(@{col_enum.value}_filter))"  
-            
-            job_params.append(bigquery.ArrayQueryParameter(f"{col_enum.value}_filter", BQ_TYPE, attributes))
-
-    # BQ doesn't gurantee a stable output order unless ORDER BY is given
-    query_sql += f" ORDER BY `id`"
-
-    # Pagination window
-    query_sql += f" LIMIT @window_limit"
-    job_params.append(bigquery.ScalarQueryParameter("window_limit", "INT64", limit))
-    
-    if offset is not None:
-        query_sql += f" OFFSET @window_offset"
-        job_params.append(bigquery.ScalarQueryParameter("window_offset", "INT64", offset))
+    columns = normalize_fields(fields)
+    cache_key = ("table/filtered", filters.canonical(), offset, limit, after_id, columns)
+    # every format is a different representation of the same request
+    cache_headers = await conditional_headers(cache_key if output_format == "json" else cache_key + (output_format, dictionary))
+    cache_headers["Vary"] = "Accept"
+    if etag_matches(cache_headers.get("ETag"), if_none_match):
+        return Response(status_code=304, headers=cache_headers)
 
-    job_config.query_parameters = job_params
+    cached_response = result_cache.get(cache_key) if output_format == "json" else None
+    if cached_response is not None:
+        return json_response(cached_response, cache_headers)
 
-    query_sql += ";"
+    compiled_query = compile_table_query(filters, offset, limit, after_id, columns)
 
     # Execute Query
+    snapshot = active_snapshot()
+    if snapshot is None:
+        default_columns = normalize_fields(None)
+        # a narrower projection is the only thing that reads fewer bytes; LIMIT doesn't
+        downgrade = None if columns == default_columns else lambda: compile_table_query(filters, offset, limit, after_id, default_columns)
+        compiled_query, cost_headers = await guard_query_cost(compiled_query, downgrade)
+        cache_headers.update(cost_headers)
+    downgraded = DOWNGRADED_HEADER in cache_headers
+    if downgraded:
+        # the ETag and cache_key stand for the requested columns, not the ones this response has
+        cache_headers.pop("ETag", None)
+        cache_headers["Cache-Control"] = "no-store"
+    if output_format in ("arrow", "parquet"):
+        try:
+            with span("execute"):
+                if snapshot is not None:
+                    table = snapshot.arrow_table(snapshot.filter_rows(filters), offset, limit, after_id, list(columns), dictionary)
+                else:
+                    table = await single_flight.do(
+                        ("arrow",) + compiled_query.key,
+                        lambda: run_query_arrow(bigquery_client, compiled_query.sql, compiled_query.job_config()),
+                    )
+                    if dictionary:
+                        table = dictionary_encode(table)
+            return columnar_response(table, output_format, limit, cache_headers)
+        except GoogleCloudError as gce:
+            raise bigquery_error(gce)
+        except TimeoutError:
+            raise HTTPException(status_code=504, detail="BigQuery query timed out")
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=str(e))
+
+    if stream:
+        try:
+            with span("execute"):
+                if snapshot is not None:
+                    pages = _async_pages(snapshot.iter_table(
+                        snapshot.filter_rows(filters), offset, limit, after_id, chunk_size=settings.STREAM_PAGE_SIZE, columns=list(columns)
+                    ))
+                else:
+                    # wait for the job before responding so its errors still map to status codes
+                    job_result = await start_query(bigquery_client, compiled_query.sql, compiled_query.job_config(), page_size=settings.STREAM_PAGE_SIZE)
+                    pages = iter_pages(job_result)
+        except GoogleCloudError as gce:
+            raise bigquery_error(gce)
+        except TimeoutError:
+            raise HTTPException(status_code=504, detail="BigQuery query timed out")
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=str(e))
+        return StreamingResponse(stream_ndjson(pages), media_type=NDJSON_MEDIA_TYPE, headers=cache_headers)
+
     try:
-        query_result = bigquery_client.query(query_sql, job_config=job_config).result()
-        query_result_json: List[Dict[str, Any]] = [dict(row) for row in query_result]
+        with span("execute"):
+            if snapshot is not None:
+                query_result = snapshot.table(snapshot.filter_rows(filters), offset, limit, after_id, list(columns))
+            else:
+                query_result = await run_shared_query(compiled_query.sql, compiled_query.job_config(), key=compiled_query.key)
+        query_result_json: List[Dict[str, Any]] = query_result.rows
         
-        response = {
+        table_response = {
             "row_count": len(query_result_json),
-            "response_schema": [field.name for field in query_result.schema],
+            "response_schema": query_result.schema,
             "response": query_result_json
         }
-        return response
+        # a full page may have more rows after it; a short page is the last one
+        full_page = limit and len(query_result_json) == limit
+        table_response["next_cursor"] = query_result_json[-1]["id"] if full_page else None
+        if not downgraded:
+            result_cache.put(cache_key, table_response)
+        return json_response(table_response, cache_headers)
     except GoogleCloudError as gce:
-        raise HTTPException(status_code=502, detail=f"BigQuery error: {gce}")
+        raise bigquery_error(gce)
+    except TimeoutError:
+        raise HTTPException(status_code=504, detail="BigQuery query timed out")
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 # ---------------------------------------------------------------
 
+def parse_grouping_sets(rows: List[Dict[str, Any]], facets: List[CategoricalAttribute]) -> Dict[str, Any]:
+    """Split GROUPING SETS output rows back into the total and one COUNT list per facet."""
+    total_count = 0
+    facet_counts: Dict[str, List[Dict[str, Any]]] = {facet.value: [] for facet in facets}
+    for row in rows:
+        # GROUPING(col) is 0 in the rows grouped by col; all ones is the grand total from ()
+        grouped = [facet for facet in facets if row[f"{facet.value}_grouping"] == 0]
+        if not grouped:
+            total_count = row["count"]
+        else:
+            facet = grouped[0].value
+            facet_counts[facet].append({facet: row[facet], "count": row["count"]})
+    return {"total_count": total_count, "response": facet_counts}
+
 @router.post(
-        "/Country_Code/COUNT/filtered",
-        response_model=CountResponse,
-        response_model_exclude_none=True,
+        "/facets/COUNT/filtered",
+        response_model=FacetCountResponse,
         openapi_extra={
             "requestBody": {
                 "content": {
@@ -263,66 +675,218 @@ async def query_filtered_table(
             }
         },
     )
-async def filter_country_code_count(
-        filters: FilterBody = Body()
+async def filter_facet_counts(
+        filters: FilterBody = Body(),
+        facets: List[CategoricalAttribute] = Query(..., description="Attributes to COUNT by; repeat the parameter for each one"),
+        if_none_match: Optional[str] = Header(None)
     ) -> Dict[str, Any]:
-    """Returns the COUNT of Chingu members in each Country_Code. Result is filtered by given attributes in the request body."""
-    
-    validate_FilterBody(filters)
+    """Returns the COUNT of Chingu members per value of every attribute in `facets`, plus the total, in one scan.
 
-    query_sql = f"""SELECT `{CategoricalAttribute.COUNTRY_CODE.value}`,
-        COUNT(*) as count FROM `{settings.GCP_PROJECT_ID}.{settings.DATASET}.{settings.TABLE}`
-        WHERE 1=1
+    Replaces one `/{chingu_attribute}/COUNT/` call per attribute with a single GROUPING SETS query.
+    Result is filtered by given attributes in the request body.
     """
 
-    job_config = bigquery.QueryJobConfig(
-        dry_run=False,
-        use_query_cache=True,
+    validate_FilterBody(filters)
+
+    overlapping_attributes = set(filters.exclude.keys()) & set(filters.include.keys())
+    if overlapping_attributes:
+        raise HTTPException(status_code=400, detail=f"Cannot include and exclude from the same attributes: {overlapping_attributes}")
+
+    facets = list(dict.fromkeys(facets))
+    cache_key = ("facets/COUNT/filtered", filters.canonical(), tuple(facet.value for facet in facets))
+    cache_headers = await conditional_headers(cache_key)
+    if etag_matches(cache_headers.get("ETag"), if_none_match):
+        return Response(status_code=304, headers=cache_headers)
+
+    cached_response = result_cache.get(cache_key)
+    if cached_response is not None:
+        return json_response(cached_response, cache_headers)
+
+    compiled_query = compile_facet_query(filters, tuple(facet.value for facet in facets))
+
+    snapshot = active_snapshot()
+    if snapshot is None:
+        compiled_query, cost_headers = await guard_query_cost(compiled_query)
+        cache_headers.update(cost_headers)
+    try:
+        with span("execute"):
+            if snapshot is not None:
+                facet_response = snapshot.facet_counts([facet.value for facet in facets], snapshot.filter_rows(filters))
+            else:
+                query_result = await run_shared_query(compiled_query.sql, compiled_query.job_config(), key=compiled_query.key)
+                facet_response = parse_grouping_sets(query_result.rows, facets)
+        result_cache.put(cache_key, facet_response)
+        return json_response(facet_response, cache_headers)
+    except GoogleCloudError as gce:
+        raise bigquery_error(gce)
+    except TimeoutError:
+        raise HTTPException(status_code=504, detail="BigQuery query timed out")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+# ---------------------------------------------------------------
+
+def to_cross_tab(rows: List[Dict[str, Any]], attribute: str, by: str) -> Dict[str, Any]:
+    """Pivot (attribute, by, count) rows into a dense matrix, filling missing pairs with 0."""
+    row_values = sorted({row[attribute] for row in rows}, key=_null_last)
+    column_values = sorted({row[by] for row in rows}, key=_null_last)
+    row_position = {value: i for i, value in enumerate(row_values)}
+    column_position = {value: j for j, value in enumerate(column_values)}
+
+    counts = [[0] * len(column_values) for _ in row_values]
+    for row in rows:
+        counts[row_position[row[attribute]]][column_position[row[by]]] = row["count"]
+
+    return {
+        "row_attribute": attribute,
+        "column_attribute": by,
+        "row_values": row_values,
+        "column_values": column_values,
+        "counts": counts,
+    }
+
+@router.post(
+        "/{chingu_attribute}/COUNT/filtered",
+        response_model=CountResponse | CrossTabResponse,
+        response_model_exclude_none=True,
+        openapi_extra={
+            "requestBody": {
+                "content": {
+                    "application/json": {
+                        "example": example_filter
+                    }
+                }
+            }
+        },
     )
+async def filter_attribute_count(
+        chingu_attribute: Attribute,
+        filters: FilterBody = Body(),
+        by: Optional[Attribute] = Query(None, description="Second attribute to group by; returns a dense count matrix"),
+        if_none_match: Optional[str] = Header(None)
+    ) -> Dict[str, Any]:
+    """Returns the COUNT of Chingu members for each value of {chingu_attribute}, or for each ({chingu_attribute}, `by`) pair.
+
+    List attributes (e.g. Voyage_Signup_ids) are unnested, so a member counts once under each distinct element.
+    Result is filtered by given attributes in the request body.
+    """
+
+    validate_FilterBody(filters)
 
-    # NOTE: if ever relaxed, append _include/_exclude to ScalarQueryParameters for the predicates
     overlapping_attributes = set(filters.exclude.keys()) & set(filters.include.keys())
     if overlapping_attributes:
         raise HTTPException(status_code=400, detail=f"Cannot include and exclude from the same attributes: {overlapping_attributes}")
 
-    job_params = []
+    if by == chingu_attribute:
+        raise HTTPException(status_code=400, detail="by must be a different attribute than the one being counted")
+
+    attribute = chingu_attribute.value
+    by_attribute = by.value if by is not None else None
+
+    cache_key = ("COUNT/filtered", attribute, by_attribute, filters.canonical())
+    cache_headers = await conditional_headers(cache_key)
+    if etag_matches(cache_headers.get("ETag"), if_none_match):
+        return Response(status_code=304, headers=cache_headers)
+
+    cached_response = result_cache.get(cache_key)
+    if cached_response is not None:
+        return json_response(cached_response, cache_headers)
+
+    compiled_query = compile_count_query(filters, attribute, by_attribute)
 
-    # WHERE filter
-    for excludes_at_one, predicate_map in enumerate([filters.include, filters.exclude]):
-        for col_enum, attributes in predicate_map.items():
-            BQ_TYPE = "INT64" if col_enum.value in int_attributes else "STRING"
-            MAYBE = "NOT" if excludes_at_one == 1 else ""
-            if isinstance(col_enum, CategoricalAttribute):
-                query_sql += f" AND `{col_enum.value}` {MAYBE} IN UNNEST(@{col_enum.value}_filter)"
+    snapshot = active_snapshot()
+    if snapshot is None:
+        compiled_query, cost_headers = await guard_query_cost(compiled_query)
+        cache_headers.update(cost_headers)
+    try:
+        with span("execute"):
+            if snapshot is not None:
+                rows = snapshot.filter_rows(filters)
+                if by_attribute is not None:
+                    query_result = snapshot.cross_count(attribute, by_attribute, rows)
+                else:
+                    query_result = snapshot.count(attribute, rows)
             else:
-                # BigQuery Version
-                # query_sql += f" AND {MAYBE} (ARRAY_LENGTH(ARRAY_INTERSECT(`{col_enum.value}`, @{col_enum.value})) > 0)"  
-                # job_config.use_legacy_sql = False  # for the BigQuery Version
+                query_result = await run_shared_query(compiled_query.sql, compiled_query.job_config(), key=compiled_query.key)
+
+        if by_attribute is not None:
+            count_response = to_cross_tab(query_result.rows, attribute, by_attribute)
+        else:
+            count_response = {
+                "row_count": len(query_result.rows),
+                "response_schema": query_result.schema,
+                "response": query_result.rows
+            }
+        result_cache.put(cache_key, count_response)
+        return json_response(count_response, cache_headers)
+    except GoogleCloudError as gce:
+        raise bigquery_error(gce)
+    except TimeoutError:
+        raise HTTPException(status_code=504, detail="BigQuery query timed out")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
 
-                # ANSI SQL version
-                query_sql += f" AND {MAYBE} EXISTS (SELECT 1 FROM UNNEST(`{col_enum.value}`) v WHERE v IN UNNEST(@{col_enum.value}_filter))"  
-            
-            job_params.append(bigquery.ArrayQueryParameter(f"{col_enum.value}_filter", BQ_TYPE, attributes))
+# ---------------------------------------------------------------
 
-    query_sql += f" GROUP BY `{CategoricalAttribute.COUNTRY_CODE.value}`"
+def collect_cache_metrics():
+    """The caches' own counters, read at scrape time."""
+    templates = template_cache_stats()
+    return [
+        ("result_cache_lookups_total", "counter", "Result cache lookups by outcome.",
+         [({"outcome": "hit"}, result_cache.hits), ({"outcome": "miss"}, result_cache.misses)]),
+        ("result_cache_bytes", "gauge", "Estimated bytes held by the result cache.", [({}, result_cache.stats()["bytes"])]),
+        ("single_flight_requests_total", "counter", "Requests that ran their own job (leader) or joined one in flight (coalesced).",
+         [({"role": "leader"}, single_flight.leaders), ({"role": "coalesced"}, single_flight.coalesced)]),
+        ("query_template_lookups_total", "counter", "Compiled SQL template lookups by template and outcome.",
+         [({"template": name, "outcome": outcome}, count)
+          for name, stats in templates.items() for outcome, count in (("hit", stats["hits"]), ("miss", stats["misses"]))]),
+    ]
+
+registry.register_collector(collect_cache_metrics)
+
+@router.get("/cache/stats")
+async def get_cache_stats() -> Dict[str, Any]:
+    """Hit/miss counters and memory use of the in-process result cache, the SQL template cache, request coalescing and dry-run estimates."""
+    return {
+        **result_cache.stats(),
+        "query_templates": template_cache_stats(),
+        "single_flight": single_flight.stats(),
+        "cost_estimates": cost_estimates.stats(),
+    }
+
+def require_admin_token(x_admin_token: Optional[str] = Header(None)):
+    """Guard for the endpoints that drop caches or start jobs: the `X-Admin-Token` header must match ADMIN_TOKEN."""
+    if not settings.ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Admin endpoints are disabled; set ADMIN_TOKEN to enable them")
+    if x_admin_token is None or not hmac.compare_digest(x_admin_token.encode(), settings.ADMIN_TOKEN.encode()):
+        raise HTTPException(status_code=401, detail="Missing or invalid X-Admin-Token header")
+
+@router.post("/cache/invalidate", dependencies=[Depends(require_admin_token)])
+async def invalidate_cache() -> Dict[str, Any]:
+    """Drop all cached results, e.g. after the cleaning pipeline re-uploads the table."""
+    dropped = result_cache.invalidate()
+    cost_estimates.invalidate()
+    # re-read the table version on the next request so ETags move on too
+    dataset_version.expire()
+    return {"dropped_entries": dropped, **result_cache.stats()}
 
-    job_config.query_parameters = job_params
+# ---------------------------------------------------------------
 
+@router.post("/snapshot/refresh", dependencies=[Depends(require_admin_token)])
+async def refresh_snapshot() -> Dict[str, Any]:
+    """Re-pull the in-memory snapshot from BigQuery (snapshot mode only)."""
+    global bigquery_client
+    if settings.QUERY_BACKEND != "snapshot":
+        raise HTTPException(status_code=409, detail="Service is not running with QUERY_BACKEND=snapshot")
 
-    query_sql += ";"
-    # Execute Query
     try:
-        query_result = bigquery_client.query(query_sql, job_config=job_config).result()
-        query_result_json: List[Dict[str, Any]] = [dict(row) for row in query_result]
-        
-        response = {
-            "row_count": len(query_result_json),
-            "response_schema": [field.name for field in query_result.schema],
-            "response": query_result_json
-        }
-        return response
+        if bigquery_client is None:
+            bigquery_client = make_bigquery_client()
+        snapshot = await refresh_snapshot_from_bigquery()
+        return {"row_count": snapshot.row_count, "loaded_at": snapshot.loaded_at}
     except GoogleCloudError as gce:
-        raise HTTPException(status_code=502, detail=f"BigQuery error: {gce}")
+        raise bigquery_error(gce)
+    except TimeoutError:
+        raise HTTPException(status_code=504, detail="BigQuery query timed out")
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
-    
\ No newline at end of file
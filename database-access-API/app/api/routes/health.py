@@ -1,9 +1,21 @@
 from fastapi import APIRouter
+from fastapi.responses import JSONResponse
+from fastapi.encoders import jsonable_encoder
 
 router = APIRouter(prefix="", tags=["chingu"])
 
 from app.api.core.config import settings
+from app.api.core.unique_values import unique_value_cache
 
 @router.get("/")
 def return_status() -> str:
-    return f"currently querying `{settings.GCP_PROJECT_ID}.{settings.DATASET}.{settings.TABLE}`"
\ No newline at end of file
+    return f"currently querying `{settings.GCP_PROJECT_ID}.{settings.DATASET}.{settings.TABLE}`"
+
+@router.get("/health")
+def return_health() -> JSONResponse:
+    """503 until the filter-validation cache has values; reports its age and the last refresh error."""
+    cache_status = unique_value_cache.status()
+    return JSONResponse(
+        status_code=200 if cache_status["ready"] else 503,
+        content=jsonable_encoder({"unique_value_cache": cache_status}),
+    )
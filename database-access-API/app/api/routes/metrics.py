@@ -0,0 +1,11 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from app.api.core.metrics import registry
+
+router = APIRouter(prefix="", tags=["chingu"])
+
+@router.get("/metrics", response_class=PlainTextResponse)
+def return_metrics() -> PlainTextResponse:
+    """Prometheus text format: request and BigQuery job latency, bytes processed, cache hits."""
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
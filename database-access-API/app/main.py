@@ -1,15 +1,30 @@
 """FastAPI service exposing read-only, parameterized access to Chingu member data in BigQuery.
 
 Error handling:
-- 400 for invalid date usage
+- 400 for invalid date usage, or a query over the BQ_MAXIMUM_BYTES_BILLED budget (BQ_COST_GUARD, or BigQuery itself)
+- 401/403 for admin endpoints called without the ADMIN_TOKEN shared secret, or with none configured
 - 502 for BigQuery errors
+- 504 for BigQuery jobs exceeding BQ_QUERY_TIMEOUT_SECONDS
 - 500 for unexpected exceptions
 """
 from fastapi import FastAPI
-from app.api.routes import health, chingu_members
+from app.api.core.compression import CompressionMiddleware
+from app.api.core.config import settings
+from app.api.core.metrics import MetricsMiddleware
+from app.api.routes import health, chingu_members, metrics
 
 app = FastAPI(title="Chingu Member Demographics", version="0.2.0")
 
+app.add_middleware(
+    CompressionMiddleware,
+    minimum_size=settings.COMPRESSION_MINIMUM_SIZE,
+    gzip_level=settings.GZIP_LEVEL,
+    brotli_quality=settings.BROTLI_QUALITY,
+)
+# added last so it runs outermost: request latency includes compression
+app.add_middleware(MetricsMiddleware, log_timings=settings.LOG_REQUEST_TIMINGS)
+
 
 app.include_router(health.router)
 app.include_router(chingu_members.router)
+app.include_router(metrics.router)
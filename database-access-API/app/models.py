@@ -1,4 +1,4 @@
-from typing import List, Dict, Optional, Any
+from typing import List, Dict, Optional, Any, Tuple
 from enum import Enum
 
 from pydantic import BaseModel, Field
@@ -27,20 +27,61 @@ def make_attribute_enum():
 
 Attribute = make_attribute_enum()
 
+def make_member_field_enum():
+    entries = {"ALL": "*", "ID": "id", "TIMESTAMP": "Timestamp"}
+    entries.update({e.name: e.value for e in CategoricalAttribute})
+    entries.update({e.name: e.value for e in AttributeLists})
+    entries.update({"GOAL_OTHER": "Goal_Other", "SOURCE_OTHER": "Source_Other"})
+    return Enum("MemberField", entries, type=str)
+
+# Columns /table/filtered can project with `fields=`; "*" selects every column
+MemberField = make_member_field_enum()
+
+# What the client's member list needs (MemberCard plus the list and map page filters)
+MEMBER_CARD_FIELDS = [
+    MemberField.ID, MemberField.TIMESTAMP, MemberField.GENDER, MemberField.ROLE, MemberField.COUNTRY_CODE,
+    MemberField.COUNTRY_NAME, MemberField.GOAL, MemberField.SOLO_PROJECT_TIER, MemberField.VOYAGE_TIERS,
+]
+
 class CountResponse(BaseModel):
     row_count: int
     response_schema: List[str]
     day_count: Optional[int] = None
     response: List[Any]
 
+class FacetCountResponse(BaseModel):
+    # members matching the filters
+    total_count: int
+    # facet attribute -> [{attribute: value, "count": n}, ...]
+    response: Dict[str, List[Dict[str, Any]]]
+
+class CrossTabResponse(BaseModel):
+    row_attribute: str
+    column_attribute: str
+    row_values: List[Any]
+    column_values: List[Any]
+    # counts[i][j] is the number of members with row_values[i] and column_values[j]
+    counts: List[List[int]]
+
 # TODO: put length restrictions on the List parameter
 class FilterBody(BaseModel):
     include: Optional[Dict[CategoricalAttribute | AttributeLists, List[str | int]]] = Field(default_factory=dict, description="Whitelisted Chingu Attributes")
     exclude: Optional[Dict[CategoricalAttribute | AttributeLists, List[str | int]]] = Field(default_factory=dict, description="Blacklisted Chingu Attributes")
 
+    def canonical(self) -> Tuple:
+        """Order-insensitive, duplicate-free form of the filters, usable as a hash key."""
+        def normalize(predicates):
+            return tuple(sorted(
+                (attr.value, tuple(sorted(set(values), key=lambda v: (isinstance(v, str), v))))
+                for attr, values in (predicates or {}).items()
+            ))
+        return (normalize(self.include), normalize(self.exclude))
+
 
 class FilteredTableResponse(BaseModel):
     row_count: int
     response_schema: List[str]
     # We don't know full table schema here; keep it flexible.
     response: List[Dict[str, Any]]
+    # pass as `after_id` to fetch the next page; None on the last page
+    next_cursor: Optional[int] = None
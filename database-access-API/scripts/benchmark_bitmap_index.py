@@ -0,0 +1,77 @@
+"""Benchmark: filter evaluation with the bitmap index vs. the SQL predicate path.
+
+The SQL side runs the same predicate shapes the routes send to BigQuery (`IN` / `NOT IN` for
+categorical attributes, `EXISTS` over the unnested list for `AttributeLists`) on an in-memory
+SQLite table, so it measures engine work without network or job latency. Run from `database-access-API/`:
+
+    python -m scripts.benchmark_bitmap_index --rows 5000 20000
+"""
+import argparse
+import time
+
+from scripts.fake_bigquery import LIST_COLUMNS, load_sqlite, make_members
+
+from app.api.core.snapshot import MemberSnapshot
+from app.models import FilterBody
+
+FILTERS = [
+    {"include": {"Gender": ["FEMALE", "NON-BINARY"]}},
+    {"include": {"Gender": ["FEMALE", "NON-BINARY"]}, "exclude": {"Goal": ["GAIN EXPERIENCE"], "Source": ["LinkedIn", "OTHER"]}},
+    {"include": {"Country_Code": ["US", "IN", "NG"], "Voyage_Signup_ids": [40, 41, 42, 43]}, "exclude": {"Role": ["Scrum Master"]}},
+    {"include": {"Voyage_Tiers": ["Tier 3"]}, "exclude": {"Voyage_Signup_ids": [1, 2, 3]}},
+]
+
+
+def where_clause(filters: dict):
+    sql, params = " WHERE 1=1", []
+    for negate, predicates in ((False, filters.get("include", {})), (True, filters.get("exclude", {}))):
+        for column, values in predicates.items():
+            placeholders = ", ".join("?" for _ in values)
+            maybe = "NOT" if negate else ""
+            if column in LIST_COLUMNS:
+                sql += f" AND {maybe} EXISTS (SELECT 1 FROM json_each({column}) v WHERE v.value IN ({placeholders}))"
+            else:
+                sql += f" AND {column} {maybe} IN ({placeholders})"
+            params += values
+    return sql, params
+
+
+def timed(fn, repeat: int) -> float:
+    started = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - started) / repeat * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[5000, 50000])
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    print(f"{'rows':>7} {'filter':>6} {'matches':>8} {'SQL COUNT us':>13} {'bitmap COUNT us':>16} "
+          f"{'SQL GROUP BY us':>16} {'bitmap GROUP BY us':>19}")
+    for row_count in args.rows:
+        rows = make_members(row_count)
+        snapshot = MemberSnapshot(rows)
+        connection = load_sqlite(rows)
+
+        for number, raw_filters in enumerate(FILTERS, start=1):
+            filters = FilterBody(**raw_filters)
+            where, params = where_clause(raw_filters)
+            count_sql = "SELECT COUNT(*) FROM members" + where
+            group_sql = "SELECT Country_Code, COUNT(*) FROM members" + where + " GROUP BY Country_Code"
+
+            matches = snapshot.index.popcount(snapshot.filter_rows(filters))
+            assert matches == connection.execute(count_sql, params).fetchone()[0]
+
+            sql_count = timed(lambda: connection.execute(count_sql, params).fetchone(), args.repeat)
+            bitmap_count = timed(lambda: snapshot.index.popcount(snapshot.filter_rows(filters)), args.repeat)
+            sql_group = timed(lambda: connection.execute(group_sql, params).fetchall(), args.repeat)
+            bitmap_group = timed(lambda: snapshot.count("Country_Code", snapshot.filter_rows(filters)), args.repeat)
+            print(f"{row_count:>7} {number:>6} {matches:>8} {sql_count:>13.0f} {bitmap_count:>16.0f} "
+                  f"{sql_group:>16.0f} {bitmap_group:>19.0f}")
+
+
+if __name__ == "__main__":
+    main()
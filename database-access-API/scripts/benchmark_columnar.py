@@ -0,0 +1,97 @@
+"""Benchmark: payload size, server encode time and client load time of a /table/filtered export, JSON vs. Arrow vs. Parquet.
+
+The server side encodes the same rows the way each format path does: orjson over row dicts for
+JSON/NDJSON, the snapshot's Arrow table written as an IPC stream or Parquet for the columnar formats.
+The client side is what an analytics job does with the body: build a pandas DataFrame (or just an
+Arrow table). Run from `database-access-API/`:
+
+    python -m scripts.benchmark_columnar --rows 5000 20000
+"""
+import argparse
+import io
+import time
+
+import orjson
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from scripts.fake_bigquery import make_members
+
+from app.api.core.columnar import to_arrow_ipc, to_parquet
+from app.api.core.query_compiler import normalize_fields
+from app.api.core.serialization import dumps, dumps_lines
+from app.api.core.snapshot import MemberSnapshot
+from app.models import MemberField
+
+try:
+    import pandas
+except ImportError:  # Arrow-only client timings
+    pandas = None
+
+
+def best_ms(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[5000, 20000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    columns = list(normalize_fields([MemberField.ALL]))
+    for row_count in args.rows:
+        snapshot = MemberSnapshot(make_members(row_count))
+        rows = snapshot.index.all_rows
+
+        def json_body():
+            return dumps({"response": snapshot.table(rows, columns=columns).rows})
+
+        def ndjson_body():
+            return dumps_lines(snapshot.table(rows, columns=columns).rows)
+
+        def arrow_body(dictionary):
+            return lambda: to_arrow_ipc(snapshot.arrow_table(rows, columns=columns, dictionary=dictionary))
+
+        def parquet_body(dictionary):
+            return lambda: to_parquet(snapshot.arrow_table(rows, columns=columns, dictionary=dictionary))
+
+        def load_json(body):
+            records = orjson.loads(body)["response"]
+            return pandas.DataFrame.from_records(records) if pandas else pa.Table.from_pylist(records)
+
+        def load_ndjson(body):
+            records = [orjson.loads(line) for line in body.splitlines()]
+            return pandas.DataFrame.from_records(records) if pandas else pa.Table.from_pylist(records)
+
+        def load_arrow(body):
+            table = pa.ipc.open_stream(body).read_all()
+            return table.to_pandas() if pandas else table
+
+        def load_parquet(body):
+            table = pq.read_table(io.BytesIO(body))
+            return table.to_pandas() if pandas else table
+
+        print(f"\n{row_count:,} rows, all columns (client builds {'a pandas DataFrame' if pandas else 'an Arrow table'})")
+        print(f"{'format':<20} {'bytes':>11} {'encode ms':>10} {'load ms':>9}")
+        for name, encode, load in (
+            ("json", json_body, load_json),
+            ("ndjson", ndjson_body, load_ndjson),
+            ("arrow", arrow_body(False), load_arrow),
+            ("arrow dictionary", arrow_body(True), load_arrow),
+            ("parquet", parquet_body(False), load_parquet),
+            ("parquet dictionary", parquet_body(True), load_parquet),
+        ):
+            body = encode()
+            encode_ms = best_ms(encode, args.repeat)
+            load_ms = best_ms(lambda: load(body), args.repeat)
+            print(f"{name:<20} {len(body):>11,} {encode_ms:>10.1f} {load_ms:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""Benchmark: bytes on the wire and compression CPU per request for /table/filtered responses.
+
+Encodes real-shaped pages with the same serializer as the API, then compresses them with the
+middleware's compressors at several levels. Streaming exports are compressed page by page with a
+flush after each page, as the middleware does, which costs a little ratio for time to first byte.
+brotli rows only appear when the `brotli` package is installed. Run from `database-access-API/`:
+
+    python -m scripts.benchmark_compression --rows 5000
+"""
+import argparse
+import time
+
+from scripts.fake_bigquery import make_members
+
+from app.api.core.compression import BrotliCompressor, GzipCompressor, brotli
+from app.api.core.query_compiler import normalize_fields
+from app.api.core.serialization import dumps, dumps_lines
+from app.api.core.snapshot import MemberSnapshot
+from app.models import MemberField
+
+
+def compress_chunks(make_compressor, chunks):
+    compressor = make_compressor()
+    last = len(chunks) - 1
+    return b"".join(compressor.compress(chunk, finish=i == last) for i, chunk in enumerate(chunks))
+
+
+def cpu_ms(make_compressor, chunks, min_seconds: float = 0.3) -> float:
+    repeat = 0
+    started = time.process_time()
+    while time.process_time() - started < min_seconds:
+        compress_chunks(make_compressor, chunks)
+        repeat += 1
+    return (time.process_time() - started) / repeat * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=5000)
+    parser.add_argument("--page-size", type=int, default=1000, help="STREAM_PAGE_SIZE")
+    args = parser.parse_args()
+
+    snapshot = MemberSnapshot(make_members(args.rows))
+    default_columns = list(normalize_fields(None))
+    all_columns = list(normalize_fields([MemberField.ALL]))
+
+    def page(limit, columns):
+        return [dumps({"response": snapshot.table(snapshot.index.all_rows, limit=limit, columns=columns).rows})]
+
+    payloads = {
+        "page of 200, default fields": page(200, default_columns),
+        "page of 1000, fields=*": page(1000, all_columns),
+        f"NDJSON export, {args.rows} rows": [
+            dumps_lines(rows)
+            for rows in snapshot.iter_table(snapshot.index.all_rows, chunk_size=args.page_size, columns=all_columns)
+        ],
+    }
+    encodings = [(f"gzip {level}", lambda level=level: GzipCompressor(level)) for level in (1, 6, 9)]
+    if brotli is not None:
+        encodings += [(f"br {quality}", lambda quality=quality: BrotliCompressor(quality)) for quality in (1, 4, 11)]
+
+    for name, chunks in payloads.items():
+        identity = sum(len(chunk) for chunk in chunks)
+        print(f"\n{name}: {identity:,} bytes uncompressed")
+        print(f"{'encoding':<10} {'wire bytes':>11} {'ratio':>7} {'CPU ms':>8}")
+        for encoding, make_compressor in encodings:
+            wire = len(compress_chunks(make_compressor, chunks))
+            print(f"{encoding:<10} {wire:>11,} {identity / wire:>6.1f}x {cpu_ms(make_compressor, chunks):>8.2f}")
+    if brotli is None:
+        print("\n(brotli not installed: only gzip is negotiated)")
+
+
+if __name__ == "__main__":
+    main()
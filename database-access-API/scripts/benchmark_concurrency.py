@@ -0,0 +1,80 @@
+"""Load benchmark: route throughput vs. number of concurrent clients, against a fake BigQuery client.
+
+Compares the old inline `bigquery_client.query(...).result()` call with the bounded executor in
+`app.api.core.query_runner`. The result cache is turned off and every call gets its own single-flight
+key, so each request runs its own fake job and the numbers measure the executor alone.
+Run from `database-access-API/`:
+
+    python -m scripts.benchmark_concurrency --latency 0.05 --pool 8
+"""
+import argparse
+import asyncio
+import itertools
+import time
+
+from scripts.fake_bigquery import FakeBigQueryClient, make_members
+
+from app.api.core import query_runner
+from app.api.core.result_cache import result_cache
+from app.api.routes import chingu_members
+from app.models import CategoricalAttribute
+
+
+async def inline_count(client):
+    # what every handler did before: the blocking call runs on the event loop itself
+    result = client.query("SELECT Gender, COUNT(*) ...").result()
+    return [dict(row) for row in result]
+
+
+async def executor_count(client):
+    return await chingu_members.get_unique_count(
+        CategoricalAttribute.GENDER, start_date=None, end_date=None, if_none_match=None
+    )
+
+
+def run_own_jobs(run_shared_query):
+    """`run_shared_query` with a fresh single-flight key per call, so concurrent calls never coalesce."""
+    call_ids = itertools.count()
+
+    async def run_own_job(query_sql, job_config=None, key=None):
+        return await run_shared_query(query_sql, job_config, key=("benchmark", next(call_ids)))
+
+    return run_own_job
+
+
+async def drive(handler, client, concurrent_clients: int, requests_per_client: int) -> float:
+    async def one_client():
+        for _ in range(requests_per_client):
+            await handler(client)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one_client() for _ in range(concurrent_clients)))
+    return concurrent_clients * requests_per_client / (time.perf_counter() - started)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--latency", type=float, default=0.05, help="seconds per fake BigQuery job")
+    parser.add_argument("--pool", type=int, default=8, help="BQ_MAX_CONCURRENT_QUERIES")
+    parser.add_argument("--requests", type=int, default=5, help="sequential requests per client")
+    parser.add_argument("--clients", type=int, nargs="+", default=[1, 2, 4, 8, 16, 32])
+    args = parser.parse_args()
+
+    client = FakeBigQueryClient(make_members(50), latency=args.latency)
+    chingu_members.bigquery_client = client
+    # every request has to reach the pool: nothing answered from the result cache
+    result_cache.max_bytes = 0
+    chingu_members.run_shared_query = run_own_jobs(chingu_members.run_shared_query)
+
+    print(f"fake job latency {args.latency * 1000:.0f} ms, pool size {args.pool}")
+    print(f"{'clients':>8} {'inline req/s':>14} {'executor req/s':>16} {'speedup':>8}")
+    for concurrent_clients in args.clients:
+        query_runner.configure(args.pool, timeout_seconds=30)
+        inline = asyncio.run(drive(inline_count, client, concurrent_clients, args.requests))
+        query_runner.configure(args.pool, timeout_seconds=30)
+        pooled = asyncio.run(drive(executor_count, client, concurrent_clients, args.requests))
+        print(f"{concurrent_clients:>8} {inline:>14.1f} {pooled:>16.1f} {pooled / inline:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
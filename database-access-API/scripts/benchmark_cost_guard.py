@@ -0,0 +1,97 @@
+"""Benchmark: bytes billed and added latency for a request mix under each BQ_COST_GUARD mode.
+
+The mix is landing-page traffic plus a share of `fields=*` exports with varying filter values. The
+fake client charges a job for the bytes of the columns its SQL reads, like BigQuery on an
+unpartitioned table, and a dry run takes `--dry-run-latency`. Estimates are cached per SQL template,
+so only the first request of each shape pays for a dry run. Run from `database-access-API/`:
+
+    python -m scripts.benchmark_cost_guard --requests 400 --export-share 0.25
+"""
+import argparse
+import asyncio
+import random
+import time
+
+from fastapi import HTTPException
+
+from scripts.fake_bigquery import FakeBigQueryClient, make_members
+
+from app.api.core.config import settings
+from app.api.core.cost_guard import cost_estimates
+from app.api.core.result_cache import result_cache
+from app.api.core.unique_values import unique_value_cache
+from app.api.routes import chingu_members
+from app.models import Attribute, FilterBody, MemberField
+
+
+async def one_request(rng: random.Random, export_share: float):
+    filters = FilterBody(include={
+        "Gender": rng.sample(["MALE", "FEMALE", "NON-BINARY"], rng.randint(1, 3)),
+        "Country_Code": rng.sample(["US", "IN", "GB", "NG", "CA"], rng.randint(1, 3)),
+    })
+    # distinct filter values would miss the result cache anyway; keep it out of the picture
+    result_cache.invalidate()
+    if rng.random() < export_share:
+        return await chingu_members.query_filtered_table(
+            filters, offset=None, limit=1000, after_id=None, fields=[MemberField.ALL], stream=False,
+            output_format=None, dictionary=False, accept=None, if_none_match=None,
+        )
+    await chingu_members.query_filtered_table(
+        filters, offset=None, limit=200, after_id=None, fields=None, stream=False,
+        output_format=None, dictionary=False, accept=None, if_none_match=None,
+    )
+    return await chingu_members.filter_attribute_count(Attribute.ROLE, filters, by=None, if_none_match=None)
+
+
+async def run_mix(requests: int, export_share: float, seed: int):
+    rng = random.Random(seed)
+    rejected = 0
+    latencies = []
+    for _ in range(requests):
+        started = time.perf_counter()
+        try:
+            await one_request(rng, export_share)
+        except HTTPException as e:
+            if e.status_code != 400:
+                raise
+            rejected += 1
+        latencies.append(time.perf_counter() - started)
+    return rejected, sum(latencies) / len(latencies), max(latencies)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--export-share", type=float, default=0.25, help="share of requests asking for fields=*")
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds per fake BigQuery job")
+    parser.add_argument("--dry-run-latency", type=float, default=0.1, help="seconds per fake dry run")
+    args = parser.parse_args()
+
+    members = make_members(2000)
+    unique_value_cache.replace(
+        {attr.value: {value for member in members for value in (member[attr.value] if isinstance(member[attr.value], list) else [member[attr.value]])}
+         for attr in Attribute},
+        source="benchmark",
+    )
+    client = FakeBigQueryClient(members, latency=args.latency, dry_run_latency=args.dry_run_latency)
+    chingu_members.bigquery_client = client
+    full_scan = client.bytes_read("SELECT *")
+    default_scan = client.bytes_read(" ".join(f"`{name}`" for name in chingu_members.normalize_fields(None)))
+    # a budget that fits the default projection but not SELECT *
+    settings.BQ_MAXIMUM_BYTES_BILLED = (full_scan + default_scan) // 2
+
+    print(f"{args.requests} requests, {args.export_share:.0%} fields=* exports, budget {settings.BQ_MAXIMUM_BYTES_BILLED:,} bytes")
+    print(f"{'mode':<10} {'jobs':>6} {'dry runs':>9} {'rejected':>9} {'bytes billed':>14} {'mean ms':>8} {'max ms':>8}")
+    for mode in ("off", "estimate", "reject", "downgrade"):
+        settings.BQ_COST_GUARD = mode
+        cost_estimates.invalidate()
+        jobs, dry_runs, billed = client.query_count, client.dry_run_count, client.bytes_billed
+        rejected, mean_seconds, max_seconds = asyncio.run(run_mix(args.requests, args.export_share, seed=19))
+        print(
+            f"{mode:<10} {client.query_count - jobs:>6} {client.dry_run_count - dry_runs:>9} {rejected:>9} "
+            f"{client.bytes_billed - billed:>14,} {mean_seconds * 1000:>8.2f} {max_seconds * 1000:>8.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+"""Load benchmark: throughput and latency percentiles of every endpoint, offline and reproducible.
+
+Runs the app in-process (httpx over ASGI, no network) on the local DuckDB backend, which executes
+the same SQL the app sends to BigQuery, or on the snapshot backend. The members are synthetic
+(`--rows`, fixed seed) unless `--data` points at `chingu_members_cleaned.json`. Each request draws
+its filter values from a seeded generator, and the result cache is off unless `--result-cache` is
+given, so every request reaches the backend. `--json` saves the numbers to compare runs. Run from
+`database-access-API/`:
+
+    python -m scripts.benchmark_endpoints --backend local --rows 5000 --concurrency 1 8 32
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import tempfile
+import time
+
+import scripts.fake_bigquery  # noqa: F401  (placeholder settings)
+from scripts.fake_bigquery import make_members
+
+
+def write_members(row_count: int, path: str):
+    with open(path, "w") as f:
+        for member in make_members(row_count):
+            f.write(json.dumps({**member, "Timestamp": member["Timestamp"].strftime("%Y-%m-%dT%H:%M:%S.000Z")}) + "\n")
+
+
+def make_requests(unique_values, count: int, seed: int):
+    """Per endpoint, `count` (method, url, body) tuples with seeded filter values."""
+    rng = random.Random(seed)
+
+    def pick(attribute, most=3):
+        values = sorted((value for value in unique_values[attribute] if value is not None), key=str)
+        return rng.sample(values, rng.randint(1, min(most, len(values))))
+
+    def filters():
+        body = {"include": {"Gender": pick("Gender"), "Country_Code": pick("Country_Code", 5)}}
+        if rng.random() < 0.5:
+            body["include"]["Voyage_Tiers"] = pick("Voyage_Tiers", 2)
+        if rng.random() < 0.5:
+            body["exclude"] = {"Role": pick("Role", 2)}
+        return body
+
+    def dates():
+        start = rng.randint(2019, 2023)
+        return f"start_date={start}-01-01&end_date={start + rng.randint(0, 2)}-12-31"
+
+    categorical = ["Gender", "Country_Code", "Role", "Goal", "Source"]
+    return {
+        "UNIQUE": lambda: ("get", f"/chingu_members/{rng.choice(categorical)}/UNIQUE", None),
+        "COUNT": lambda: ("get", f"/chingu_members/{rng.choice(categorical)}/COUNT/?{dates()}", None),
+        "table page": lambda: ("post", "/chingu_members/table/filtered?limit=200", filters()),
+        "table fields=* 1000": lambda: ("post", "/chingu_members/table/filtered?limit=1000&fields=*", filters()),
+        "table NDJSON export": lambda: ("post", "/chingu_members/table/filtered?stream=true", filters()),
+        "facets": lambda: ("post", "/chingu_members/facets/COUNT/filtered?facets=Gender&facets=Role&facets=Goal", filters()),
+        "COUNT filtered": lambda: ("post", f"/chingu_members/{rng.choice(categorical)}/COUNT/filtered", filters()),
+        "COUNT filtered by": lambda: ("post", "/chingu_members/Voyage_Tiers/COUNT/filtered?by=Gender", filters()),
+    }, count
+
+
+async def run_endpoint(client, requests, concurrency: int):
+    queue = list(requests)
+    latencies = []
+
+    async def worker():
+        while queue:
+            method, url, body = queue.pop()
+            started = time.perf_counter()
+            response = await client.request(method, url, json=body)
+            latencies.append(time.perf_counter() - started)
+            assert response.status_code == 200, (url, response.status_code, response.text[:200])
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    quantiles = statistics.quantiles(latencies, n=100)
+    return {
+        "requests_per_second": len(latencies) / elapsed,
+        "p50_ms": quantiles[49] * 1000,
+        "p95_ms": quantiles[94] * 1000,
+        "p99_ms": quantiles[98] * 1000,
+    }
+
+
+async def run(args):
+    import httpx
+
+    from app.api.core.unique_values import unique_value_cache
+    from app.main import app
+
+    results = []
+    async with app.router.lifespan_context(app):
+        for _ in range(200):
+            # local mode fills the validation cache with a background job
+            if unique_value_cache:
+                break
+            await asyncio.sleep(0.05)
+        unique_values = {attribute: unique_value_cache.get(attribute, set()) for attribute in
+                         ("Gender", "Country_Code", "Voyage_Tiers", "Role")}
+        generators, count = make_requests(unique_values, args.requests, args.seed)
+
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://benchmark") as client:
+            print(f"{'endpoint':<22} {'conc':>5} {'req/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+            for endpoint, generate in generators.items():
+                requests = [generate() for _ in range(count)]
+                await run_endpoint(client, requests[:10], 1)  # warm-up
+                for concurrency in args.concurrency:
+                    numbers = await run_endpoint(client, requests, concurrency)
+                    results.append({"endpoint": endpoint, "concurrency": concurrency, **numbers})
+                    print(f"{endpoint:<22} {concurrency:>5} {numbers['requests_per_second']:>9.1f} "
+                          f"{numbers['p50_ms']:>8.2f} {numbers['p95_ms']:>8.2f} {numbers['p99_ms']:>8.2f}")
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--backend", choices=["local", "snapshot"], default="local")
+    parser.add_argument("--rows", type=int, default=5000, help="synthetic members, ignored with --data")
+    parser.add_argument("--data", help="newline-delimited JSON export of the members table")
+    parser.add_argument("--requests", type=int, default=200, help="requests per endpoint and concurrency level")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--seed", type=int, default=20)
+    parser.add_argument("--result-cache", action="store_true", help="keep the in-process result cache on")
+    parser.add_argument("--json", help="write the results to this file")
+    args = parser.parse_args()
+
+    data_path = args.data
+    if data_path is None:
+        data_path = os.path.join(tempfile.mkdtemp(), "chingu_members_cleaned.json")
+        write_members(args.rows, data_path)
+    # settings are read when the app is imported
+    os.environ.update(
+        QUERY_BACKEND=args.backend,
+        SNAPSHOT_PATH=data_path,
+        SNAPSHOT_REFRESH_FROM_BIGQUERY="False",
+        UNIQUE_VALUE_CACHE_PATH="",
+    )
+    if not args.result_cache:
+        os.environ["RESULT_CACHE_MAX_BYTES"] = "0"
+
+    print(f"backend {args.backend}, data {data_path}, {args.requests} requests per run")
+    results = asyncio.run(run(args))
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"backend": args.backend, "data": data_path, "rows": args.rows, "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""Benchmark: cost of the metrics instrumentation, and the per-stage breakdown it reports.
+
+First times the primitives every request pays for (a `span`, a histogram observation), then sends
+the same mix of requests through the app with and without `MetricsMiddleware` in snapshot mode.
+Finally it prints the mean time per stage from `request_stage_duration_seconds`, the breakdown
+`/metrics` gives in production. Run from `database-access-API/`:
+
+    python -m scripts.benchmark_metrics --rows 5000 --requests 300
+"""
+import argparse
+import os
+import time
+
+import scripts.fake_bigquery  # noqa: F401  (placeholder settings)
+from scripts.fake_bigquery import make_members
+
+os.environ.update(QUERY_BACKEND="snapshot", SNAPSHOT_PATH="", SNAPSHOT_REFRESH_FROM_BIGQUERY="False")
+
+from fastapi.testclient import TestClient
+
+from app.api.core import metrics
+from app.api.core.result_cache import result_cache
+from app.api.core.snapshot import MemberSnapshot
+from app.api.routes import chingu_members
+from app.main import app
+
+REQUESTS = [
+    ("post", "/chingu_members/table/filtered?limit=200", {"include": {"Gender": ["FEMALE", "NON-BINARY"]}}),
+    ("post", "/chingu_members/Gender/COUNT/filtered?by=Role", {"include": {"Country_Code": ["US", "IN"]}}),
+    ("post", "/chingu_members/facets/COUNT/filtered?facets=Gender&facets=Role", {"exclude": {"Goal": ["OTHER"]}}),
+    ("get", "/chingu_members/Country_Code/COUNT/", None),
+]
+
+
+def per_call_ns(fn, repeat: int = 200_000) -> float:
+    started = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - started) / repeat * 1e9
+
+
+def time_requests(client: TestClient, count: int) -> float:
+    started = time.perf_counter()
+    for i in range(count):
+        method, url, body = REQUESTS[i % len(REQUESTS)]
+        # measure the work, not the result cache
+        result_cache.invalidate()
+        response = client.post(url, json=body) if method == "post" else client.get(url)
+        assert response.status_code == 200, response.text
+    return (time.perf_counter() - started) / count * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=5000)
+    parser.add_argument("--requests", type=int, default=300)
+    parser.add_argument("--rounds", type=int, default=3)
+    args = parser.parse_args()
+
+    histogram = metrics.Histogram("benchmark_seconds", "", ("route",))
+
+    def timed_span():
+        with metrics.span("execute"):
+            pass
+
+    print(f"span outside a request   {per_call_ns(timed_span):>8.0f} ns")
+    token = metrics._request_timings.set(metrics.RequestTimings())
+    print(f"span inside a request    {per_call_ns(timed_span):>8.0f} ns")
+    metrics._request_timings.reset(token)
+    print(f"histogram observe        {per_call_ns(lambda: histogram.observe(0.042, route='/x')):>8.0f} ns")
+
+    with TestClient(app) as client:
+        chingu_members.install_snapshot(MemberSnapshot(make_members(args.rows)), source="benchmark")
+        time_requests(client, len(REQUESTS))  # warm-up
+        # the layer above MetricsMiddleware, so it can be taken out of the stack and put back
+        outer = app.middleware_stack
+        while not isinstance(outer.app, metrics.MetricsMiddleware):
+            outer = outer.app
+        metrics_layer = outer.app
+        with_metrics, without_metrics = float("inf"), float("inf")
+        # alternate rounds so warm-up and noise hit both sides alike; keep the best round of each
+        for _ in range(args.rounds):
+            outer.app = metrics_layer
+            with_metrics = min(with_metrics, time_requests(client, args.requests))
+            outer.app = metrics_layer.app
+            without_metrics = min(without_metrics, time_requests(client, args.requests))
+        outer.app = metrics_layer
+
+    print(f"\n{args.requests} requests, {args.rows} member snapshot")
+    print(f"{'without metrics':<24} {without_metrics:>8.3f} ms/request")
+    print(f"{'with metrics':<24} {with_metrics:>8.3f} ms/request ({with_metrics - without_metrics:+.3f})")
+
+    print(f"\n{'route':<48} {'stage':<10} {'mean ms':>8}")
+    for labels, series in metrics.request_stage_duration._values.items():
+        route, stage = (value for _, value in labels)
+        print(f"{route:<48} {stage:<10} {series[-2] / series[-1] * 1000:>8.3f}")
+
+
+if __name__ == "__main__":
+    main()
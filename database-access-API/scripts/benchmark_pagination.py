@@ -0,0 +1,63 @@
+"""Benchmark: per-page latency of OFFSET pagination vs. keyset (`after_id`) pagination at increasing depth.
+
+`ORDER BY id LIMIT n OFFSET k` makes the engine produce and discard k rows before the page, so
+page latency grows with depth; `WHERE id > @after_id ORDER BY id LIMIT n` seeks straight to it.
+The SQL side runs on an in-memory SQLite table with `id` as primary key. Run from `database-access-API/`:
+
+    python -m scripts.benchmark_pagination --rows 200000 --limit 200
+"""
+import argparse
+import time
+
+from scripts.fake_bigquery import load_sqlite, make_members
+
+from app.api.core.snapshot import MemberSnapshot
+from app.models import FilterBody
+
+WHERE = " WHERE Gender IN ('FEMALE', 'NON-BINARY', 'MALE')"
+
+
+def timed(fn, repeat: int) -> float:
+    started = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - started) / repeat * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=200000)
+    parser.add_argument("--limit", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    rows = make_members(args.rows)
+    connection = load_sqlite(rows)
+    snapshot = MemberSnapshot(rows)
+    matching = snapshot.filter_rows(FilterBody(include={"Gender": ["FEMALE", "NON-BINARY", "MALE"]}))
+    total = snapshot.index.popcount(matching)
+
+    offset_sql = f"SELECT * FROM members{WHERE} ORDER BY id LIMIT ? OFFSET ?"
+    keyset_sql = f"SELECT * FROM members{WHERE} AND id > ? ORDER BY id LIMIT ?"
+
+    print(f"{args.rows} rows, {total} matching, {args.limit} rows per page")
+    print(f"{'page':>6} {'SQL OFFSET us':>14} {'SQL keyset us':>14} {'snapshot OFFSET us':>19} {'snapshot keyset us':>19}")
+    page_count = total // args.limit
+    for page in sorted({0, 1, 10, page_count // 4, page_count // 2, page_count - 1}):
+        offset = page * args.limit
+        # the cursor a client would hold after walking to this page
+        cursor = snapshot.table(matching, offset - 1, 1).rows[0]["id"] if offset else 0
+        assert (
+            connection.execute(offset_sql, (args.limit, offset)).fetchall()
+            == connection.execute(keyset_sql, (cursor, args.limit)).fetchall()
+        )
+
+        sql_offset = timed(lambda: connection.execute(offset_sql, (args.limit, offset)).fetchall(), args.repeat)
+        sql_keyset = timed(lambda: connection.execute(keyset_sql, (cursor, args.limit)).fetchall(), args.repeat)
+        snapshot_offset = timed(lambda: snapshot.table(matching, offset, args.limit), args.repeat)
+        snapshot_keyset = timed(lambda: snapshot.table(matching, limit=args.limit, after_id=cursor), args.repeat)
+        print(f"{page:>6} {sql_offset:>14.0f} {sql_keyset:>14.0f} {snapshot_offset:>19.0f} {snapshot_keyset:>19.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""Benchmark: payload size and encode time of a /table/filtered page, `SELECT *` vs. the `fields=` projection.
+
+BigQuery bills by the columns a query reads, so the projected share of the row bytes is also the
+share of bytes scanned. Run from `database-access-API/`:
+
+    python -m scripts.benchmark_projection --rows 5000 --limit 200
+"""
+import argparse
+import time
+
+from scripts.fake_bigquery import make_members
+
+from app.api.core.query_compiler import normalize_fields
+from app.api.core.serialization import dumps
+from app.api.core.snapshot import MemberSnapshot
+from app.models import MemberField
+
+
+def encode(rows) -> bytes:
+    return dumps({"response": rows})
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=5000)
+    parser.add_argument("--limit", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    members = make_members(args.rows)
+    for member in members:
+        # the real table has free text here; the synthetic rows leave it empty
+        member["Goal_Other"] = "I want to build a portfolio project with a team and practise agile workflows."
+        member["Source_Other"] = "A friend from my bootcamp cohort recommended it on Discord."
+    snapshot = MemberSnapshot(members)
+
+    print(f"{args.limit} rows per page")
+    print(f"{'projection':<28} {'columns':>8} {'page bytes':>11} {'encode us':>10} {'share of *':>11}")
+    full_bytes = None
+    for name, fields in (
+        ("SELECT *", [MemberField.ALL]),
+        ("default (MemberCard)", None),
+        ("fields=Gender&fields=Role", [MemberField.GENDER, MemberField.ROLE]),
+    ):
+        columns = list(normalize_fields(fields))
+        page = snapshot.table(snapshot.index.all_rows, limit=args.limit, columns=columns)
+        payload = encode(page.rows)
+        full_bytes = full_bytes or len(payload)
+
+        started = time.perf_counter()
+        for _ in range(args.repeat):
+            encode(page.rows)
+        encode_us = (time.perf_counter() - started) / args.repeat * 1e6
+        print(f"{name:<28} {len(page.schema):>8} {len(payload):>11} {encode_us:>10.0f} {len(payload) / full_bytes:>10.0%}")
+
+
+if __name__ == "__main__":
+    main()
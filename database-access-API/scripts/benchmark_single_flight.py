@@ -0,0 +1,77 @@
+"""Benchmark: a landing-page burst of identical requests, with and without request coalescing.
+
+Every client fires the same default `/table/filtered` and `/Gender/COUNT/filtered` requests at the
+same moment, before anything is in the result cache. Without coalescing each request launches its
+own job and queues for a pool slot; with it, one job per distinct query serves the whole burst.
+Run from `database-access-API/`:
+
+    python -m scripts.benchmark_single_flight --latency 0.2 --clients 10 50 200
+"""
+import argparse
+import asyncio
+import time
+
+from fastapi import Response
+
+from scripts.fake_bigquery import FakeBigQueryClient, make_members
+
+from app.api.core import query_runner
+from app.api.core.result_cache import result_cache
+from app.api.core.single_flight import single_flight
+from app.api.core.unique_values import unique_value_cache
+from app.api.routes import chingu_members
+from app.models import Attribute, FilterBody
+
+shared_query = chingu_members.run_shared_query
+
+
+async def unshared_query(query_sql, job_config=None, key=None):
+    # the pre-coalescing behaviour: one job per request
+    return await query_runner.run_query(chingu_members.bigquery_client, query_sql, job_config)
+
+
+async def landing_page():
+    filters = FilterBody(include={"Gender": ["FEMALE", "NON-BINARY"]})
+    await chingu_members.query_filtered_table(
+        filters, offset=None, limit=200, after_id=None, fields=None, stream=False, output_format=None, dictionary=False, accept=None, if_none_match=None
+    )
+    await chingu_members.filter_attribute_count(Attribute.GENDER, filters, by=None, if_none_match=None)
+
+
+async def burst(clients: int) -> float:
+    started = time.perf_counter()
+    await asyncio.gather(*(landing_page() for _ in range(clients)))
+    return time.perf_counter() - started
+
+
+def run(client, clients: int, coalesce: bool, pool: int):
+    chingu_members.run_shared_query = shared_query if coalesce else unshared_query
+    query_runner.configure(pool, timeout_seconds=120)
+    result_cache.invalidate()
+    jobs_before, coalesced_before = client.query_count, single_flight.coalesced
+    seconds = asyncio.run(burst(clients))
+    return seconds, client.query_count - jobs_before, single_flight.coalesced - coalesced_before
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--latency", type=float, default=0.2, help="seconds per fake BigQuery job")
+    parser.add_argument("--pool", type=int, default=8, help="BQ_MAX_CONCURRENT_QUERIES")
+    parser.add_argument("--clients", type=int, nargs="+", default=[10, 50, 200])
+    args = parser.parse_args()
+
+    members = make_members(500)
+    unique_value_cache.replace({"Gender": {member["Gender"] for member in members}}, source="benchmark")
+    client = FakeBigQueryClient(members[:200], latency=args.latency)
+    chingu_members.bigquery_client = client
+
+    print(f"fake job latency {args.latency * 1000:.0f} ms, pool size {args.pool}, 2 requests per client")
+    print(f"{'clients':>8} {'jobs':>6} {'seconds':>8} {'shared jobs':>15} {'seconds':>8} {'requests coalesced':>19}")
+    for clients in args.clients:
+        plain_seconds, plain_jobs, _ = run(client, clients, False, args.pool)
+        shared_seconds, shared_jobs, coalesced = run(client, clients, True, args.pool)
+        print(f"{clients:>8} {plain_jobs:>6} {plain_seconds:>8.2f} {shared_jobs:>15} {shared_seconds:>8.2f} {coalesced:>19}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""Benchmark: warming the distinct-value cache with one job per attribute vs. one combined job.
+
+Every BigQuery job pays a fixed scheduling/latency cost regardless of how little it reads, which the
+fake client models with `--latency`. Also times the UNIQUE endpoint running a job per request vs.
+serving from the cache. Run from `database-access-API/`:
+
+    python -m scripts.benchmark_unique_values --latency 0.5
+"""
+import argparse
+import asyncio
+import time
+
+from fastapi import Response
+
+from scripts.fake_bigquery import FakeBigQueryClient, make_members
+
+from app.api.core import query_runner
+from app.api.core.unique_values import unique_value_cache
+from app.api.routes import chingu_members
+from app.models import Attribute, AttributeLists
+
+
+class DistinctFakeClient(FakeBigQueryClient):
+    """Answers per-attribute DISTINCT queries and the combined ARRAY_AGG query with the right row shapes."""
+
+    def __init__(self, members, latency):
+        super().__init__([], latency)
+        self.members = members
+
+    def query(self, query_sql: str, job_config=None):
+        if "ARRAY_AGG" in query_sql:
+            row = {}
+            for attr in Attribute:
+                values = [member[attr.value] for member in self.members]
+                if attr.name in AttributeLists.__members__:
+                    row[attr.value] = sorted({v for member_values in values for v in member_values})
+                else:
+                    row[attr.value] = sorted({v for v in values if v is not None}, key=str)
+                    row[f"{attr.value}_has_null"] = None in values
+            self.rows = [row]
+        else:
+            attribute = next(attr.value for attr in Attribute if f"`{attr.value}`" in query_sql)
+            self.rows = [{"value": value} for value in unique_value_cache.get(attribute, set())]
+        return super().query(query_sql, job_config)
+
+
+async def per_attribute_sequential(client):
+    # the old startup: gather() over coroutines that each blocked on their job in turn
+    return {attr.value: [row["value"] for row in client.query(chingu_members.distinct_query(attr)).result()] for attr in Attribute}
+
+
+async def per_attribute_pooled(client):
+    results = await asyncio.gather(*(query_runner.run_query(client, chingu_members.distinct_query(attr)) for attr in Attribute))
+    return {attr.value: [row["value"] for row in result.rows] for attr, result in zip(Attribute, results)}
+
+
+async def combined(client):
+    result = await query_runner.run_query(client, chingu_members.combined_distinct_query())
+    return chingu_members.parse_combined_distinct(result.rows[0])
+
+
+def timed(coroutine_function, client) -> tuple:
+    query_runner.configure(8, timeout_seconds=60)
+    jobs_before = client.query_count
+    started = time.perf_counter()
+    values = asyncio.run(coroutine_function(client))
+    return time.perf_counter() - started, client.query_count - jobs_before, values
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--latency", type=float, default=0.5, help="seconds per fake BigQuery job")
+    parser.add_argument("--rows", type=int, default=5000)
+    args = parser.parse_args()
+
+    client = DistinctFakeClient(make_members(args.rows), args.latency)
+    chingu_members.bigquery_client = client
+
+    combined_seconds, combined_jobs, values = timed(combined, client)
+    unique_value_cache.replace(values, source="benchmark")
+    sequential_seconds, sequential_jobs, sequential_values = timed(per_attribute_sequential, client)
+    pooled_seconds, pooled_jobs, _ = timed(per_attribute_pooled, client)
+    assert {k: set(v) for k, v in sequential_values.items()} == {k: set(v) for k, v in values.items()}
+
+    print(f"fake job latency {args.latency * 1000:.0f} ms, {len(Attribute)} attributes")
+    print(f"{'warm-up path':<34} {'jobs':>5} {'seconds':>8} {'speedup':>8}")
+    for name, seconds, jobs in (
+        ("per attribute, sequential (old)", sequential_seconds, sequential_jobs),
+        ("per attribute, thread pool", pooled_seconds, pooled_jobs),
+        ("combined ARRAY_AGG(DISTINCT)", combined_seconds, combined_jobs),
+    ):
+        print(f"{name:<34} {jobs:>5} {seconds:>8.2f} {sequential_seconds / seconds:>7.1f}x")
+
+    async def unique_from_cache():
+        started = time.perf_counter()
+        for _ in range(1000):
+            await chingu_members.get_unique_values(Attribute.COUNTRY_CODE, Response(), if_none_match=None)
+        return (time.perf_counter() - started) / 1000
+
+    cached_seconds = asyncio.run(unique_from_cache())
+    print(f"\nGET /Country_Code/UNIQUE: {args.latency * 1000:.0f} ms per request as a job, "
+          f"{cached_seconds * 1e6:.1f} us served from the cache")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+"""Write the distinct-value cache that ships in the Docker image, before a deploy.
+
+A new Cloud Run instance has no saved copy of its own: instance storage starts empty and `/app` is
+read-only for the service user. The image therefore carries `app/unique_value_cache.json`, loaded at
+startup through `UNIQUE_VALUE_CACHE_PATH`, so filtered requests are validated from the first request
+instead of answering 502 until the first background refresh lands. Run from `database-access-API/`
+with `app/.env` filled in:
+
+    python -m scripts.export_unique_values                 # one combined job on the BigQuery table
+    python -m scripts.export_unique_values --snapshot ../data_cleaning/data/chingu_members_cleaned.json
+"""
+import argparse
+import asyncio
+
+from app.api.core.query_runner import run_query
+from app.api.core.snapshot import MemberSnapshot
+from app.api.core.unique_values import unique_value_cache
+from app.api.routes import chingu_members
+from app.models import Attribute
+
+BAKED_PATH = "app/unique_value_cache.json"
+
+
+async def from_bigquery():
+    client = chingu_members.make_bigquery_client()
+    query_result = await run_query(client, chingu_members.combined_distinct_query())
+    unique_value_cache.replace(chingu_members.parse_combined_distinct(query_result.rows[0]), source="bigquery")
+
+
+def from_snapshot(snapshot_path: str):
+    snapshot = MemberSnapshot.from_ndjson(snapshot_path)
+    unique_value_cache.replace({attr.value: snapshot.unique(attr.value) for attr in Attribute}, source=snapshot_path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--snapshot", help="build from the cleaned NDJSON instead of querying BigQuery")
+    parser.add_argument("--output", default=BAKED_PATH)
+    args = parser.parse_args()
+
+    if args.snapshot:
+        from_snapshot(args.snapshot)
+    else:
+        asyncio.run(from_bigquery())
+    unique_value_cache.save(args.output)
+    counts = {attribute: len(values) for attribute, values in unique_value_cache.values.items()}
+    print(f"Wrote the distinct values of {len(counts)} attributes to {args.output}: {counts}")
+
+
+if __name__ == "__main__":
+    main()
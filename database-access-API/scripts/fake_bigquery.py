@@ -0,0 +1,158 @@
+"""Offline stand-ins used by the benchmark scripts.
+
+Importing this module fills in placeholder values for the required settings, so the app can be
+imported without an `app/.env` or GCP credentials.
+"""
+import json
+import os
+import random
+import sqlite3
+import time
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+from typing import Any, Dict, List
+
+import pyarrow as pa
+
+for _name, _value in {
+    "GCP_PROJECT_ID": "offline-project",
+    "DATASET": "chingu_members",
+    "TABLE": "chingu_members_clean",
+    "IS_PRODUCTION": "False",
+    "REGION": "us-central1",
+    "SERVICE_NAME": "chingu-members-api",
+    "SERVICE_ACCOUNT": "offline@offline-project.iam.gserviceaccount.com",
+    "GOOGLE_APPLICATION_CREDENTIALS": "/dev/null",
+}.items():
+    os.environ.setdefault(_name, _value)
+
+
+GENDERS = ["MALE", "FEMALE", "NON-BINARY", "PREFER NOT TO SAY", "TRANS", None]
+COUNTRIES = {"US": "United States", "IN": "India", "GB": "United Kingdom", "NG": "Nigeria", "CA": "Canada",
+             "BR": "Brazil", "DE": "Germany", "PH": "Philippines", "KE": "Kenya", "FR": "France"}
+GOALS = ["GAIN EXPERIENCE", "ACCELERATE LEARNING", "NETWORK WITH OTHERS", "GET A JOB", "OTHER", None]
+SOURCES = ["PERSONAL NETWORK", "GOOGLE SEARCH", "LinkedIn", "YOUTUBE", "OTHER", None]
+ROLES = ["Developer", "Web Developer", "Scrum Master", "Product Owner", "UI/UX Designer", "Data Scientist", None]
+VOYAGE_TIERS = ["Tier 1", "Tier 2", "Tier 3", "Bears", "Geckos", "Toucans"]
+
+
+def make_members(row_count: int, seed: int = 58) -> List[Dict[str, Any]]:
+    """Synthetic rows shaped like the cleaned chingu_members table."""
+    rng = random.Random(seed)
+    start = datetime(2019, 1, 1, tzinfo=timezone.utc)
+    rows = []
+    for member_id in range(1, row_count + 1):
+        code = rng.choice(list(COUNTRIES))
+        offset = rng.randint(-11, 12)
+        signups = sorted(rng.sample(range(1, 59), rng.randint(0, 3)))
+        goal = rng.choice(GOALS)
+        source = rng.choice(SOURCES)
+        rows.append({
+            "Gender": rng.choice(GENDERS),
+            "Goal": goal,
+            "Goal_Other": "learn to ship a product with a team" if goal == "OTHER" else None,
+            "Source": source,
+            "Source_Other": "a friend at a meetup" if source == "OTHER" else None,
+            "Solo_Project_Tier": rng.choice([1, 2, 3, None]),
+            "Timestamp": start + timedelta(minutes=rng.randint(0, 6 * 365 * 24 * 60)),
+            "Timezone": f"GMT+{offset}" if offset >= 0 else f"GMT{offset}",
+            "GMT_Offset": offset,
+            "Country_Name": COUNTRIES[code],
+            "Country_Code": code,
+            "Role": rng.choice(ROLES),
+            "id": member_id,
+            "Voyage_Signup_ids": signups,
+            "Voyage_Tiers": [rng.choice(VOYAGE_TIERS) for _ in signups],
+        })
+    return rows
+
+
+LIST_COLUMNS = {"Voyage_Signup_ids", "Voyage_Tiers"}
+
+
+def load_sqlite(rows: List[Dict[str, Any]]) -> sqlite3.Connection:
+    """In-memory SQLite copy of `rows`; list columns are stored as JSON text for `json_each`."""
+    connection = sqlite3.connect(":memory:")
+    columns = list(rows[0])
+    definitions = ", ".join("id INTEGER PRIMARY KEY" if c == "id" else c for c in columns)
+    connection.execute(f"CREATE TABLE members ({definitions})")
+    connection.executemany(
+        f"INSERT INTO members VALUES ({', '.join('?' for _ in columns)})",
+        [
+            [json.dumps(row[c]) if c in LIST_COLUMNS else (row[c].isoformat() if c == "Timestamp" else row[c]) for c in columns]
+            for row in rows
+        ],
+    )
+    return connection
+
+
+class _FakeRows(list):
+    def __init__(self, rows: List[Dict[str, Any]], page_size: int = None):
+        super().__init__(rows)
+        self.schema = [SimpleNamespace(name=name) for name in (rows[0] if rows else {})]
+        self.page_size = page_size or max(len(rows), 1)
+
+    def to_arrow(self):
+        return pa.Table.from_pylist(list(self))
+
+    @property
+    def pages(self):
+        for start in range(0, len(self), self.page_size):
+            yield self[start:start + self.page_size]
+
+
+class _FakeJob:
+    def __init__(self, rows: List[Dict[str, Any]], latency: float, bytes_processed: int = 0):
+        self._rows = rows
+        self._latency = latency
+        # the job statistics the real QueryJob exposes
+        self.total_bytes_processed = self.total_bytes_billed = bytes_processed
+        self.slot_millis = int(latency * 1000)
+        self.cache_hit = False
+
+    def result(self, timeout=None, page_size=None):
+        if timeout is not None and self._latency > timeout:
+            time.sleep(timeout)
+            raise TimeoutError()
+        # blocks the calling thread exactly like the real client waiting on a job
+        time.sleep(self._latency)
+        return _FakeRows(self._rows, page_size)
+
+    def cancel(self):
+        return True
+
+
+class FakeBigQueryClient:
+    """Answers every query with the same canned rows after `latency` seconds."""
+
+    def __init__(self, rows: List[Dict[str, Any]], latency: float = 0.05, dry_run_latency: float = 0.0):
+        self.rows = rows
+        self.latency = latency
+        self.dry_run_latency = dry_run_latency
+        self.query_count = 0
+        self.modified = datetime.now(timezone.utc)
+        # bytes per column, so a dry run can charge only the columns a query reads, like BigQuery
+        self.column_bytes = {
+            name: sum(len(json.dumps(row[name], default=str)) for row in rows) for name in (rows[0] if rows else {})
+        }
+        self.bytes_processed = sum(self.column_bytes.values())
+        self.dry_run_count = 0
+        self.bytes_billed = 0
+
+    def bytes_read(self, query_sql: str) -> int:
+        if "SELECT *" in query_sql:
+            return self.bytes_processed
+        return sum(size for name, size in self.column_bytes.items() if f"`{name}`" in query_sql)
+
+    def query(self, query_sql: str, job_config=None):
+        if job_config is not None and job_config.dry_run:
+            # a dry run returns at once with statistics and no rows
+            self.dry_run_count += 1
+            time.sleep(self.dry_run_latency)
+            return _FakeJob([], 0.0, self.bytes_read(query_sql))
+        self.query_count += 1
+        self.bytes_billed += self.bytes_read(query_sql)
+        return _FakeJob(self.rows, self.latency, self.bytes_read(query_sql))
+
+    def get_table(self, table_id: str):
+        return SimpleNamespace(table_id=table_id, modified=self.modified)
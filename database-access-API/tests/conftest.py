@@ -0,0 +1,34 @@
+"""Placeholder settings for the tests, so the app imports without an `app/.env` or GCP credentials.
+
+`Settings()` is built when `app.api.core.config` is first imported, which happens while the test
+modules are collected; pytest imports this file before any of them, so a fixture would be too late.
+Values from the environment or an `app/.env` still win.
+"""
+import json
+import os
+
+import pytest
+
+for _name, _value in {
+    "GCP_PROJECT_ID": "test-project",
+    "DATASET": "chingu_members",
+    "TABLE": "chingu_members_clean",
+    "IS_PRODUCTION": "False",
+    "REGION": "us-central1",
+    "SERVICE_NAME": "chingu-members-api",
+    "SERVICE_ACCOUNT": "test@test-project.iam.gserviceaccount.com",
+    "GOOGLE_APPLICATION_CREDENTIALS": "/dev/null",
+}.items():
+    os.environ.setdefault(_name, _value)
+
+
+@pytest.fixture(scope="session")
+def members_path(tmp_path_factory):
+    """300 synthetic cleaned members as NDJSON, the format both snapshot and local mode load."""
+    from scripts.fake_bigquery import make_members
+
+    path = tmp_path_factory.mktemp("members") / "chingu_members_cleaned.json"
+    with open(path, "w") as f:
+        for row in make_members(300):
+            f.write(json.dumps({**row, "Timestamp": row["Timestamp"].isoformat()}) + "\n")
+    return str(path)
@@ -0,0 +1,62 @@
+"""`BQ_COST_GUARD=downgrade` must mark every narrowed `/table/filtered` response, not just the first.
+
+A downgraded response holds fewer columns than the request's cache key and ETag stand for, so it
+must never be cached under them. Run from `database-access-API/`:
+
+    python -m pytest tests
+"""
+import asyncio
+
+import pytest
+
+pytest.importorskip("duckdb")
+
+from fastapi.testclient import TestClient
+
+from app.api.core.config import settings
+from app.api.core.cost_guard import DOWNGRADED_HEADER, ESTIMATE_HEADER, cost_estimates
+from app.api.core.local_bigquery import LocalBigQueryClient
+from app.api.core.query_compiler import compile_table_query, normalize_fields
+from app.api.core.result_cache import result_cache
+from app.api.routes import chingu_members
+from app.main import app
+from app.models import FilterBody
+
+SCHEMA_PATH = "../data_cleaning/bigquery_schema.json"
+URL = "/chingu_members/table/filtered?limit=20&fields=*"
+
+
+@pytest.fixture
+def downgrading_client(members_path, monkeypatch):
+    local_client = LocalBigQueryClient.from_files(members_path, SCHEMA_PATH)
+    all_columns = sum(local_client.column_bytes.values())
+    card_columns = local_client.bytes_read(compile_table_query(FilterBody(), None, 20, None, normalize_fields(None)).sql)
+    assert card_columns < all_columns
+
+    monkeypatch.setattr(settings, "QUERY_BACKEND", "local")
+    monkeypatch.setattr(settings, "UNIQUE_VALUE_CACHE_SAVE", False)
+    monkeypatch.setattr(chingu_members, "member_snapshot", None)
+    monkeypatch.setattr(chingu_members, "bigquery_client", local_client)
+    # filters are validated against the distinct values, whose job reads every column
+    asyncio.run(chingu_members.refresh_unique_values())
+    monkeypatch.setattr(settings, "BQ_COST_GUARD", "downgrade")
+    # room for the default fields, not for all of them
+    monkeypatch.setattr(settings, "BQ_MAXIMUM_BYTES_BILLED", (card_columns + all_columns) // 2)
+    result_cache.invalidate()
+    cost_estimates.invalidate()
+    yield TestClient(app)
+    result_cache.invalidate()
+    cost_estimates.invalidate()
+
+
+def test_downgraded_responses_are_not_cached(downgrading_client):
+    card_fields = set(normalize_fields(None))
+    for _ in range(2):
+        response = downgrading_client.post(URL, json={})
+        assert response.status_code == 200, response.text
+        assert response.headers[DOWNGRADED_HEADER] == "fields"
+        assert ESTIMATE_HEADER in response.headers
+        assert "ETag" not in response.headers
+        assert response.headers["Cache-Control"] == "no-store"
+        assert {field for row in response.json()["response"] for field in row} <= card_fields
+    assert result_cache.stats()["entries"] == 0
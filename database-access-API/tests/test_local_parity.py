@@ -0,0 +1,75 @@
+"""The local DuckDB backend and snapshot mode must answer the same requests the same way.
+
+Both load the same cleaned NDJSON; the local backend types its columns from `bigquery_schema.json`,
+so a type there that disagrees with the cleaned data shows up here. Run from `database-access-API/`:
+
+    python -m pytest tests
+"""
+import asyncio
+import json
+
+import pytest
+
+pytest.importorskip("duckdb")
+
+from fastapi.testclient import TestClient
+
+from app.api.core.config import settings
+from app.api.core.local_bigquery import LocalBigQueryClient
+from app.api.core.result_cache import result_cache
+from app.api.core.snapshot import MemberSnapshot
+from app.api.routes import chingu_members
+from app.main import app
+
+SCHEMA_PATH = "../data_cleaning/bigquery_schema.json"
+
+REQUESTS = [
+    ("get", "/chingu_members/Solo_Project_Tier/UNIQUE", None),
+    ("get", "/chingu_members/GMT_Offset/UNIQUE", None),
+    ("get", "/chingu_members/Voyage_Signup_ids/UNIQUE", None),
+    ("get", "/chingu_members/Solo_Project_Tier/COUNT/", None),
+    ("post", "/chingu_members/Gender/COUNT/filtered", {"include": {"Solo_Project_Tier": [1, 3]}}),
+    ("post", "/chingu_members/Solo_Project_Tier/COUNT/filtered", {"exclude": {"GMT_Offset": [0, -5]}}),
+    ("post", "/chingu_members/Role/COUNT/filtered", {"include": {"Voyage_Signup_ids": [40, 41]}}),
+    ("post", "/chingu_members/table/filtered?limit=20&fields=*", {"include": {"Solo_Project_Tier": [2]}}),
+]
+
+
+def canonical(body):
+    # row order isn't part of either backend's contract for COUNT and UNIQUE
+    if isinstance(body, dict) and "response" in body and body.get("next_cursor", "absent") == "absent":
+        body = {**body, "response": sorted(body["response"], key=json.dumps)}
+    return body
+
+
+def responses(backend: str, members_path: str, monkeypatch):
+    monkeypatch.setattr(settings, "QUERY_BACKEND", backend)
+    # don't overwrite a saved distinct-value copy from app/.env
+    monkeypatch.setattr(settings, "UNIQUE_VALUE_CACHE_SAVE", False)
+    if backend == "snapshot":
+        chingu_members.install_snapshot(MemberSnapshot.from_ndjson(members_path), source=members_path)
+    else:
+        monkeypatch.setattr(chingu_members, "member_snapshot", None)
+        monkeypatch.setattr(chingu_members, "bigquery_client", LocalBigQueryClient.from_files(members_path, SCHEMA_PATH))
+        asyncio.run(chingu_members.refresh_unique_values())
+    result_cache.invalidate()
+
+    client = TestClient(app)
+    answers = []
+    for method, url, body in REQUESTS:
+        response = client.request(method, url, json=body)
+        assert response.status_code == 200, (backend, url, response.text)
+        answers.append(canonical(response.json()))
+    return answers
+
+
+def test_local_backend_matches_snapshot(members_path, monkeypatch):
+    snapshot_answers = responses("snapshot", members_path, monkeypatch)
+    local_answers = responses("local", members_path, monkeypatch)
+    for (_, url, _), snapshot_answer, local_answer in zip(REQUESTS, snapshot_answers, local_answers):
+        assert local_answer == snapshot_answer, url
+
+
+def test_integer_attributes_stay_integers(members_path, monkeypatch):
+    local_answers = responses("local", members_path, monkeypatch)
+    assert sorted(local_answers[0], key=str) == [1, 2, 3, None]
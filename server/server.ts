@@ -15,6 +15,26 @@ app.use(
     })
 );
 
+// The API tags responses with an ETag tied to the table version; pass it through both ways so a
+// revalidation costs a 304 instead of a BigQuery query, and keep its Cache-Control for CDNs.
+const CACHE_HEADERS = ["etag", "cache-control", "vary"];
+
+function forwardConditionalHeaders(req: express.Request): Record<string, string> {
+    const ifNoneMatch = req.get("If-None-Match");
+    return ifNoneMatch ? { "If-None-Match": ifNoneMatch } : {};
+}
+
+function relay(upstream: { status: number; headers: Record<string, any>; data: unknown }, res: express.Response) {
+    for (const name of CACHE_HEADERS) {
+        if (upstream.headers[name]) res.set(name, upstream.headers[name]);
+    }
+    if (upstream.status === 304) {
+        res.status(304).end();
+    } else {
+        res.json(upstream.data);
+    }
+}
+
 app.get("/", (_req, res) => {
     res.send("Endpoints: /members");
 });
@@ -29,23 +49,29 @@ app.post("/members", async (req, res) => {
                 headers: {
                     Accept: "application/json",
                     "Content-Type": "application/json",
+                    ...forwardConditionalHeaders(req),
                 },
+                validateStatus: (status) => status < 400,
             }
         );
 
-        res.json(response.data);
+        relay(response, res);
     } catch (err) {
         console.error(err);
         res.status(500).json({ error: "Request failed", details: err });
     }
 });
 
-app.get("/countries", async (_req, res) => {
+app.get("/countries", async (req, res) => {
     try {
         const response = await axios.get(
-            "https://chingu-members-api-v3-12086067540.us-central1.run.app/chingu_members/Country_Code/UNIQUE"
+            "https://chingu-members-api-v3-12086067540.us-central1.run.app/chingu_members/Country_Code/UNIQUE",
+            {
+                headers: forwardConditionalHeaders(req),
+                validateStatus: (status) => status < 400,
+            }
         );
-        res.json(response.data);
+        relay(response, res);
     } catch (err) {
         console.error(err);
         res.status(500).json({ error: "Request failed", details: err });